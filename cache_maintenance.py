@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cache_maintenance.py – Mantenimiento de <DATA_DIR>/cached_files.
+
+1. Precalienta: convierte a Parquet, en paralelo, todas las hojas de cada
+   .xlsx que coincide con FILE_KEYWORDS (así el primer usuario del mes no paga
+   las conversiones de read_any).
+2. Compacta: reescribe cada Parquet por lotes con un tamaño de row group
+   acorde a CHUNK_ROWS y el códec (zstd o snappy) que gane el benchmark.
+3. Limpia: lista entradas huérfanas (su Excel ya no existe), sidecars sin
+   Parquet y temporales de escrituras interrumpidas; sólo las borra con
+   --delete (la caché puede traer Parquet sin su Excel, p.ej. los de demo).
+4. Recalcula el rollup por líder de ranking.py (org_rollup.parquet), así la
+   primera presentación del mes no lo paga.
+
+Respeta los locks de graphs.read_any, así que puede correr con la app abierta.
+
+Uso:
+    python cache_maintenance.py --root ./files --jobs 4 [--delete]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import graphs
+import ranking
+
+# ───────────── CONFIG ─────────────
+CODECS = ("zstd", "snappy")
+ZSTD_MIN_SAVING = 0.10  # zstd debe ahorrar al menos un 10 % de bytes…
+ZSTD_MAX_SLOWDOWN = 1.5  # …sin leer más de 1.5× más lento que snappy
+BENCH_ROWS = 100_000  # filas de muestra para el benchmark
+ROW_GROUP_BYTES = 64 * 2**20  # tamaño objetivo (sin comprimir) de un row group
+ROW_GROUP_MIN_ROWS = 10_000
+COMPACT_KEY = b"graphs.compact"  # metadato: "<códec>/<filas por row group>"
+
+
+@dataclass
+class Step:
+    name: str
+    ok: bool
+    seconds: float
+    before: int = 0
+    after: int = 0
+    note: str = ""
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(n) < 1024 or unit == "GiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return ""
+
+
+# ───────────── 1 · PRECALENTAR ─────────────
+def _sources(root: str) -> list[tuple[str, str | None]]:
+    """(xlsx, hoja) de todos los archivos que coinciden con alguna palabra clave."""
+    out = []
+    for task, keyword in graphs.FILE_KEYWORDS.items():
+        for entry in graphs.find_files(keyword, root):
+            out += [(entry.path, sheet) for sheet in graphs.SOURCE_SHEETS[task]]
+    return list(dict.fromkeys(out))
+
+
+def _warm(fp: str, sheet: str | None, cache_dir: str) -> Step:
+    name = os.path.basename(graphs._cache_path(fp, sheet, cache_dir))
+    t0 = time.perf_counter()
+    try:
+        cp = graphs.warm_cache(fp, sheet, cache_dir)
+    except Exception as e:  # p.ej. un Excel antiguo sin esa hoja
+        note = f"{type(e).__name__}: {e}"
+        return Step(name, False, time.perf_counter() - t0, note=note)
+    if not os.path.isfile(cp):  # sin lock (o sin permiso): se leyó sin escribir
+        note = "no se escribió; se omite"
+        return Step(name, False, time.perf_counter() - t0, note=note)
+    return Step(name, True, time.perf_counter() - t0, after=os.path.getsize(cp))
+
+
+# ───────────── 2 · COMPACTAR ─────────────
+def _row_group_rows(pf: pq.ParquetFile) -> int:
+    meta = pf.metadata
+    raw = sum(meta.row_group(i).total_byte_size for i in range(meta.num_row_groups))
+    per_row = max(raw / max(meta.num_rows, 1), 1.0)
+    rows = int(ROW_GROUP_BYTES / per_row)
+    # Acotado a CHUNK_ROWS, el tamaño de lote de la agregación por lotes
+    rows = max(ROW_GROUP_MIN_ROWS, min(rows, graphs.CHUNK_ROWS))
+    return min(rows, max(meta.num_rows, 1))
+
+
+def _bench(sample: pa.Table, codec: str) -> tuple[int, float]:
+    """(bytes, segundos de lectura) de la muestra escrita con *codec*."""
+    sink = pa.BufferOutputStream()
+    pq.write_table(sample, sink, compression=codec)
+    data = sink.getvalue()
+    t0 = time.perf_counter()
+    pq.read_table(pa.BufferReader(data))
+    return data.size, time.perf_counter() - t0
+
+
+def _pick_codec(pf: pq.ParquetFile) -> tuple[str, str]:
+    batches = []
+    rows = 0
+    for b in pf.iter_batches(batch_size=BENCH_ROWS):
+        batches.append(b)
+        rows += b.num_rows
+        if rows >= BENCH_ROWS:
+            break
+    sample = pa.Table.from_batches(batches, schema=pf.schema_arrow)
+    (z_size, z_read), (s_size, s_read) = (_bench(sample, c) for c in CODECS)
+    saving = 1 - z_size / max(s_size, 1)
+    slowdown = z_read / max(s_read, 1e-9)
+    zstd_wins = saving >= ZSTD_MIN_SAVING and slowdown <= ZSTD_MAX_SLOWDOWN
+    codec = "zstd" if zstd_wins else "snappy"
+    return codec, f"zstd {saving:+.0%} bytes, lectura ×{slowdown:.2f}"
+
+
+def _compact(cache_path: str, force: bool = False) -> Step:
+    name = os.path.basename(cache_path)
+    t0 = time.perf_counter()
+    # Todo bajo el lock: una conversión en curso puede sustituir el archivo
+    with graphs._file_lock(cache_path) as locked:
+        if not locked:
+            secs = time.perf_counter() - t0
+            return Step(name, False, secs, note="sin lock; se omite")
+        try:
+            st = os.stat(cache_path)
+        except FileNotFoundError:  # borrado mientras esperábamos el lock
+            secs = time.perf_counter() - t0
+            return Step(name, False, secs, note="ya no existe")
+        before = st.st_size
+        try:
+            pf = pq.ParquetFile(cache_path)
+        except Exception as e:  # ilegible: se reconstruye borrándolo y precalentando
+            note = f"{type(e).__name__}: {e}"
+            return Step(name, False, time.perf_counter() - t0, before, before, note)
+        meta = pf.schema_arrow.metadata or {}
+        if COMPACT_KEY in meta and not force:
+            pf.close()
+            secs = time.perf_counter() - t0
+            return Step(name, True, secs, before, before, "ya compactado")
+
+        codec, note = _pick_codec(pf)
+        rg_rows = _row_group_rows(pf)
+        schema = pf.schema_arrow.with_metadata(
+            {**meta, COMPACT_KEY: f"{codec}/{rg_rows}".encode()}
+        )
+        with graphs._atomic_target(cache_path) as tmp:
+            # pf se cierra antes del reemplazo (Windows no sustituye abiertos)
+            with pf, pq.ParquetWriter(tmp, schema, compression=codec) as w:
+                for batch in pf.iter_batches(batch_size=rg_rows):
+                    table = pa.Table.from_batches([batch], schema=schema)
+                    w.write_table(table, row_group_size=rg_rows)
+        # Mismos datos: se conserva el mtime para no invalidar los sidecars
+        os.utime(cache_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    after = os.path.getsize(cache_path)
+    note = f"{codec}, {rg_rows} filas/rg · {note}"
+    return Step(name, True, time.perf_counter() - t0, before, after, note)
+
+
+# ───────────── 3 · LIMPIAR ─────────────
+def _orphans(root: str, cache_dir: str) -> list[str]:
+    """Entradas de la caché cuyo Excel ya no está en *root* (ni subcarpetas)."""
+    entries = graphs.find_files("", root)
+    bases = {graphs._cache_stem(e.path, cache_dir) for e in entries}
+    names = set(os.listdir(cache_dir))
+    # Los sidecars se llaman <parquet>.<algo> (p.ej. «.leaders.json», «.tmd_sketch.parquet»)
+    parquets = {
+        n
+        for n in names
+        if n.endswith(".parquet") and ".parquet." not in n and not n.startswith(".")
+    }
+    out = []
+    for n in sorted(names):
+        path = os.path.join(cache_dir, n)
+        if n in (ranking.ROLLUP_FILE, graphs.DIR_INDEX_FILE):
+            continue  # no salen de un Excel: los mantienen ranking.py y graphs.py
+        if n.startswith(".tmp_"):
+            out.append(path)  # escritura interrumpida
+        elif n in parquets:
+            stem = n[: -len(".parquet")]
+            if not any(stem == b or stem.startswith(f"{b}__") for b in bases):
+                out.append(path)
+        elif not any(n.startswith(f"{p}.") for p in parquets):
+            out.append(path)  # sidecar sin su Parquet
+    # Los sidecars de un Parquet huérfano también sobran
+    gone = {os.path.basename(p) for p in out}
+    out += [
+        os.path.join(cache_dir, n)
+        for n in sorted(names - gone)
+        if any(n.startswith(f"{g}.") for g in gone)
+    ]
+    return out
+
+
+# ───────────── 4 · ROLLUP DEL RANKING ─────────────
+def _rollup(root: str) -> Step:
+    """Deja el rollup de *root* listo para que la presentación sólo lo lea."""
+    t0 = time.perf_counter()
+    leader = (graphs.CHAPTER_LEADER, graphs.CHAPTER_LEADER_EMAIL)
+    try:
+        with graphs.configured(*leader, root):
+            leaders = len(ranking.load_rollup())
+            size = os.path.getsize(ranking.rollup_path())
+    except Exception as e:  # p.ej. una fuente sin la columna del CL
+        note = f"{type(e).__name__}: {e}"
+        return Step(ranking.ROLLUP_FILE, False, time.perf_counter() - t0, note=note)
+    secs = time.perf_counter() - t0
+    return Step(ranking.ROLLUP_FILE, True, secs, after=size, note=f"{leaders} líderes")
+
+
+# ───────────── PRINCIPAL ─────────────
+def maintain(
+    root: str,
+    jobs: int = 1,
+    compact: bool = True,
+    force: bool = False,
+    delete: bool = False,
+) -> list[Step]:
+    """Precalienta, compacta y limpia la caché de *root*; imprime el resumen."""
+    cache_dir = os.path.join(root, graphs.CACHE_SUBDIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    steps: list[Step] = []
+
+    # Primero la limpieza: no tiene sentido compactar lo que se va a borrar
+    t0 = time.perf_counter()
+    orphans = _orphans(root, cache_dir)
+    removed = 0
+    for path in orphans:
+        size = os.path.getsize(path)
+        removed += size
+        if delete:
+            os.remove(path)
+            steps.append(Step(os.path.basename(path), True, 0.0, size, 0, "huérfano"))
+        else:
+            note = "huérfano (se conserva; --delete para borrarlo)"
+            steps.append(Step(os.path.basename(path), True, 0.0, after=size, note=note))
+    t_clean = time.perf_counter() - t0
+
+    with ProcessPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        t1 = time.perf_counter()
+        pending = [
+            (fp, sheet)
+            for fp, sheet in _sources(root)
+            if not graphs.is_cached(fp, sheet, cache_dir)
+        ]
+        futs = [pool.submit(_warm, fp, sheet, cache_dir) for fp, sheet in pending]
+        warm = [f.result() for f in futs]
+        steps += warm
+        t_warm = time.perf_counter() - t1
+
+        t2 = time.perf_counter()
+        if compact:
+            entries = sorted(
+                path
+                for n in os.listdir(cache_dir)
+                if n.endswith(".parquet")
+                and not n.startswith(".")
+                and ".parquet." not in n
+                and n != ranking.ROLLUP_FILE
+                and (path := os.path.join(cache_dir, n)) not in orphans
+            )
+            steps += list(pool.map(_compact, entries, [force] * len(entries)))
+        t_compact = time.perf_counter() - t2
+    steps.append(_rollup(root))
+
+    converted = [s for s in warm if s.ok]
+    compacted = [s for s in steps if s.note and "filas/rg" in s.note]
+    saved = sum(s.before - s.after for s in compacted)
+    freed = "liberados" if delete else "a liberar con --delete"
+    print(f"✅ Limpieza: {_fmt_bytes(removed)} {freed} en {t_clean:.1f} s")
+    print(f"✅ Precalentado: {len(converted)}/{len(warm)} hojas en {t_warm:.1f} s")
+    print(
+        f"✅ Compactado: {len(compacted)} archivos, "
+        f"{_fmt_bytes(saved)} ahorrados en {t_compact:.1f} s"
+    )
+    for s in steps:
+        mark = "  " if s.ok else "⚠️ "
+        delta = _fmt_bytes(s.after)
+        if s.before:
+            delta = f"{_fmt_bytes(s.before)} → {delta}"
+        print(f"{mark} {s.seconds:6.2f} s  {s.name}  {delta}  {s.note}".rstrip())
+    return steps
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Precalienta, compacta y limpia la caché Parquet"
+    )
+    p.add_argument(
+        "--root", default=None, help="Carpeta de datos (por defecto la de graphs.py)"
+    )
+    p.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo"
+    )
+    p.add_argument(
+        "--no-compact", action="store_true", help="No reescribir los Parquet existentes"
+    )
+    p.add_argument(
+        "--force", action="store_true", help="Recompactar aunque ya estén compactados"
+    )
+    p.add_argument(
+        "--delete",
+        action="store_true",
+        help="Borrar los huérfanos (por defecto sólo se listan)",
+    )
+    return p.parse_args()
+
+
+def main() -> None:
+    a = parse_args()
+    if a.root:
+        graphs.set_data_dir(a.root)
+    root = graphs.FILES_DIR
+    if not os.path.isdir(root):
+        raise SystemExit(f"No existe la carpeta de datos: {root}")
+    steps = maintain(root, a.jobs, not a.no_compact, a.force, a.delete)
+    if not all(s.ok for s in steps):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
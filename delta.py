@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+delta.py – Cambios del mes: compara el export más reciente de cada fuente con
+el del periodo anterior (el siguiente más nuevo que encuentra find_files).
+
+Cada Parquet de la caché lleva un sidecar con el hash de cada fila
+(graphs.row_hashes), así que la comparación es un hash-join de uint64:
+• con clave única (Dedicación: «Matricula TM») → altas, bajas y cambios;
+• sin clave (Calidad, TMD) → multiconjunto de filas: altas y bajas (una fila
+  editada cuenta como baja + alta).
+Después sólo se leen del Parquet las filas que cambiaron (sus row groups, con
+las columnas justas), de modo que el costo sigue a los cambios y no al tamaño
+del export. Niveles de Madurez no entra: cada export es una foto con su
+«Periodo» y cambian todas las filas.
+
+Uso:
+    python delta.py --root ./files
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import graphs
+
+# ───────────── CONFIG ─────────────
+# Reporte → columnas que identifican una fila entre periodos (() = sin clave)
+ROW_KEYS: dict[str, tuple[str, ...]] = {
+    "calidad": (),
+    "dedicacion": ("Matricula TM",),
+    "tiempo": (),
+}
+SQUAD_COLUMN = {"calidad": "Squad", "tiempo": "Descripción squad"}
+DEDICACION_DELTA = 0.10  # horas de cambio mínimo de dedicación a reportar
+TMD_DELTA = 0.5  # días de cambio en la media de un squad a reportar
+
+
+@dataclass
+class SheetDiff:
+    """Posiciones de fila (en cada Parquet) que difieren entre dos periodos."""
+
+    added: np.ndarray  # en el nuevo
+    removed: np.ndarray  # en el anterior
+    changed_new: np.ndarray  # misma clave, contenido distinto (modo con clave)
+    changed_old: np.ndarray
+    rows: int  # filas del nuevo
+
+
+@dataclass
+class ReportDelta:
+    report: str
+    new: str
+    old: str
+    rows: int = 0
+    added: int = 0
+    removed: int = 0
+    changed: int = 0
+    seconds: float = 0.0
+    # (squad o miembro, descripción del cambio) ya filtrados por el CL
+    lines: list[tuple[str, str]] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (
+            f"{graphs.CHART_LABELS[self.report]}: {os.path.basename(self.old)} → "
+            f"{os.path.basename(self.new)} · +{self.added} −{self.removed} "
+            f"~{self.changed} de {self.rows} filas ({self.seconds:.2f} s)"
+        )
+
+
+# ───────────── PERIODOS ─────────────
+def periods(report: str, files_dir: str | None = None) -> tuple[str, str] | None:
+    """(export más reciente, anterior) de la fuente de *report*, o None."""
+    keyword = graphs.FILE_KEYWORDS[graphs.REPORTS[report].source]
+    found = [
+        e.path
+        for e in graphs.find_files(keyword, files_dir)
+        if e.path.lower().endswith(".xlsx")
+    ]
+    return (found[0], found[1]) if len(found) > 1 else None
+
+
+# ───────────── HASH-JOIN ─────────────
+def _unmatched(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Posiciones de *b* sin pareja en *a*, contando repeticiones (multiconjunto)."""
+    if not len(a):
+        return np.arange(len(b))
+    order = np.argsort(b, kind="stable")
+    sb = b[order]
+    # n-ésima aparición de cada hash dentro de *b*…
+    starts = np.flatnonzero(np.r_[True, sb[1:] != sb[:-1]])
+    occ = np.arange(len(sb)) - np.repeat(starts, np.diff(np.r_[starts, len(sb)]))
+    # …frente a cuántas veces aparece en *a*
+    ua, ca = np.unique(a, return_counts=True)
+    pos = np.minimum(np.searchsorted(ua, sb), len(ua) - 1)
+    have = np.where(ua[pos] == sb, ca[pos], 0)
+    return np.sort(order[occ >= have])
+
+
+def _hashes(cp: str, columns: list[str] | None) -> np.ndarray:
+    """Hashes del sidecar (todas las columnas) o calculados sobre *columns*."""
+    if columns is None:
+        return graphs.row_hashes(cp)
+    batches = pq.ParquetFile(cp).iter_batches(graphs.CHUNK_ROWS, columns=columns)
+    return graphs.hash_rows(batches)
+
+
+def diff_sheet(old_cp: str, new_cp: str, key: tuple[str, ...] = ()) -> SheetDiff:
+    """Hash-join de dos Parquet de la caché (mismo origen, distinto periodo)."""
+    old_schema, new_schema = pq.read_schema(old_cp), pq.read_schema(new_cp)
+    if old_schema.remove_metadata() == new_schema.remove_metadata():
+        cols = None  # mismo esquema: sirven los hashes guardados
+    else:  # columnas añadidas o con otro tipo: se comparan las comunes
+        cols = [
+            n
+            for n in new_schema.names
+            if n in old_schema.names
+            and new_schema.field(n).type == old_schema.field(n).type
+        ]
+    h_old, h_new = _hashes(old_cp, cols), _hashes(new_cp, cols)
+    empty = np.empty(0, dtype="int64")
+
+    if key and all(k in old_schema.names and k in new_schema.names for k in key):
+        k_old = pd.Index(_hashes(old_cp, list(key)))
+        k_new = pd.Index(_hashes(new_cp, list(key)))
+        if k_old.is_unique and k_new.is_unique:
+            match = k_old.get_indexer(k_new)  # posición en el anterior o -1
+            both = np.flatnonzero(match >= 0)
+            diff = h_new[both] != h_old[match[both]]
+            return SheetDiff(
+                added=np.flatnonzero(match < 0),
+                removed=np.flatnonzero(k_new.get_indexer(k_old) < 0),
+                changed_new=both[diff],
+                changed_old=match[both[diff]],
+                rows=len(h_new),
+            )
+        graphs._warn(f"Clave {', '.join(key)} repetida: se compara por contenido.")
+
+    return SheetDiff(
+        _unmatched(h_old, h_new), _unmatched(h_new, h_old), empty, empty, len(h_new)
+    )
+
+
+def _take_rows(cp: str, positions: np.ndarray, columns: list[str]) -> pd.DataFrame:
+    """Filas *positions* del Parquet, leyendo sólo los row groups que las contienen."""
+    pf = pq.ParquetFile(cp)
+    meta = pf.metadata
+    sizes = [meta.row_group(i).num_rows for i in range(meta.num_row_groups)]
+    bounds = np.cumsum([0, *sizes])
+    parts = []
+    for g in np.unique(np.searchsorted(bounds, positions, side="right") - 1):
+        local = positions[(positions >= bounds[g]) & (positions < bounds[g + 1])]
+        parts.append(pf.read_row_group(int(g), columns=columns).take(local - bounds[g]))
+    if not parts:
+        return pf.schema_arrow.empty_table().select(columns).to_pandas()
+    return pa.concat_tables(parts).to_pandas()
+
+
+# ───────────── FILTRO POR CHAPTER LEADER ─────────────
+def _leader_column(report: str, cp: str) -> str | None:
+    return graphs._match_required(
+        pq.read_schema(cp).names, graphs.REQUIRED_COLUMNS[report][0]
+    )
+
+
+def _leader_values(cp: str, col: str) -> set[str]:
+    """Valores originales de *col* que corresponden al CL configurado."""
+    li = graphs.LeaderIndex.from_counts(graphs._leader_index(cp, col)["values"].items())
+    norm = graphs._resolve_leader(
+        li, col, graphs.CHAPTER_LEADER, graphs.CHAPTER_LEADER_EMAIL
+    )
+    return li.raw[norm] if norm is not None else set()
+
+
+def _leader_rows(report: str, cp: str, positions: np.ndarray, columns: list[str]):
+    """Filas *positions* del Parquet que pertenecen al CL (columnas *columns*)."""
+    col = _leader_column(report, cp)
+    if col is None:
+        return pd.DataFrame(columns=columns)
+    df = _take_rows(cp, positions, list(dict.fromkeys([col, *columns])))
+    return df[df[col].isin(_leader_values(cp, col))]
+
+
+# ───────────── MÉTRICAS POR REPORTE ─────────────
+def _signed(n: int, what: str) -> str:
+    return f"{n:+d} {what}"
+
+
+def _calidad_lines(diffs: dict, caches: dict) -> list[tuple[str, str]]:
+    """Δ pases/reversiones por squad y códigos de las reversiones nuevas."""
+    sq = SQUAD_COLUMN["calidad"]
+    delta: dict[str, list[int]] = {}
+    new_revs: dict[str, list[str]] = {}
+    for i, sheet in enumerate(graphs.CALIDAD_SHEETS):
+        d, (old_cp, new_cp) = diffs[sheet], caches[sheet]
+        # «Codigo» no es obligatoria: sin ella sólo se informan los conteos
+        code = graphs._match_required(pq.read_schema(new_cp).names, "Codigo")
+        added = _leader_rows("calidad", new_cp, d.added, [sq, *[code] * bool(code)])
+        removed = _leader_rows("calidad", old_cp, d.removed, [sq])
+        net = added[sq].value_counts().sub(removed[sq].value_counts(), fill_value=0)
+        for squad, n in net.items():
+            delta.setdefault(str(squad), [0, 0])[i] += int(n)
+        if i == 1 and code:
+            for squad, codes in added.groupby(sq)[code]:
+                new_revs[str(squad)] = [str(c) for c in codes.dropna()]
+
+    lines = []
+    # Primero los squads con más reversiones nuevas
+    ranked = sorted(delta.items(), key=lambda kv: (-kv[1][1], -abs(kv[1][0])))
+    for squad, (p, r) in ranked:
+        if not (p or r):
+            continue
+        txt = ", ".join(
+            [_signed(p, "pases")] * bool(p) + [_signed(r, "reversiones")] * bool(r)
+        )
+        if codes := new_revs.get(squad):
+            txt += f" ({', '.join(codes[:3])}{'…' if len(codes) > 3 else ''})"
+        lines.append((squad, txt))
+    return lines
+
+
+def _dedicacion_lines(d: SheetDiff, old_cp: str, new_cp: str) -> list[tuple[str, str]]:
+    """Altas, bajas y cambios de dedicación ≥ DEDICACION_DELTA por miembro."""
+    key = ROW_KEYS["dedicacion"][0]
+    cols = [key, "Nombres", "Dedicación"]
+    new = _leader_rows("dedicacion", new_cp, np.r_[d.added, d.changed_new], cols)
+    old = _leader_rows("dedicacion", old_cp, np.r_[d.removed, d.changed_old], cols)
+    new, old = new.set_index(key), old.set_index(key)
+    for df in (new, old):
+        df["Dedicación"] = pd.to_numeric(df["Dedicación"], errors="coerce")
+
+    lines = []
+    for k in new.index.intersection(old.index):
+        a, b = old.at[k, "Dedicación"], new.at[k, "Dedicación"]
+        if pd.notna(a) and pd.notna(b) and abs(b - a) >= DEDICACION_DELTA:
+            txt = f"Dedicación {a:.1f} h → {b:.1f} h"
+            lines.append((new.at[k, "Nombres"], txt, abs(b - a)))
+    lines.sort(key=lambda t: -t[2])
+    out = [(name, txt) for name, txt, _ in lines]
+    for row in new.loc[new.index.difference(old.index)].itertuples():
+        ded = f" ({row.Dedicación:.1f} h)" if pd.notna(row.Dedicación) else ""
+        out.append((row.Nombres, f"Alta{ded}"))
+    out += [
+        (row.Nombres, "Baja")
+        for row in old.loc[old.index.difference(new.index)].itertuples()
+    ]
+    return out
+
+
+def _tmd_lines(d: SheetDiff, old_cp: str, new_cp: str) -> list[tuple[str, str]]:
+    """Media de TMD por squad: sólo de los squads con filas nuevas o que ya no
+    están; la anterior se lee de sus row groups y la nueva se deriva sumando
+    las filas nuevas y restando las que se fueron."""
+    sq, val = SQUAD_COLUMN["tiempo"], "Tiempo Desarrollo"
+    col = _leader_column("tiempo", old_cp)
+    if col is None:
+        return []
+
+    def sums(df: pd.DataFrame) -> pd.DataFrame:
+        v = pd.to_numeric(df[val], errors="coerce")
+        return v.groupby(df[sq]).agg(["sum", "count"])
+
+    plus = sums(_leader_rows("tiempo", new_cp, d.added, [sq, val]))
+    minus = sums(_leader_rows("tiempo", old_cp, d.removed, [sq, val]))
+    touched = plus.index.union(minus.index)
+    if touched.empty:
+        return []
+    # Filas del CL en esos squads: se ubican con las dos columnas clave y
+    # luego se leen sólo los row groups que las contienen
+    keys = pq.read_table(old_cp, columns=[col, sq])
+
+    def isin(name: str, values) -> pa.ChunkedArray:
+        text = pc.cast(keys[name], pa.string())
+        return pc.is_in(text, pa.array(sorted(map(str, values)), pa.string()))
+
+    mask = pc.and_(isin(col, _leader_values(old_cp, col)), isin(sq, touched))
+    positions = np.flatnonzero(mask.fill_null(False).to_numpy(zero_copy_only=False))
+    before = sums(_take_rows(old_cp, positions, [sq, val]))
+    after = before.add(plus, fill_value=0).sub(minus, fill_value=0)
+
+    m0 = before["sum"] / before["count"].where(before["count"] > 0)
+    m1 = after["sum"] / after["count"].where(after["count"] > 0)
+    lines = []
+    thr = graphs.TMD_THRESHOLD
+    for squad in m1.index.union(m0.index):
+        a, b = m0.get(squad, np.nan), m1.get(squad, np.nan)
+        if pd.isna(a) or pd.isna(b):
+            txt = f"Nuevo: {b:.1f} días" if pd.notna(b) else "Sin registros"
+            lines.append((str(squad), txt, 1, 0.0))
+            continue
+        crossed = (a <= thr) != (b <= thr)
+        if not crossed and abs(b - a) < TMD_DELTA:
+            continue
+        txt = f"TMD {a:.1f} → {b:.1f} días"
+        if crossed:
+            txt += f" (supera {thr} d)" if b > thr else f" (vuelve bajo {thr} d)"
+        lines.append((str(squad), txt, 0 if crossed else 2, -abs(b - a)))
+    lines.sort(key=lambda t: (t[2], t[3]))
+    return [(squad, txt) for squad, txt, *_ in lines]
+
+
+# ───────────── PRINCIPAL ─────────────
+def report_delta(report: str, new: str, old: str) -> ReportDelta:
+    """Compara dos exports de la fuente de *report* para el CL configurado."""
+    t0 = time.perf_counter()
+    out = ReportDelta(report, new, old)
+    diffs: dict[str | None, SheetDiff] = {}
+    caches: dict[str | None, tuple[str, str]] = {}
+    for sheet in graphs.REPORTS[report].sheets:
+        caches[sheet] = (
+            graphs.warm_cache(old, sheet, graphs.CACHE_DIR),
+            graphs.warm_cache(new, sheet, graphs.CACHE_DIR),
+        )
+        d = diffs[sheet] = diff_sheet(*caches[sheet], ROW_KEYS[report])
+        out.rows += d.rows
+        out.added += len(d.added)
+        out.removed += len(d.removed)
+        out.changed += len(d.changed_new)
+
+    if report == "calidad":
+        out.lines = _calidad_lines(diffs, caches)
+    elif report == "dedicacion":
+        out.lines = _dedicacion_lines(diffs[None], *caches[None])
+    else:
+        out.lines = _tmd_lines(diffs[None], *caches[None])
+    out.seconds = time.perf_counter() - t0
+    return out
+
+
+def month_changes(files_dir: str | None = None) -> list[ReportDelta]:
+    """ReportDelta de cada fuente que tiene un periodo anterior con el que comparar."""
+    out = []
+    for report in ROW_KEYS:
+        if (pair := periods(report, files_dir)) is None:
+            continue
+        try:
+            out.append(report_delta(report, *pair))
+        except ValueError as e:  # un export anterior sin alguna hoja
+            graphs._warn(f"Cambios de {report}: {type(e).__name__}: {e}")
+    return out
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Cambios respecto del periodo anterior")
+    p.add_argument("--root", default=None, help="Carpeta de datos")
+    p.add_argument("--cl", default=None, help="Chapter Leader")
+    p.add_argument("--email", default="", help="Correo del Chapter Leader")
+    return p.parse_args()
+
+
+def main() -> None:
+    a = parse_args()
+    if a.root:
+        graphs.set_data_dir(a.root)
+    if a.cl:
+        graphs.set_chapter_leader(graphs.confirm_leader(a.cl, a.email), a.email)
+    deltas = month_changes()
+    if not deltas:
+        print("Sin periodo anterior con el que comparar.")
+    for d in deltas:
+        print(f"✅ {d.summary()}")
+        for who, what in d.lines:
+            print(f"   {who}: {what}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,20 +7,50 @@
 #                  Calidad sin cambios (rejilla 2×2).
 # ---------------------------------------------------------------------------
 
+from __future__ import annotations
+
+import argparse
 import datetime as dt
+import hashlib
 import io
 import os
+import queue
+import re
+import shutil
+import struct
 import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import dataclass
 from pathlib import Path
 from copy import deepcopy
-from typing import List, cast
+from typing import Callable, Dict, List, Tuple, cast
 
+import mpl_setup  # antes que matplotlib: fija MPLCONFIGDIR en el ejecutable
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from PIL import Image, PngImagePlugin
 from pptx import Presentation
+from pptx.opc.package import XmlPart
+from pptx.presentation import Presentation as PresentationT
+from pptx.shapes.picture import Picture
 from pptx.slide import Slide
-from pptx.util import Emu, Inches
+from pptx.util import Emu, Inches, Pt
 
+import delta
 import graphs
+import profiling
+import ranking
+
+# Sólo se exportan imágenes: Agg permite además renderizar fuera del hilo principal
+plt.switch_backend("Agg")
 
 # ───── rutas
 # Cuando se ejecuta desde un ejecutable PyInstaller, los recursos se
@@ -31,6 +61,9 @@ APP_DIR = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parent))
 # Plantilla de PowerPoint incluida en ``inputs/``
 TEMPLATE_PATH = str(APP_DIR / "inputs" / "Template.pptx")
 
+# Índices (0-based) de las diapositivas de la plantilla
+SLIDE_MADUREZ, SLIDE_DEDICACION, SLIDE_TMD, SLIDE_CALIDAD = 2, 3, 4, 5
+
 # Carpeta de salida junto al ejecutable (o al script durante el desarrollo)
 if getattr(sys, "frozen", False):
     OUT_DIR = Path(sys.executable).resolve().parent / "outputs"
@@ -39,38 +72,159 @@ else:
 os.makedirs(OUT_DIR, exist_ok=True)
 
 
+# ───── codificación de imágenes (editable)
+# La resolución se calcula a partir del hueco que ocupará la imagen en la
+# diapositiva: IMG_PPI píxeles por pulgada de ese hueco.
+IMG_PPI = 200
+IMG_DPI_MIN, IMG_DPI_MAX = 72, 300
+PNG_COMPRESS_LEVEL = 6  # zlib 0-9 (9 = más pequeño / más lento)
+PNG_QUANTIZE = True  # paleta de 256 colores: las gráficas son de colores planos
+PNG_MAX_COLORS = 256
+
+EMU_PER_INCH = 914400
+
+# PNG ya codificados, indexados por el hash de los píxeles + parámetros.
+# python-pptx reutiliza la misma parte de medios para blobs idénticos (SHA1),
+# así que devolver los mismos bytes deduplica también dentro del .pptx.
+# El modo streaming no la usa: deduplica en disco y su memoria no debe crecer.
+_PNG_CACHE: Dict[str, bytes] = {}
+_PNG_CACHE_BYTES = 64 << 20
+
+
+def _slot_dpi(fig, box_w: int | None, box_h: int | None) -> float:
+    """dpi para que la figura cubra el hueco (EMU) con IMG_PPI píxeles/pulgada."""
+    if not box_w:
+        return 150
+    fw, fh = fig.get_size_inches()
+    dpi = IMG_PPI * box_w / EMU_PER_INCH / fw
+    if box_h:
+        dpi = max(dpi, IMG_PPI * box_h / EMU_PER_INCH / fh)
+    return min(max(dpi, IMG_DPI_MIN), IMG_DPI_MAX)
+
+
+def _encode_png(fig, dpi: float, cache: bool = True) -> bytes:
+    raw = io.BytesIO()
+    # compress_level=0: sólo es un paso intermedio hacia Pillow
+    fig.savefig(
+        raw, format="png", dpi=dpi, bbox_inches="tight", pil_kwargs={"compress_level": 0}
+    )
+    raw.seek(0)
+    img = Image.open(raw).convert("RGB")
+
+    opts = (PNG_QUANTIZE, PNG_MAX_COLORS, PNG_COMPRESS_LEVEL)
+    key = ""
+    if cache:
+        key = hashlib.sha1(repr((img.size, opts)).encode() + img.tobytes()).hexdigest()
+        if key in _PNG_CACHE:
+            return _PNG_CACHE[key]
+
+    if PNG_QUANTIZE:
+        img = img.quantize(
+            colors=PNG_MAX_COLORS,
+            method=Image.Quantize.FASTOCTREE,
+            dither=Image.Dither.NONE,
+        )
+    out = io.BytesIO()
+    img.save(out, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    png = out.getvalue()
+    if not cache or len(png) > _PNG_CACHE_BYTES:
+        return png
+    used = sum(map(len, _PNG_CACHE.values()))
+    while _PNG_CACHE and used + len(png) > _PNG_CACHE_BYTES:
+        used -= len(_PNG_CACHE.pop(next(iter(_PNG_CACHE))))
+    _PNG_CACHE[key] = png
+    return png
+
+
 # ───── capturar figuras
-def capture(fn) -> List[io.BytesIO]:
+def capture(
+    fn,
+    box_w: int | None = None,
+    box_h: int | None = None,
+    on_image: Callable[[bytes], None] | None = None,
+    cache: bool = True,
+) -> List[io.BytesIO]:
+    """Ejecuta fn interceptando plt.show; box_w/box_h = hueco destino en EMU.
+
+    Con *on_image* cada PNG se entrega en cuanto se codifica y no se acumula;
+    con ``cache=False`` tampoco queda en _PNG_CACHE.
+    """
     bufs: List[io.BytesIO] = []
     orig = plt.show
 
     def _cap(*a, **k):
-        b = io.BytesIO()
-        plt.savefig(b, format="png", dpi=150, bbox_inches="tight")
-        b.seek(0)
-        bufs.append(b)
-        plt.close()
+        fig = plt.gcf()
+        png = _encode_png(fig, _slot_dpi(fig, box_w, box_h), cache)
+        plt.close(fig)
+        mpl_setup.chart_done()
+        if on_image:
+            on_image(png)
+        else:
+            bufs.append(io.BytesIO(png))
 
     plt.show = _cap
-    fn()
-    plt.show = orig
+    mpl_setup.chart_started()
+    try:
+        fn()
+    finally:
+        plt.show = orig
     return bufs
 
 
-def _imgs(k, f):
-    p = graphs._resolve_path(None, k)
-    return capture(lambda: f(p)) if p else []
+def _png_size(png: bytes) -> Tuple[int, int]:
+    """(ancho, alto) en píxeles leídos de la cabecera IHDR."""
+    w, h = struct.unpack(">II", png[16:24])
+    return w, h
+
+
+# ───── plantilla (parseada una vez por proceso)
+class _TemplateCache:
+    """Plantilla parseada una sola vez; cada presentación recibe una copia.
+
+    Las partes binarias (imágenes, fuentes…) se comparten entre copias: nunca se
+    modifican, sólo se añaden partes nuevas. Las partes XML se copian con lxml,
+    bastante más barato que volver a leer y parsear el .pptx.
+    """
 
+    def __init__(self) -> None:
+        self.key: tuple | None = None
+        self.master: PresentationT | None = None  # nunca se modifica
+        self.continuation: List = []  # prototipo de diapositiva «Calidad (cont.)»
 
-imgs_mad = _imgs("madurez", graphs.plot_niveles_madurez)
-imgs_ded = _imgs("dedicacion", graphs.plot_dedicacion_tm)
-imgs_tmd = _imgs("tiempo", graphs.plot_tiempo_desarrollo)  # 2
-imgs_cal = _imgs("calidad", graphs.plot_calidad_pases)  # N
+    def _clone(self, master: PresentationT) -> PresentationT:
+        # lxml ignora el memo de deepcopy: se copia cada raíz XML una sola vez
+        # para que parte y envoltorio (Slide, Presentation…) apunten al mismo
+        # árbol en la copia.
+        memo: Dict[int, object] = {}
+        for part in master.part.package.iter_parts():
+            if isinstance(part, XmlPart):
+                memo[id(part._element)] = deepcopy(part._element)
+            else:
+                memo[id(part)] = part
+        return deepcopy(master, memo)
 
-# ───── plantilla
-prs = Presentation(TEMPLATE_PATH)
-SW: Emu = cast(Emu, prs.slide_width)
-SH: Emu = cast(Emu, prs.slide_height)
+    def get(self) -> PresentationT:
+        st = os.stat(TEMPLATE_PATH)
+        key = (TEMPLATE_PATH, st.st_mtime_ns, st.st_size)
+        if self.master is None or key != self.key:
+            master = Presentation(TEMPLATE_PATH)
+            # Título (y demás formas que no son imágenes) de la slide de Calidad
+            proto = self._clone(master).slides[SLIDE_CALIDAD]
+            self.continuation = [
+                deepcopy(shp.element)
+                for shp in proto.shapes
+                if not isinstance(shp, Picture) and not shp.is_placeholder
+            ]
+            self.master, self.key = master, key
+        return self._clone(self.master)
+
+
+TEMPLATE = _TemplateCache()
+
+_prs0 = TEMPLATE.get()
+SW: Emu = cast(Emu, _prs0.slide_width)
+SH: Emu = cast(Emu, _prs0.slide_height)
+del _prs0
 
 # tamaños
 PIC_W_STD = cast(Emu, int(SW * 0.70))  # 70 % ancho (Madurez/DR)
@@ -78,75 +232,1018 @@ PIC_W_TMD = cast(Emu, SW - Inches(1.0))  # 90 % ancho (0 .5″ márgenes)
 LEFT_STD = cast(Emu, (SW - PIC_W_STD) // 2)
 LEFT_TMD = Inches(0.5)
 TOP_MIN = Inches(0.8)
+PIC_H_MAX = cast(Emu, SH - TOP_MIN - Inches(0.3))  # alto útil bajo el título
 GAP_V_TMD = Inches(0.40)
 
+# TMD: dos gráficos apilados, cada uno de media diapositiva de ancho
+TMD_MARGIN_H = Inches(0.5)
+TMD_PIC_W = cast(Emu, (SW - 2 * TMD_MARGIN_H - Inches(0.25)) // 2)
+
+# Calidad: rejilla 2×2 dentro de CAL_RECT
+CAL_RECT = (
+    Inches(0.5),
+    Inches(1.3),
+    cast(Emu, SW - Inches(1.0)),
+    cast(Emu, SH - Inches(1.8)),
+)
+CAL_GAP = Inches(0.15)
+CAL_CELL_W = cast(Emu, (CAL_RECT[2] - CAL_GAP) // 2)
+CAL_CELL_H = cast(Emu, (CAL_RECT[3] - CAL_GAP) // 2)
+
 
 # helper: centra gráfica con ancho fijo
-def add_center(slide: Slide, buf: io.BytesIO, width: Emu) -> None:
-    pic = slide.shapes.add_picture(buf, 0, 0, width)  # type: ignore[arg-type]
+def add_center(
+    slide: Slide, buf: io.BytesIO, width: Emu, height: Emu | None = None
+) -> Picture:
+    pic = slide.shapes.add_picture(buf, 0, 0, width, height)  # type: ignore[arg-type]
     pic.left = cast(Emu, (SW - pic.width) // 2)
     pic.top = cast(Emu, max(TOP_MIN, (SH - pic.height) // 2))
+    return pic
+
+
+def add_continuation_slide(prs: PresentationT, base: Slide) -> Slide:
+    """Nueva slide con el layout de *base* y el título del prototipo de Calidad."""
+    new = prs.slides.add_slide(base.slide_layout)
+    tree = new.shapes._spTree
+    for ph in list(new.placeholders):  # vacíos, heredados del layout
+        tree.remove(ph.element)
+    for el in TEMPLATE.continuation:
+        tree.insert_element_before(deepcopy(el), "p:extLst")
+    return new
+
+
+def add_titled_slide(prs: PresentationT, title: str) -> Slide:
+    """Slide de continuación con otro texto en el título (ranking, cambios…)."""
+    slide = add_continuation_slide(prs, prs.slides[SLIDE_CALIDAD])
+    for shp in slide.shapes:  # el título copiado dice «Calidad»
+        if shp.has_text_frame and shp.text_frame.paragraphs[0].runs:
+            runs = shp.text_frame.paragraphs[0].runs
+            runs[0].text = title
+            for r in runs[1:]:
+                r.text = ""
+    return slide
+
+
+def _fit_h(width: int, size_px: Tuple[int, int]) -> Emu:
+    return cast(Emu, int(width * size_px[1] / size_px[0]))
+
+
+def _fit_std(size_px: Tuple[int, int]) -> Tuple[Emu, Emu]:
+    """Ancho PIC_W_STD salvo que la imagen no quepa en alto (heatmap largo)."""
+    h = _fit_h(PIC_W_STD, size_px)
+    if h <= PIC_H_MAX:
+        return PIC_W_STD, h
+    return cast(Emu, int(PIC_W_STD * PIC_H_MAX / h)), PIC_H_MAX
+
+
+class _DeckBuilder:
+    """Coloca cada imagen, según su sección, en cuanto llega.
+
+    Madurez/Dedicación: centradas al 70 % (más estrechas si no caben en alto).
+    TMD: dos gráficos apilados. Calidad: rejilla 2×2 con slides de
+    continuación. Ranking: slide propia al final (ver finish).
+    """
+
+    def __init__(self, prs: PresentationT, fps: Dict[str, str] | None = None) -> None:
+        self.prs = prs
+        self.fps = fps or {}  # sección → huella de sus datos (ver _fingerprint)
+        self.count: Dict[str, int] = {}
+        self.cal_slide: Slide | None = None
+        self.rank_slide: Slide | None = None
+        self.tmd_next_top: int = Inches(1.0)
+
+    def place(
+        self, section: str, img: io.BytesIO, size_px: Tuple[int, int]
+    ) -> Picture | None:
+        i = self.count.get(section, 0)
+        pic = self._place(section, i, img, size_px)
+        if pic is not None:
+            tag_picture(pic, section, i, self.fps.get(section, ""))
+        return pic
+
+    def _place(
+        self, section: str, i: int, img: io.BytesIO, size_px: Tuple[int, int]
+    ) -> Picture | None:
+        self.count[section] = i + 1
+        slides = self.prs.slides
+
+        # ───── slide 3 Madurez / slide 4 Dedicación
+        if section in ("madurez", "dedicacion"):
+            if i:
+                return None
+            slide = slides[SLIDE_MADUREZ if section == "madurez" else SLIDE_DEDICACION]
+            return add_center(slide, img, *_fit_std(size_px))
+
+        # ───── ranking entre Chapter Leaders: slide propia
+        if section == "ranking":
+            if i:
+                return None
+            if self.rank_slide is None:
+                self.rank_slide = add_titled_slide(self.prs, RANKING_TITLE)
+            return add_center(self.rank_slide, img, *_fit_std(size_px))
+
+        # ───────── TMD – apilado sin estirar ─────────
+        if section == "tiempo":
+            if i > 1:
+                return None
+            # anchura igual a la usada antes en el formato lado-a-lado
+            gap_v = Inches(0.25)
+            pic_w = TMD_PIC_W  # misma mitad de slide
+            left_c = cast(Emu, (SW - pic_w) // 2)  # centrado
+            pic = slides[SLIDE_TMD].shapes.add_picture(
+                img, left_c, self.tmd_next_top, pic_w, _fit_h(pic_w, size_px)  # type: ignore[arg-type]
+            )
+            # el segundo gráfico va debajo, respetando gap_v
+            self.tmd_next_top = pic.top + pic.height + gap_v
+            return pic
+
+        # ───── calidad (rejilla 2×2, slides de continuación si hace falta)
+        base = slides[SLIDE_CALIDAD]
+        if self.cal_slide is None:
+            self.cal_slide = base
+        elif i % 4 == 0:
+            self.cal_slide = add_continuation_slide(self.prs, base)
+        l, t = CAL_RECT[:2]
+        r, c = divmod(i % 4, 2)
+        cx = cast(Emu, l + c * (CAL_CELL_W + CAL_GAP))
+        cy = cast(Emu, t + r * (CAL_CELL_H + CAL_GAP))
+        return self.cal_slide.shapes.add_picture(img, cx, cy, CAL_CELL_W, CAL_CELL_H)  # type: ignore[arg-type]
+
+    def finish(self) -> None:
+        """El ranking va detrás de las continuaciones de Calidad, que se crean
+        según llegan las imágenes."""
+        if self.rank_slide is not None:
+            _move_to_end(self.prs, self.rank_slide)
+
+
+# (sección, función de graphs, hueco destino en EMU)
+def _plot_ranking(path: str | None = None) -> None:
+    """ranking.plot_ranking sin tumbar la presentación.
+
+    El rollup lee todas las fuentes: si falla una (p.ej. sin la columna del CL)
+    la presentación sale sin la slide de ranking y con el aviso.
+    """
+    try:
+        ranking.plot_ranking(path)
+    except Exception as e:
+        plt.close("all")
+        graphs._warn(f"Ranking omitido: {type(e).__name__}: {e}")
 
 
-# ───── slide 3 Madurez
-if imgs_mad:
-    add_center(prs.slides[2], imgs_mad[0], PIC_W_STD)
-
-# ───── slide 4 Dedicación
-if imgs_ded:
-    add_center(prs.slides[3], imgs_ded[0], PIC_W_STD)
-
-
-# ───────── TMD – apilado sin estirar ─────────
-if len(imgs_tmd) >= 2:
-    s5 = prs.slides[4]
-
-    # anchura igual a la usada antes en el formato lado-a-lado
-    margin_h = Inches(0.5)
-    gap_v = Inches(0.25)
-    pic_w = cast(Emu, (SW - 2 * margin_h - Inches(0.25)) // 2)  # misma mitad de slide
-    left_c = cast(Emu, (SW - pic_w) // 2)  # centrado
-    top_1 = Inches(1.0)
-
-    # primer gráfico
-    shape1 = s5.shapes.add_picture(imgs_tmd[0], left_c, top_1, pic_w)  # type: ignore[arg-type]
-    # segundo gráfico debajo, respetando gap_v
-    top_2 = cast(Emu, shape1.top + shape1.height + gap_v)
-    s5.shapes.add_picture(imgs_tmd[1], left_c, top_2, pic_w)  # type: ignore[arg-type]
-
-# ───── calidad (igual que antes)
-if imgs_cal:
-    base = prs.slides[5]
-    rect = (
-        Inches(0.5),
-        Inches(1.3),
-        cast(Emu, SW - Inches(1.0)),
-        cast(Emu, SH - Inches(1.8)),
+SECTIONS = [
+    ("madurez", graphs.plot_niveles_madurez, (PIC_W_STD, None)),
+    ("dedicacion", graphs.plot_dedicacion_tm, (PIC_W_STD, None)),
+    ("tiempo", graphs.plot_tiempo_desarrollo, (TMD_PIC_W, None)),  # 2
+    ("calidad", graphs.plot_calidad_pases, (CAL_CELL_W, CAL_CELL_H)),  # N
+    ("ranking", _plot_ranking, (PIC_W_STD, None)),  # todas las fuentes
+]
+RANKING_TITLE = "Ranking del chapter"
+SECTION_FN = {section: (fn, box) for section, fn, box in SECTIONS}
+
+
+# ───── ingesta en paralelo
+# Con la caché fría cada pd.read_excel tarda segundos: las conversiones de las
+# cuatro fuentes (son archivos independientes) se lanzan a la vez en procesos
+# hijos y cada sección se renderiza en cuanto sus datos están listos.
+INGEST_WORKERS = 4  # 0 = conversión secuencial dentro de read_any
+
+
+def _section_paths() -> Dict[str, str]:
+    """Sección → Excel encontrado en la carpeta de datos."""
+    paths: Dict[str, str] = {}
+    for section, *_ in SECTIONS:
+        if section == "ranking":
+            if ranking.sources():
+                paths[section] = ranking.rollup_path()
+        elif p := graphs._resolve_path(None, section):
+            paths[section] = p
+    return paths
+
+
+def _section_sources(section: str, path: str) -> List[Tuple[str, str | None]]:
+    """(Excel, hoja) que tiene que estar en caché antes de renderizar *section*."""
+    if section == "ranking":
+        return ranking.sources()  # el rollup lee todas las fuentes
+    return [(path, sheet) for sheet in graphs.SOURCE_SHEETS[section]]
+
+
+def _render_all(
+    sink: Callable[[str, bytes], None],
+    paths: Dict[str, str] | None = None,
+    cache: bool = True,
+) -> None:
+    """Productor: renderiza cada sección de *paths* y entrega sus PNG a *sink*."""
+    paths = _section_paths() if paths is None else paths
+
+    def render(section: str) -> None:
+        fn, (box_w, box_h) = SECTION_FN[section]
+        p = paths[section]
+        capture(lambda: fn(p), box_w, box_h, lambda png: sink(section, png), cache)
+
+    # hojas sin caché de cada sección; una misma hoja se convierte una vez
+    needs = {
+        section: [
+            src for src in _section_sources(section, p) if not graphs.is_cached(*src)
+        ]
+        for section, p in paths.items()
+    }
+    jobs = list(dict.fromkeys(src for srcs in needs.values() for src in srcs))
+    if not jobs or INGEST_WORKERS <= 0:
+        for section in paths:
+            render(section)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(INGEST_WORKERS, len(jobs))) as pool:
+        futs: Dict[Future, Tuple[str, str | None]] = {
+            pool.submit(graphs.warm_cache, p, sheet, graphs.CACHE_DIR): (p, sheet)
+            for p, sheet in jobs
+        }
+        left = {s: len(srcs) for s, srcs in needs.items()}
+        for section in paths:  # las que ya estaban en caché, sin esperar
+            if not left[section]:
+                render(section)
+        for fut in as_completed(futs):
+            if (exc := fut.exception()) is not None:
+                # Una fuente que sólo lee el ranking no tumba la presentación:
+                # el ranking se omite con su aviso al renderizarlo
+                src = futs[fut]
+                if any(src in needs[s] for s in needs if s != "ranking"):
+                    raise exc  # error de lectura del proceso hijo
+            for section, srcs in needs.items():
+                if futs[fut] in srcs:
+                    left[section] -= 1
+                    if not left[section]:
+                        render(section)
+
+
+# ───── modo streaming (decks muy grandes)
+# Los PNG se vuelcan a disco según se generan; el .pptx se arma con imágenes
+# de relleno de 1×1 px y al final se reescribe el zip copiando cada PNG desde
+# disco por bloques. La memoria no depende del número de squads.
+STREAM_MODE = False
+STREAM_QUEUE = 8  # imágenes en vuelo entre el renderizado y el armado
+STREAM_CHUNK = 1 << 20
+
+
+def _placeholder_png(tag: str) -> io.BytesIO:
+    """PNG 1×1 único por *tag* (python-pptx deduplica imágenes por SHA1)."""
+    info = PngImagePlugin.PngInfo()
+    info.add_text("chapter-sync", tag)
+    buf = io.BytesIO()
+    Image.new("L", (1, 1), 255).save(buf, format="PNG", pnginfo=info)
+    buf.seek(0)
+    return buf
+
+
+def _media_name(pic: Picture) -> str:
+    part = pic.part.related_part(pic._element.blip_rId)
+    return part.partname.membername
+
+
+def _assemble_streaming(
+    builder: _DeckBuilder, spool_dir: str, paths: Dict[str, str] | None = None
+) -> Dict[str, str]:
+    """Renderiza en un hilo y coloca en este; devuelve {miembro zip: PNG en disco}."""
+    q: queue.Queue = queue.Queue(maxsize=STREAM_QUEUE)
+    seen: Dict[str, str] = {}  # sha1 del PNG → ruta en disco
+
+    def sink(section: str, png: bytes) -> None:
+        digest = hashlib.sha1(png).hexdigest()
+        if digest not in seen:
+            seen[digest] = os.path.join(spool_dir, f"{digest}.png")
+            with open(seen[digest], "wb") as fh:
+                fh.write(png)
+        q.put((section, digest, _png_size(png)))
+
+    def producer() -> None:
+        try:
+            _render_all(sink, paths, cache=False)
+        except BaseException as exc:  # se relanza en el hilo consumidor
+            q.put(exc)
+        else:
+            q.put(None)
+
+    threading.Thread(target=producer, name="deck-render", daemon=True).start()
+
+    media: Dict[str, str] = {}
+    while (item := q.get()) is not None:
+        if isinstance(item, BaseException):
+            raise item
+        section, digest, size = item
+        pic = builder.place(section, _placeholder_png(digest), size)
+        if pic is not None:
+            media[_media_name(pic)] = seen[digest]
+    return media
+
+
+def _write_streamed(skeleton: str, out_path: str, media: Dict[str, str]) -> None:
+    """Copia el esqueleto al zip final sustituyendo los PNG de relleno."""
+    with zipfile.ZipFile(skeleton) as src, zipfile.ZipFile(
+        out_path, "w", zipfile.ZIP_DEFLATED
+    ) as dst:
+        for info in src.infolist():
+            zi = zipfile.ZipInfo(info.filename, info.date_time)
+            if info.filename in media:
+                zi.compress_type = zipfile.ZIP_STORED  # PNG ya comprimido
+                fsrc = open(media[info.filename], "rb")
+            else:
+                zi.compress_type = zipfile.ZIP_DEFLATED
+                fsrc = src.open(info)
+            with fsrc, dst.open(zi, "w") as fdst:
+                shutil.copyfileobj(fsrc, fdst, STREAM_CHUNK)
+
+
+# ───── actualización incremental (--update)
+# Cada imagen lleva en su nombre de forma (cNvPr/@name: se ve en el panel de
+# selección y PowerPoint lo conserva) la clave de la gráfica y la huella de los
+# datos con que se generó, p.ej. «chapter-sync calidad#3 1a2b3c4d5e6f».
+# --update reabre la presentación anterior, renderiza sólo las secciones cuya
+# huella cambió y dentro de ellas sustituye sólo las imágenes distintas.
+TAG_PREFIX = "chapter-sync"
+DECK_VERSION = 1  # subir al cambiar el dibujo de graphs: invalida todas las huellas
+OUTPUT_NAME = "%Y-%m-%d_Presentation.pptx"
+_TAG_RE = re.compile(rf"^{TAG_PREFIX} (\w+)#(\d+) (\w*)$")
+
+# (diapositiva, imagen, huella) de una sección, por orden de colocación
+Tagged = List[Tuple[Slide, Picture, str]]
+
+
+def _fingerprint(section: str, path: str) -> str:
+    """Huella de todo lo que determina las imágenes de *section*."""
+    key = (
+        DECK_VERSION,
+        section,
+        os.path.basename(path),
+        ranking.sources_stamp() if section == "ranking" else graphs._source_stamp(path),
+        graphs.CL_NORM,
+        graphs.CHAPTER_LEADER_EMAIL,
+        graphs.TMD_THRESHOLD,
+        (IMG_PPI, PNG_QUANTIZE, PNG_MAX_COLORS, PNG_COMPRESS_LEVEL),
     )
-    idx, cur = 0, base
-    while idx < len(imgs_cal):
-        l, t, w, h = rect
-        gap = Inches(0.15)
-        cw, ch = cast(Emu, (w - gap) // 2), cast(Emu, (h - gap) // 2)
-        for r in range(2):
-            for c in range(2):
-                if idx >= len(imgs_cal):
-                    break
-                cx = cast(Emu, l + c * (cw + gap))
-                cy = cast(Emu, t + r * (ch + gap))
-                cur.shapes.add_picture(imgs_cal[idx], cx, cy, cw, ch)  # type: ignore[arg-type]
-                idx += 1
-        if idx < len(imgs_cal):
-            new = prs.slides.add_slide(base.slide_layout)
-            for shp in base.shapes:
-                if shp.is_placeholder and shp.text_frame:
-                    new.shapes._spTree.insert_element_before(
-                        deepcopy(shp.element), "p:extLst"
-                    )
-                    break
-            cur = new
-
-# ───── guardar
-fname = dt.datetime.today().strftime("%Y-%m-%d_Presentation.pptx")
-prs.save(os.path.join(OUT_DIR, fname))
-print(f"\n✅ Presentación generada en outputs/{fname}\n")
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+
+
+def tag_picture(pic: Picture, section: str, i: int, fp: str) -> None:
+    pic.name = f"{TAG_PREFIX} {section}#{i} {fp}"
+
+
+def _tagged_pictures(prs: PresentationT) -> Dict[str, Tagged]:
+    found: Dict[str, Dict[int, Tuple[Slide, Picture, str]]] = {}
+    for slide in prs.slides:
+        for shp in slide.shapes:
+            if isinstance(shp, Picture) and (m := _TAG_RE.match(shp.name)):
+                found.setdefault(m[1], {})[int(m[2])] = (slide, shp, m[3])
+    return {s: [d[i] for i in sorted(d)] for s, d in found.items()}
+
+
+def _image_sha1(slide: Slide, pic: Picture) -> str:
+    return slide.part.related_part(pic._element.blip_rId).sha1
+
+
+def _drop_image_rel(slide: Slide, rId: str) -> None:
+    """Quita la relación de imagen *rId* si ninguna imagen de la slide la usa.
+
+    drop_rel sólo cuenta los r:id, no los a:blip/@r:embed, y las PNG idénticas
+    comparten relación: sin esta comprobación otra imagen quedaría rota.
+    """
+    if not slide._element.xpath(f'.//a:blip[@r:embed="{rId}"]'):
+        slide.part.drop_rel(rId)
+
+
+def _replace_image(slide: Slide, pic: Picture, png: bytes) -> None:
+    """Cambia la imagen de *pic* conservando posición y tamaño."""
+    old = pic._element.blip_rId
+    _, rId = slide.part.get_or_add_image_part(io.BytesIO(png))
+    pic._element.blipFill.blip.rEmbed = rId
+    if rId != old:
+        _drop_image_rel(slide, old)
+
+
+def _remove_picture(slide: Slide, pic: Picture) -> None:
+    rId = pic._element.blip_rId
+    pic._element.getparent().remove(pic._element)
+    _drop_image_rel(slide, rId)
+
+
+def _remove_slide(prs: PresentationT, slide: Slide) -> None:
+    ids = prs.slides._sldIdLst
+    for sld in list(ids):
+        if prs.part.related_part(sld.rId) is slide.part:
+            prs.part.drop_rel(sld.rId)
+            ids.remove(sld)
+    # add_slide numera la siguiente como slide<N+1>.xml: sin renumerar podría
+    # repetir el nombre de una slide existente
+    prs.part.rename_slide_parts([sld.rId for sld in ids])
+
+
+def _patch_section(
+    builder: _DeckBuilder, section: str, old: Tagged, pngs: List[bytes]
+) -> Tuple[int, int, int]:
+    """Aplica los PNG nuevos de *section*; devuelve (reemplazadas, nuevas, quitadas)."""
+    fp = builder.fps.get(section, "")
+    if section != "calidad":
+        # Una o dos imágenes con posición según su alto: se vuelven a colocar.
+        # Las que no cambian reutilizan la misma parte de medios (mismo SHA1).
+        before = {_image_sha1(slide, pic) for slide, pic, _ in old}
+        for slide, pic, _ in old:
+            _remove_picture(slide, pic)
+        builder.count[section] = 0
+        placed = [
+            png
+            for png in pngs
+            if builder.place(section, io.BytesIO(png), _png_size(png)) is not None
+        ]
+        changed = sum(hashlib.sha1(png).hexdigest() not in before for png in placed)
+        added, removed = max(len(placed) - len(old), 0), max(len(old) - len(placed), 0)
+        return max(changed - added, 0), added, removed
+
+    # Calidad: rejilla fija, se sustituye celda a celda
+    replaced = 0
+    for i, png in enumerate(pngs[: len(old)]):
+        slide, pic, _ = old[i]
+        if _image_sha1(slide, pic) != hashlib.sha1(png).hexdigest():
+            _replace_image(slide, pic, png)
+            replaced += 1
+        tag_picture(pic, section, i, fp)
+
+    builder.count[section] = len(old)
+    builder.cal_slide = old[-1][0] if old else None
+    for png in pngs[len(old) :]:
+        builder.place(section, io.BytesIO(png), _png_size(png))
+
+    base = builder.prs.slides[SLIDE_CALIDAD]
+    for slide, pic, _ in old[len(pngs) :]:
+        _remove_picture(slide, pic)
+    for slide in {id(s): s for s, *_ in old[len(pngs) :]}.values():
+        # Slide de continuación que se queda sin gráficas
+        if slide.part is not base.part and not any(
+            isinstance(shp, Picture) for shp in slide.shapes
+        ):
+            _remove_slide(builder.prs, slide)
+    return replaced, max(len(pngs) - len(old), 0), max(len(old) - len(pngs), 0)
+
+
+def _stamp_leader(prs: PresentationT) -> None:
+    """Guarda el CL en las propiedades del .pptx (Asunto) para --update."""
+    prs.core_properties.subject = graphs.CHAPTER_LEADER
+
+
+def _deck_leader(path: Path) -> str:
+    """CL normalizado de *path*: el Asunto o, en las antiguas, el nombre de archivo."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            core = ET.fromstring(zf.read("docProps/core.xml"))
+        subject = core.findtext("{http://purl.org/dc/elements/1.1/}subject") or ""
+    except (OSError, KeyError, zipfile.BadZipFile, ET.ParseError):
+        subject = ""
+    if subject:
+        return graphs.normalize_name(subject)
+    # Las de la cola llevan el líder en el nombre: <fecha>_<Nombre_CL>_Presentation
+    stem = path.name.removesuffix("_Presentation.pptx").partition("_")[2]
+    return graphs.normalize_name(stem.replace("_", " "))
+
+
+def _latest_output() -> str | None:
+    """El .pptx más reciente de OUT_DIR del CL configurado."""
+    decks = sorted(
+        OUT_DIR.glob("*_Presentation.pptx"),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    return next((str(p) for p in decks if _deck_leader(p) == graphs.CL_NORM), None)
+
+
+def update_presentation(prev_path: str | None = None) -> str:
+    """Actualiza *prev_path* (por defecto el último .pptx de OUT_DIR).
+
+    Sólo se renderizan las secciones cuya huella cambió. Si no hay presentación
+    previa o no tiene imágenes etiquetadas se genera completa.
+    """
+    prev_path = prev_path or _latest_output()
+    if not prev_path or not os.path.isfile(prev_path):
+        graphs._warn("No hay presentación previa: se genera completa.")
+        return build_presentation()
+    prs = Presentation(prev_path)
+    tagged = _tagged_pictures(prs)
+    if not tagged:
+        name = os.path.basename(prev_path)
+        graphs._warn(f"{name} no tiene gráficas etiquetadas: se genera completa.")
+        return build_presentation()
+
+    t0 = time.perf_counter()
+    paths = _section_paths()
+    fps = {s: _fingerprint(s, p) for s, p in paths.items()}
+    stale = {
+        s: p
+        for s, p in paths.items()
+        if not tagged.get(s) or any(fp != fps[s] for *_, fp in tagged[s])
+    }
+    todo = [s for s, *_ in SECTIONS if s in stale or (s in tagged and s not in paths)]
+
+    pngs: Dict[str, List[bytes]] = {s: [] for s in todo}
+    _render_all(lambda section, png: pngs[section].append(png), stale)
+
+    _stamp_leader(prs)
+    builder = _DeckBuilder(prs, fps)
+    if old_rank := tagged.get("ranking"):
+        builder.rank_slide = old_rank[0][0]
+    notes = []
+    kept = [s for s in tagged if s not in todo]
+    for section in todo:
+        r, a, d = _patch_section(builder, section, tagged.get(section, []), pngs[section])
+        if r or a or d:
+            notes.append(f"{section}: {r} reemplazada(s), {a} nueva(s), {d} quitada(s)")
+        elif section in tagged:
+            kept.append(section)
+    rank = builder.rank_slide
+    if rank is not None and not any(isinstance(shp, Picture) for shp in rank.shapes):
+        _remove_slide(prs, rank)  # ya no hay ranking (p.ej. sin fuentes)
+        builder.rank_slide = None
+    builder.finish()
+
+    # La slide de cambios va siempre al final (detrás de las continuaciones nuevas)
+    prev = _changes_slide(prs)
+    if prev and prev[1] == _changes_fingerprint():
+        _move_to_end(prs, prev[0])
+        kept.append("cambios")
+    else:
+        if prev:
+            _remove_slide(prs, prev[0])
+        if _add_changes(prs):
+            notes.append("cambios del mes: regenerada")
+        elif prev:
+            notes.append("cambios del mes: quitada")
+
+    fname = dt.datetime.today().strftime(OUTPUT_NAME)
+    out_path = os.path.join(OUT_DIR, fname)
+    with graphs._atomic_target(out_path) as tmp:
+        prs.save(tmp)
+
+    print(f"\n✅ Presentación actualizada en outputs/{fname} ({time.perf_counter() - t0:.1f} s)")
+    for note in notes:
+        print(f"   {note}")
+    if kept:
+        print(f"   sin cambios: {', '.join(kept)}\n")
+    return out_path
+
+
+# ───── cambios del mes
+# Si la carpeta de datos tiene además el export del periodo anterior de alguna
+# fuente, al final se añade una slide con la tabla de delta.month_changes() para
+# el CL. La tabla lleva su huella en el nombre (como las imágenes) para que
+# --update sólo la regenere cuando cambia alguno de los dos periodos.
+CHANGES_TITLE = "Cambios del mes"
+CHANGES_TAG = f"{TAG_PREFIX} cambios"
+CHANGES_MAX_ROWS = 12
+CHANGES_FONT_PT = 11
+CHANGES_LABELS = {"calidad": "Calidad", "dedicacion": "Dedicación", "tiempo": "TMD"}
+
+
+def _changes_fingerprint() -> str | None:
+    """Huella de los pares de periodos a comparar; None si no hay ninguno."""
+    pairs = {r: delta.periods(r) for r in delta.ROW_KEYS}
+    pairs = {r: p for r, p in pairs.items() if p}
+    if not pairs:
+        return None
+    key = (
+        DECK_VERSION,
+        sorted(
+            (r, [(os.path.basename(f), graphs._source_stamp(f)) for f in p])
+            for r, p in pairs.items()
+        ),
+        graphs.CL_NORM,
+        graphs.CHAPTER_LEADER_EMAIL,
+        graphs.TMD_THRESHOLD,
+        (delta.DEDICACION_DELTA, delta.TMD_DELTA),
+    )
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+
+
+def _changes_rows(deltas: List[delta.ReportDelta]) -> List[Tuple[str, str, str]]:
+    rows = [
+        (CHANGES_LABELS[d.report], who, what)
+        for d in deltas
+        for who, what in (d.lines or [("—", "Sin cambios para el CL")])
+    ]
+    if len(rows) > CHANGES_MAX_ROWS:
+        rest = len(rows) - CHANGES_MAX_ROWS + 1
+        rows = rows[: CHANGES_MAX_ROWS - 1] + [("…", "", f"y {rest} cambios más")]
+    return rows
+
+
+def add_changes_slide(
+    prs: PresentationT, deltas: List[delta.ReportDelta], fp: str
+) -> Slide:
+    """Slide final «Cambios del mes» con el título de la plantilla y una tabla."""
+    slide = add_titled_slide(prs, CHANGES_TITLE)
+    rows = [("Reporte", "Squad / miembro", "Cambio"), *_changes_rows(deltas)]
+    l, t, w, _ = CAL_RECT
+    frame = slide.shapes.add_table(
+        len(rows), 3, l, t, w, cast(Emu, Inches(0.35) * len(rows))
+    )
+    frame.name = f"{CHANGES_TAG} {fp}"
+    table = frame.table
+    for j, frac in enumerate((0.15, 0.35, 0.50)):
+        table.columns[j].width = cast(Emu, int(w * frac))
+    for i, row in enumerate(rows):
+        for j, txt in enumerate(row):
+            cell = table.cell(i, j)
+            cell.text = str(txt)
+            for par in cell.text_frame.paragraphs:
+                for run in par.runs:
+                    run.font.size = Pt(CHANGES_FONT_PT)
+    return slide
+
+
+def _add_changes(prs: PresentationT) -> str:
+    """Añade la slide de cambios si hay periodo anterior; devuelve su huella o «»."""
+    fp = _changes_fingerprint()
+    if fp is None:
+        return ""
+    deltas = delta.month_changes()
+    if not deltas:
+        return ""
+    add_changes_slide(prs, deltas, fp)
+    return fp
+
+
+def _changes_slide(prs: PresentationT) -> Tuple[Slide, str] | None:
+    for slide in prs.slides:
+        for shp in slide.shapes:
+            if shp.name.startswith(f"{CHANGES_TAG} "):
+                return slide, shp.name[len(CHANGES_TAG) + 1 :]
+    return None
+
+
+def _move_to_end(prs: PresentationT, slide: Slide) -> None:
+    ids = prs.slides._sldIdLst
+    for sld in list(ids):
+        if prs.part.related_part(sld.rId) is slide.part:
+            ids.remove(sld)
+            ids.append(sld)
+
+
+# ───── armado
+def build_presentation(stream: bool | None = None, out_path: str | None = None) -> str:
+    """Genera la presentación con la configuración actual de ``graphs``.
+
+    Con *stream* (por defecto STREAM_MODE) se usa el modo streaming.
+    Devuelve la ruta del .pptx escrito (por defecto en OUT_DIR con OUTPUT_NAME).
+    """
+    stream = STREAM_MODE if stream is None else stream
+    fname = dt.datetime.today().strftime(OUTPUT_NAME)
+    out_path = out_path or os.path.join(OUT_DIR, fname)
+
+    paths = _section_paths()
+    prs = TEMPLATE.get()
+    _stamp_leader(prs)
+    builder = _DeckBuilder(prs, {s: _fingerprint(s, p) for s, p in paths.items()})
+
+    # ───── renderizar, colocar y guardar
+    if stream:
+        with tempfile.TemporaryDirectory(prefix="chapter_sync_") as spool:
+            media = _assemble_streaming(builder, spool, paths)
+            builder.finish()
+            _add_changes(prs)
+            skeleton = os.path.join(spool, "skeleton.pptx")
+            prs.save(skeleton)
+            _write_streamed(skeleton, out_path, media)
+    else:
+        _render_all(
+            lambda section, png: builder.place(
+                section, io.BytesIO(png), _png_size(png)
+            ),
+            paths,
+        )
+        builder.finish()
+        _add_changes(prs)
+        prs.save(out_path)
+
+    print(f"\n✅ Presentación generada en {os.path.relpath(out_path)}\n")
+    return out_path
+
+
+# ───── presentaciones por tribu / grupos de squads
+# Para un CL con muchas tribus se genera una presentación por tribu (o por cada
+# SHARD_GROUP squads) más un índice con hipervínculos. El proceso principal lee
+# una vez cada hoja (plan de graphs: columnas podadas, sólo filas del CL), añade
+# la clave del shard, ordena por ella y la vuelca a un Arrow IPC sin comprimir.
+# Cada shard se arma en un proceso del pool que abre esos archivos con
+# memory_map (el SO comparte las páginas: nada se copia ni se vuelve a parsear)
+# y toma su tramo con table.slice.
+SHARD_SECTIONS = ("madurez", "dedicacion", "tiempo", "calidad")
+SHARD_COLUMNS = {
+    "tribu": ("Tribu", "Descripción tribu"),
+    "squad": ("Squad", "SQ", "Descripción squad"),
+}
+SHARD_KEY = "__shard"
+SHARD_GROUP = 8  # squads por presentación con --shard squad
+SHARD_WORKERS = os.cpu_count() or 1
+SHARD_NONE = "Sin asignar"
+INDEX_TITLE = "Índice de presentaciones"
+INDEX_ROWS = 12  # filas de la tabla por slide
+SUBTITLE_SHAPE = 1  # forma de la portada con el subtítulo (vacía en la plantilla)
+
+
+@dataclass(frozen=True)
+class ShardTask:
+    name: str  # nombre del archivo, sin extensión
+    label: str
+    # (reporte, hoja, archivo IPC, primera fila, filas)
+    slices: Tuple[Tuple[str, str | None, str, int, int], ...]
+    out_path: str
+
+
+def _slug(txt: str) -> str:
+    return re.sub(r"\W+", "_", txt).strip("_") or "shard"
+
+
+def _natural_key(txt: str) -> List:
+    """«SQ 2» antes que «SQ 10»."""
+    return [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", txt)]
+
+
+def _set_subtitle(prs: PresentationT, text: str) -> None:
+    shp = prs.slides[0].shapes[SUBTITLE_SHAPE]
+    if shp.has_text_frame:
+        shp.text_frame.text = text
+
+
+def _shard_frames(by: str) -> Dict[Tuple[str, str | None], pd.DataFrame]:
+    """Filas del CL de cada (reporte, hoja), con la columna de *by* normalizada."""
+    paths = {s: p for s, p in _section_paths().items() if s in SHARD_SECTIONS}
+    cold = [
+        src
+        for s, p in paths.items()
+        for src in _section_sources(s, p)
+        if not graphs.is_cached(*src)
+    ]
+    if cold and INGEST_WORKERS > 0:  # conversiones en paralelo, como _render_all
+        with ProcessPoolExecutor(max_workers=min(INGEST_WORKERS, len(cold))) as pool:
+            futs = [pool.submit(graphs.warm_cache, *src, graphs.CACHE_DIR) for src in cold]
+            for fut in futs:
+                fut.result()
+
+    leader = [(graphs.CHAPTER_LEADER, graphs.CHAPTER_LEADER_EMAIL)]
+    out: Dict[Tuple[str, str | None], pd.DataFrame] = {}
+    for scan in graphs.plan_reports(paths):
+        rows = graphs._run_scan(scan, leader, (SHARD_COLUMNS[by],))
+        for report in scan.reports:
+            df = rows[(report, graphs.CHAPTER_LEADER)]
+            col = graphs._match_required(list(df.columns), SHARD_COLUMNS[by])
+            key = graphs.norm_series(df[col]) if col else pd.Series("", index=df.index)
+            out[(report, scan.sheet)] = df.assign(**{SHARD_KEY: key.to_numpy()})
+    return out
+
+
+def _shard_labels(
+    frames: Dict[Tuple[str, str | None], pd.DataFrame], by: str, group: int
+) -> Dict[str, Tuple[str, str]]:
+    """Valor normalizado → (nombre de archivo, etiqueta) de su shard."""
+    raw = pd.concat(
+        [
+            df[col].astype("string").fillna("").set_axis(df[SHARD_KEY].to_numpy())
+            for df in frames.values()
+            if (col := graphs._match_required(list(df.columns), SHARD_COLUMNS[by]))
+        ]
+        or [pd.Series(dtype="string")]
+    )
+    # la grafía más frecuente de cada valor (las fuentes difieren en mayúsculas)
+    display = {
+        norm: (vals.value_counts().index[0] if len(vals) else norm)
+        for norm, vals in raw.groupby(level=0)
+    }
+    norms = sorted(
+        set().union(*(set(df[SHARD_KEY]) for df in frames.values())), key=_natural_key
+    )
+    if by == "tribu":
+        return {
+            n: (_slug(display.get(n) or SHARD_NONE), display.get(n) or SHARD_NONE)
+            for n in norms
+        }
+    named = [n for n in norms if n]
+    out = {"": (_slug(SHARD_NONE), SHARD_NONE)} if "" in norms else {}
+    for i in range(0, len(named), group):
+        chunk = named[i : i + group]
+        first, last = display[chunk[0]], display[chunk[-1]]
+        label = first if len(chunk) == 1 else f"Squads {first} – {last}"
+        out.update({n: (f"squads_{i // group + 1:02d}", label) for n in chunk})
+    return out
+
+
+def _write_shard_tables(
+    frames: Dict[Tuple[str, str | None], pd.DataFrame],
+    labels: Dict[str, Tuple[str, str]],
+    spool: str,
+) -> Dict[str, List[Tuple[str, str | None, str, int, int]]]:
+    """Un IPC por (reporte, hoja), ordenado por shard; devuelve los tramos."""
+    slices: Dict[str, List[Tuple[str, str | None, str, int, int]]] = {
+        name: [] for name, _ in labels.values()
+    }
+    for i, ((report, sheet), df) in enumerate(frames.items()):
+        df = df.assign(**{SHARD_KEY: df[SHARD_KEY].map(lambda n: labels[n][0])})
+        df = df.sort_values(SHARD_KEY, kind="stable").reset_index(drop=True)
+        path = os.path.join(spool, f"{i:02d}_{report}.arrow")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as w:
+            w.write_table(table)
+        keys = df[SHARD_KEY].to_numpy(dtype=object)
+        for name in slices:
+            lo = int(np.searchsorted(keys, name, side="left"))
+            hi = int(np.searchsorted(keys, name, side="right"))
+            slices[name].append((report, sheet, path, lo, hi - lo))
+    return slices
+
+
+def build_shard(task: ShardTask) -> Tuple[ShardTask, int, float]:
+    """Genera la presentación de un shard (en un proceso del pool).
+
+    Devuelve (tarea, filas usadas, segundos).
+    """
+    t0 = time.perf_counter()
+    tables: Dict[str, pa.Table] = {}
+    frames: Dict[str, dict] = {}
+    rows = 0
+    for report, sheet, path, offset, n in task.slices:
+        if path not in tables:
+            tables[path] = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        frames.setdefault(report, {})[sheet] = tables[path].slice(offset, n).to_pandas()
+        rows += n
+
+    prs = TEMPLATE.get()
+    _set_subtitle(prs, f"{graphs.CHAPTER_LEADER} · {task.label}")
+    builder = _DeckBuilder(prs)
+    for section in SHARD_SECTIONS:
+        spec = graphs.REPORTS[section]
+        parts = frames.get(section, {})
+        if len(parts) < len(spec.sheets) or not any(len(df) for df in parts.values()):
+            continue  # sin filas en este shard: la slide queda como en la plantilla
+        result = spec.aggregate(frames[section])  # type: ignore[misc]
+        _, (box_w, box_h) = SECTION_FN[section]
+        capture(
+            lambda: spec.draw(result),  # type: ignore[misc]
+            box_w,
+            box_h,
+            lambda png: builder.place(section, io.BytesIO(png), _png_size(png)),
+        )
+    builder.finish()
+    with graphs._atomic_target(task.out_path) as tmp:
+        prs.save(tmp)
+    return task, rows, time.perf_counter() - t0
+
+
+def _shard_worker_init(leader: str, email: str, data_dir: str) -> None:
+    graphs.set_chapter_leader(leader, email)
+    graphs.set_data_dir(data_dir)
+
+
+def add_index_slides(
+    prs: PresentationT, rows: List[Tuple[str, str, int, int]]
+) -> List[Slide]:
+    """Tabla (presentación enlazada, filas, KiB) en slides de INDEX_ROWS filas."""
+    slides = []
+    for start in range(0, len(rows), INDEX_ROWS):
+        chunk = rows[start : start + INDEX_ROWS]
+        slide = add_titled_slide(prs, INDEX_TITLE)
+        l, t, w, _ = CAL_RECT
+        table = slide.shapes.add_table(
+            len(chunk) + 1, 3, l, t, w, cast(Emu, Inches(0.35) * (len(chunk) + 1))
+        ).table
+        for j, frac in enumerate((0.60, 0.20, 0.20)):
+            table.columns[j].width = cast(Emu, int(w * frac))
+        for j, txt in enumerate(("Presentación", "Filas", "Tamaño")):
+            table.cell(0, j).text = txt
+        for i, (label, fname, n, size) in enumerate(chunk, 1):
+            run = table.cell(i, 0).text_frame.paragraphs[0].add_run()
+            run.text = label
+            run.hyperlink.address = fname  # relativa: el índice va en la misma carpeta
+            table.cell(i, 1).text = f"{n:,}"
+            table.cell(i, 2).text = f"{size / 2**20:.1f} MB"
+        for cell in (c for r in table.rows for c in r.cells):
+            for par in cell.text_frame.paragraphs:
+                for run in par.runs:
+                    run.font.size = Pt(CHANGES_FONT_PT)
+        slides.append(slide)
+    return slides
+
+
+def build_sharded(
+    by: str = "tribu", group: int = SHARD_GROUP, workers: int = SHARD_WORKERS
+) -> str:
+    """Una presentación por tribu (o por *group* squads) y un índice enlazado.
+
+    Todo va a OUT_DIR/<fecha>_<by>/; devuelve la ruta del índice.
+    """
+    t0 = time.perf_counter()
+    out_dir = OUT_DIR / dt.datetime.today().strftime(f"%Y-%m-%d_por_{by}")
+    os.makedirs(out_dir, exist_ok=True)
+    frames = _shard_frames(by)
+    labels = _shard_labels(frames, by, max(group, 1))
+    names = dict(labels.values())  # archivo → etiqueta
+    t_read = time.perf_counter() - t0
+
+    done: List[Tuple[ShardTask, int, float]] = []
+    with tempfile.TemporaryDirectory(prefix="chapter_sync_shards_") as spool:
+        slices = _write_shard_tables(frames, labels, spool)
+        del frames
+        tasks = [
+            ShardTask(name, names[name], tuple(sl), str(out_dir / f"{name}.pptx"))
+            for name, sl in sorted(slices.items(), key=lambda kv: _natural_key(kv[0]))
+        ]
+        if not tasks:
+            graphs._warn("Sin filas del CL: no hay presentaciones que repartir.")
+        init = (graphs.CHAPTER_LEADER, graphs.CHAPTER_LEADER_EMAIL, graphs.DATA_DIR)
+        n_workers = max(1, min(workers, len(tasks)))
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_shard_worker_init,
+            initargs=init,
+        ) as pool:
+            for fut in as_completed([pool.submit(build_shard, t) for t in tasks]):
+                task, n, secs = fut.result()
+                done.append((task, n, secs))
+                print(f"   {os.path.basename(task.out_path)}: {n} filas, {secs:.1f} s")
+
+    prs = TEMPLATE.get()
+    _set_subtitle(prs, f"{graphs.CHAPTER_LEADER} · {len(done)} presentaciones por {by}")
+    order = {t.name: i for i, t in enumerate(tasks)}
+    rows = [
+        (t.label, os.path.basename(t.out_path), n, os.path.getsize(t.out_path))
+        for t, n, _ in sorted(done, key=lambda d: order[d[0].name])
+    ]
+    add_index_slides(prs, rows)
+    if "ranking" in _section_paths():
+        pngs = capture(_plot_ranking, PIC_W_STD)
+        if pngs:
+            slide = add_titled_slide(prs, RANKING_TITLE)
+            size = _png_size(pngs[0].getvalue())
+            add_center(slide, pngs[0], *_fit_std(size))
+    _add_changes(prs)
+    # Las slides de cada sección quedan en los shards; el índice sólo las tapa
+    for i in (SLIDE_CALIDAD, SLIDE_TMD, SLIDE_DEDICACION, SLIDE_MADUREZ):
+        _remove_slide(prs, prs.slides[i])
+    index_path = str(out_dir / "Indice.pptx")
+    with graphs._atomic_target(index_path) as tmp:
+        prs.save(tmp)
+
+    total = time.perf_counter() - t0
+    print(
+        f"\n✅ {len(done)} presentaciones + índice en {os.path.relpath(out_dir)} "
+        f"({total:.1f} s; lectura {t_read:.1f} s, {n_workers} procesos)\n"
+    )
+    return index_path
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Genera la presentación de Chapter Sync")
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Modo streaming: PNG a disco y zip escrito por bloques (decks enormes).",
+    )
+    p.add_argument(
+        "--update",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PPTX",
+        help="Actualizar la presentación anterior (por defecto la última de outputs/) "
+        "sustituyendo sólo las gráficas cuyos datos cambiaron.",
+    )
+    p.add_argument(
+        "--shard",
+        choices=sorted(SHARD_COLUMNS),
+        default=None,
+        help="Una presentación por tribu o por grupo de squads y un índice enlazado.",
+    )
+    p.add_argument(
+        "--group",
+        type=int,
+        default=SHARD_GROUP,
+        help="Squads por presentación (--shard squad).",
+    )
+    p.add_argument(
+        "--workers", type=int, default=SHARD_WORKERS, help="Procesos para --shard."
+    )
+    p.add_argument(
+        "--profile",
+        nargs="?",
+        const="both",
+        choices=profiling.PROFILE_MODES,
+        default=None,
+        help="Perfilar la generación (cprofile, sample o both) y guardar en profiles/.",
+    )
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    a = parse_args()
+    name, email = graphs.CHAPTER_LEADER, graphs.CHAPTER_LEADER_EMAIL
+    graphs.set_chapter_leader(graphs.confirm_leader(name, email), email)
+    with profiling.profiled("presentation", a.profile) if a.profile else nullcontext():
+        if a.shard:
+            build_sharded(a.shard, a.group, a.workers)
+        elif a.update is not None:
+            update_presentation(a.update or None)
+        else:
+            build_presentation(stream=a.stream or None)
@@ -5,7 +5,7 @@ graphs.py – Genera gráficas de:
 • Calidad  (0-N gráficos)
 • Dedicación
 • Niveles de Madurez LEP
-• TMD (2 gráficos)
+• TMD (2 gráficos) y percentiles p50/p90 de TMD (2 gráficos)
 
 Además:
 • Busca automáticamente los .xlsx en DATA_DIR por palabra-clave.
@@ -17,17 +17,40 @@ Además:
 from __future__ import annotations
 
 import argparse
+import difflib
+import hashlib
+import json
 import os
 import re
+import secrets
+import sys
+import threading
+import time
 import unicodedata
-from typing import cast
-
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from dataclasses import astuple, dataclass, field
+from typing import Callable, cast
+
+import mpl_setup  # antes que matplotlib: fija MPLCONFIGDIR en el ejecutable
 import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import seaborn as sns
-from matplotlib import cm, colors
+from matplotlib import cm, colormaps, colors
+
+import profiling
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
 
 # ───────────── RUTAS BASE (editable) ─────────────
 DATA_DIR = r".\files"
@@ -50,7 +73,7 @@ CHAPTER_LEADER = "RENE RUBEN PLAZ CABRERA"
 CHAPTER_LEADER_EMAIL = "rplaz@bcp.com.pe"  # Correo electrónico del Chapter Leader
 TMD_THRESHOLD = 13  # días
 
-sns.set_theme(style="whitegrid", context="notebook")
+mpl_setup.apply_style()  # sns.set_theme(style="whitegrid", context="notebook")
 
 MONTHS_ES = [
     "Ene",
@@ -90,40 +113,337 @@ def normalize_name(txt: str | float) -> str:
 CL_NORM = normalize_name(CHAPTER_LEADER)
 
 
+def set_chapter_leader(name: str, email: str = "") -> None:
+    global CHAPTER_LEADER, CHAPTER_LEADER_EMAIL, CL_NORM
+    CHAPTER_LEADER, CHAPTER_LEADER_EMAIL = name, email
+    CL_NORM = normalize_name(name)
+
+
+def set_data_dir(path: str) -> None:
+    global DATA_DIR, FILES_DIR, CACHE_DIR
+    DATA_DIR = FILES_DIR = path
+    CACHE_DIR = os.path.join(path, CACHE_SUBDIR)
+
+
+_CONFIG_LOCK = threading.RLock()
+
+
+@contextmanager
+def configured(name: str, email: str, data_dir: str):
+    """Chapter Leader y carpeta de datos sólo dentro del bloque.
+
+    Para hilos de trabajo y ejecuciones dentro del proceso: al salir se
+    restaura la configuración anterior, y el lock evita que dos hilos mezclen
+    la suya.
+    """
+    global CHAPTER_LEADER, CHAPTER_LEADER_EMAIL, CL_NORM
+    global DATA_DIR, FILES_DIR, CACHE_DIR
+    with _CONFIG_LOCK:
+        saved = (CHAPTER_LEADER, CHAPTER_LEADER_EMAIL, CL_NORM)
+        saved_dirs = (DATA_DIR, FILES_DIR, CACHE_DIR)
+        set_chapter_leader(name, email)
+        set_data_dir(data_dir)
+        try:
+            yield
+        finally:
+            CHAPTER_LEADER, CHAPTER_LEADER_EMAIL, CL_NORM = saved
+            DATA_DIR, FILES_DIR, CACHE_DIR = saved_dirs
+
+
 def norm_series(s: pd.Series) -> pd.Series:
     return s.fillna("").map(normalize_name)
 
 
+# ─── Índice de Chapter Leaders (exacto, por correo y sugerencias) ─────
+# Sólo el nombre exacto (normalizado) o el correo resuelven solos: un nombre
+# con errores de tipeo o sin el segundo nombre podría ser el de otro líder, así
+# que se devuelven candidatos parecidos para que el usuario confirme uno.
+NGRAM_POOL = 25  # candidatos (por trigramas) que pasan al cálculo de distancia
+SUGGEST_MIN_SCORE = 0.6  # por debajo no se sugiere
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+
+def _ngrams(norm: str, n: int = 3) -> set[str]:
+    padded = f"^{norm}$"
+    return {padded[i : i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+def _tokens(txt: str) -> frozenset[str]:
+    return frozenset(t for t in (_normalize(w) for w in txt.split("(")[0].split()) if t)
+
+
+class LeaderIndex:
+    """Nombres distintos de una columna de Chapter Leader y sus correos."""
+
+    def __init__(self) -> None:
+        self.raw: dict[str, set[str]] = {}  # norm → valores originales
+        self.display: dict[str, str] = {}  # norm → nombre legible
+        self.count: dict[str, int] = {}  # norm → filas
+        self.tokens: dict[str, frozenset[str]] = {}
+        self.by_email: dict[str, str] = {}  # correo → norm
+        self.grams: dict[str, set[str]] = {}  # trigrama → norms
+
+    @classmethod
+    def from_counts(cls, counts) -> LeaderIndex:
+        """counts: iterable de (valor original, filas)."""
+        idx = cls()
+        for raw, n in counts:
+            idx.add(str(raw), int(n))
+        return idx
+
+    @classmethod
+    def from_series(cls, s: pd.Series) -> LeaderIndex:
+        return cls.from_counts(s.dropna().value_counts().items())
+
+    def add(self, raw: str, n: int = 1) -> None:
+        norm = normalize_name(raw)
+        if not norm:
+            return
+        if norm not in self.raw:
+            self.raw[norm] = set()
+            self.display[norm] = raw.split("(")[0].strip()
+            self.tokens[norm] = _tokens(raw)
+            for g in _ngrams(norm):
+                self.grams.setdefault(g, set()).add(norm)
+        self.raw[norm].add(raw)
+        self.count[norm] = self.count.get(norm, 0) + n
+        for email in _EMAIL_RE.findall(raw.lower()):
+            self.by_email.setdefault(email, norm)
+
+    def merge(self, other: LeaderIndex) -> None:
+        for norm, raws in other.raw.items():
+            for raw in raws:
+                self.add(raw, 0)
+            self.count[norm] += other.count[norm]
+
+    def candidates(self, name: str, k: int = 5) -> list[tuple[float, str]]:
+        """Los k norms más parecidos a *name*: [(similitud 0-1, norm)]."""
+        norm = normalize_name(name)
+        if not norm:
+            return []
+        hits: dict[str, int] = {}
+        for g in _ngrams(norm):
+            for c in self.grams.get(g, ()):
+                hits[c] = hits.get(c, 0) + 1
+        pool = sorted(hits, key=hits.__getitem__, reverse=True)[:NGRAM_POOL]
+        toks = _tokens(name)
+        scored = []
+        for c in pool:
+            score = difflib.SequenceMatcher(None, norm, c).ratio()
+            # Nombre incompleto (p.ej. sin segundo nombre): todos sus tokens están
+            if len(toks) >= 2 and toks <= self.tokens[c]:
+                score = max(score, 0.95)
+            scored.append((score, c))
+        return sorted(scored, reverse=True)[:k]
+
+    def resolve(self, name: str, email: str = "") -> str | None:
+        """Norm canónico por nombre exacto o por correo; si no, None (ver suggest)."""
+        norm = normalize_name(name)
+        if norm in self.raw:
+            return norm
+        email = (email or "").strip().lower()
+        if email and email in self.by_email:
+            return self.by_email[email]
+        return None
+
+    def suggest(self, name: str, k: int = 5) -> list[str]:
+        return [
+            self.display[c]
+            for score, c in self.candidates(name, k)
+            if score >= SUGGEST_MIN_SCORE
+        ]
+
+
 # ─── Filtro unificado por Chapter Leader ──────────────────────────────
 def _filter_by_chapter_leader(df: pd.DataFrame, col_name: str) -> pd.DataFrame:
-    """Primero filtra por nombre; si no hay filas y hay correo, prueba por correo."""
+    """Filtra por el líder resuelto con LeaderIndex (nombre exacto o correo).
+
+    Sólo se normalizan los valores distintos de la columna, no cada fila.
+    """
     if col_name not in df.columns:
         return df.iloc[0:0]
 
-    by_name = df[norm_series(df[col_name]) == CL_NORM]
-    if not by_name.empty or not CHAPTER_LEADER_EMAIL:
-        return by_name
-
-    email = CHAPTER_LEADER_EMAIL.strip()
-    if not email:
-        return by_name
-
-    email_mask = df[col_name].fillna("").str.contains(email, case=False, na=False)
-    return df[email_mask]
+    idx = LeaderIndex.from_series(df[col_name])
+    norm = _resolve_leader(idx, col_name, CHAPTER_LEADER, CHAPTER_LEADER_EMAIL)
+    if norm is None:
+        return df.iloc[0:0]
+    return df[df[col_name].isin(idx.raw[norm])]
+
+
+def _resolve_leader(
+    idx: LeaderIndex, col_name: str, name: str, email: str
+) -> str | None:
+    """idx.resolve avisando de los candidatos cuando no hay coincidencia."""
+    norm = idx.resolve(name, email)
+    if norm is None and (sugg := idx.suggest(name, 3)):
+        _warn(f"«{name}» no aparece en «{col_name}»; ¿quizá {' / '.join(sugg)}?")
+    return norm
+
+
+def confirm_leader(name: str, email: str = "", files_dir: str | None = None) -> str:
+    """Nombre con el que filtrar en la CLI: *name* si coincide tal cual o por
+    correo; si no, se pregunta por consola entre los candidatos.
+
+    Sin consola interactiva (o sin candidatos) se devuelve *name* sin cambios.
+    """
+    idx = leader_index(files_dir)
+    if not idx.raw or idx.resolve(name, email) is not None:
+        return name
+    sugg = idx.suggest(name, 5)
+    if not sugg or not sys.stdin.isatty():
+        return name
+    print(f"«{name}» no coincide exactamente con ningún Chapter Leader:")
+    for i, cand in enumerate(sugg, 1):
+        print(f"  {i}. {cand}")
+    ans = input(f"¿Cuál usar? [1-{len(sugg)}, Enter = «{name}»]: ").strip()
+    if ans.isdigit() and 1 <= int(ans) <= len(sugg):
+        return sugg[int(ans) - 1]
+    return name
 
 
 # ─── Búsqueda automática de archivos ──────────────────────────────────
-def _find_file_by_keyword(keyword: str) -> str | None:
-    """Busca en FILES_DIR un único .xlsx cuyo nombre contenga keyword (normalizado)."""
-    files = [f for f in os.listdir(FILES_DIR) if f.lower().endswith(".xlsx")]
-    matches = [f for f in files if keyword in _normalize(f)]
-    if len(matches) == 1:
-        return os.path.join(FILES_DIR, matches[0])
-    if len(matches) == 0:
-        _warn(f"No se encontró archivo con «{keyword}» en {FILES_DIR}")
-    else:
-        _warn(f"Hay múltiples archivos con «{keyword}»; corrige antes de continuar")
-    return None
+# Índice de cada carpeta de datos (incluye subcarpetas por mes): nombre
+# normalizado → ruta, tamaño y mtime. Se guarda en <carpeta>/cached_files/
+# dir_index.json, así que un proceso nuevo (p.ej. cada trabajo de la cola) no
+# vuelve a listar la carpeta de red: una carpeta sólo se vuelve a listar cuando
+# cambia su mtime, y dentro de DIR_INDEX_TTL ni siquiera se hace stat. Un Excel
+# sobrescrito con el mismo nombre no cambia el mtime de su carpeta: por eso
+# los candidatos de cada búsqueda (unos pocos) se vuelven a leer con stat.
+DIR_INDEX_TTL = 2.0  # segundos
+DIR_INDEX_DEPTH = 2  # niveles de subcarpetas (p.ej. «2025 05/»)
+DIR_INDEX_FILE = "dir_index.json"
+DIR_INDEX_VERSION = 1
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    norm: str
+    path: str
+    size: int
+    mtime_ns: int
+
+
+class _DirIndex:
+    def __init__(self, root: str) -> None:
+        self.root = root
+        # carpeta → (mtime_ns, archivos .xlsx, subcarpetas)
+        self.dirs: dict[str, tuple[int, list[FileEntry], list[str]]] = {}
+        self.checked = 0.0
+        self.file = os.path.join(root, CACHE_SUBDIR, DIR_INDEX_FILE)
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.file, encoding="utf-8") as fh:
+                data = json.load(fh)
+            key = (data.get("version"), data.get("root"))
+            if key != (DIR_INDEX_VERSION, self.root):
+                return
+            self.dirs = {
+                path: (mtime_ns, [FileEntry(*f) for f in files], subdirs)
+                for path, (mtime_ns, files, subdirs) in data["dirs"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            self.dirs = {}  # sin índice guardado o ilegible: se lista de nuevo
+
+    def _save(self) -> None:
+        data = {
+            "version": DIR_INDEX_VERSION,
+            "root": self.root,
+            "dirs": {
+                path: [mtime_ns, [astuple(f) for f in files], subdirs]
+                for path, (mtime_ns, files, subdirs) in self.dirs.items()
+            },
+        }
+        try:
+            os.makedirs(os.path.dirname(self.file), exist_ok=True)
+            with _atomic_target(self.file) as tmp:
+                with open(tmp, "w", encoding="utf-8") as fh:
+                    json.dump(data, fh, ensure_ascii=False)
+        except OSError:
+            pass  # carpeta de sólo lectura: el índice queda en memoria
+
+    def _scan(self, path: str, mtime_ns: int) -> None:
+        files: list[FileEntry] = []
+        subdirs: list[str] = []
+        with os.scandir(path) as it:
+            for e in it:
+                if e.is_dir() and e.name != CACHE_SUBDIR and not e.name.startswith("."):
+                    subdirs.append(e.path)
+                elif e.name.lower().endswith(".xlsx") and not e.name.startswith("~$"):
+                    st = e.stat()
+                    files.append(FileEntry(_normalize(e.name), e.path, st.st_size, st.st_mtime_ns))
+        self.dirs[path] = (mtime_ns, files, subdirs)
+
+    def refresh(self) -> None:
+        now = time.monotonic()
+        if self.dirs and now - self.checked < DIR_INDEX_TTL:
+            return
+        seen: set[str] = set()
+        changed = False
+        stack = [(self.root, 0)]
+        while stack:
+            path, depth = stack.pop()
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            if path not in self.dirs or self.dirs[path][0] != mtime_ns:
+                self._scan(path, mtime_ns)
+                changed = True
+            seen.add(path)
+            if depth < DIR_INDEX_DEPTH:
+                stack.extend((d, depth + 1) for d in self.dirs[path][2])
+        for gone in set(self.dirs) - seen:
+            del self.dirs[gone]
+            changed = True
+        self.checked = now
+        if changed:
+            self._save()
+
+    def find(self, keyword: str) -> list[FileEntry]:
+        """Coincidencias de *keyword*, la más reciente primero (empate: ruta)."""
+        self.refresh()
+        hits = []
+        for _, files, _ in self.dirs.values():
+            for f in files:
+                if keyword not in f.norm:
+                    continue
+                try:
+                    st = os.stat(f.path)
+                except OSError:
+                    continue
+                hits.append(FileEntry(f.norm, f.path, st.st_size, st.st_mtime_ns))
+        return sorted(hits, key=lambda f: (-f.mtime_ns, f.path))
+
+
+_DIR_INDEXES: dict[str, _DirIndex] = {}
+
+
+def find_files(keyword: str, files_dir: str | None = None) -> list[FileEntry]:
+    root = os.path.abspath(files_dir or FILES_DIR)
+    if root not in _DIR_INDEXES:
+        _DIR_INDEXES[root] = _DirIndex(root)
+    return _DIR_INDEXES[root].find(keyword)
+
+
+def _find_file_by_keyword(
+    keyword: str, files_dir: str | None = None, quiet: bool = False
+) -> str | None:
+    """El .xlsx más reciente de FILES_DIR (y subcarpetas) cuyo nombre contenga keyword."""
+    files_dir = files_dir or FILES_DIR
+    matches = find_files(keyword, files_dir)
+    if not matches:
+        if not quiet:
+            _warn(f"No se encontró archivo con «{keyword}» en {files_dir}")
+        return None
+    if len(matches) > 1 and not quiet:
+        _warn(
+            f"Hay {len(matches)} archivos con «{keyword}»; se usa el más reciente: "
+            f"{os.path.relpath(matches[0].path, files_dir)}"
+        )
+    return matches[0].path
 
 
 def _resolve_path(cli_arg: str | None, task_key: str) -> str | None:
@@ -134,43 +454,482 @@ def _resolve_path(cli_arg: str | None, task_key: str) -> str | None:
 
 
 # ─── Caché Excel → Parquet ────────────────────────────────────────────
+def _create_temp(dest: str) -> str:
+    """Crea un temporal vacío junto a *dest* con los permisos de un open() normal.
+
+    No se usa mkstemp: crea con 0600 y la caché compartida debe poder leerla el
+    resto de usuarios. Pedir 0o666 deja que el sistema aplique el umask.
+    """
+    folder = os.path.dirname(dest) or "."
+    suffix = os.path.splitext(dest)[1]
+    while True:
+        tmp = os.path.join(folder, f".tmp_{secrets.token_hex(6)}{suffix}")
+        try:
+            os.close(os.open(tmp, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+            return tmp
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def _atomic_target(dest: str):
+    """Ruta temporal junto a *dest*; al salir sin error reemplaza *dest*.
+
+    Así un lector concurrente nunca ve un archivo a medio escribir.
+    """
+    tmp = _create_temp(dest)
+    try:
+        yield tmp
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# Sidecars (hashes por fila, índice de líderes, t-digests) que no se pudieron
+# escribir, p.ej. en una caché compartida de sólo lectura: ruta → (clave de
+# validez, contenido). Se sirven desde memoria el resto del proceso.
+_SIDECAR_MEMO: dict[str, tuple] = {}
+
+
+def _save_sidecar(path: str, key, value, write: Callable[[str], None]) -> None:
+    """Escribe *path* con write(tmp); si no se puede, lo guarda en memoria."""
+    try:
+        with _atomic_target(path) as tmp:
+            write(tmp)
+        _SIDECAR_MEMO.pop(path, None)
+    except OSError:
+        _SIDECAR_MEMO[path] = (key, value)
+
+
+def _memo_sidecar(path: str, key):
+    """Contenido guardado en memoria para *path* si sigue siendo válido."""
+    hit = _SIDECAR_MEMO.get(path)
+    return hit[1] if hit is not None and hit[0] == key else None
+
+
 def _slugify(txt: str) -> str:
     txt = unicodedata.normalize("NFKD", txt).encode("ascii", "ignore").decode()
     return re.sub(r"[^\w.\-]+", "_", txt)
 
 
-def read_any(fp: str, **kw) -> pd.DataFrame:
-    sheet = kw.get("sheet_name")
+def _cache_stem(fp: str, cache_dir: str | None = None) -> str:
+    """Nombre base de las entradas de *fp* en la caché.
+
+    Un Excel de la carpeta de datos conserva su nombre. Uno de una subcarpeta
+    (p.ej. el export de cada mes, siempre con el mismo nombre) lleva delante la
+    subcarpeta, y uno de fuera un hash corto de su carpeta: dos archivos
+    distintos nunca comparten entrada.
+    """
+    cache_dir = os.path.abspath(cache_dir or CACHE_DIR)
+    src_dir = os.path.dirname(os.path.abspath(fp))
     base = os.path.splitext(os.path.basename(fp))[0]
-    cache_name = f"{base}__{sheet}.parquet" if sheet else f"{base}.parquet"
-    cache_path = os.path.join(CACHE_DIR, _slugify(cache_name))
+    try:
+        rel = os.path.relpath(src_dir, os.path.dirname(cache_dir))
+    except ValueError:  # otra unidad (Windows)
+        rel = os.pardir
+    if rel == os.curdir:
+        return _slugify(base)
+    if rel.split(os.sep)[0] == os.pardir:
+        rel = hashlib.sha1(src_dir.encode()).hexdigest()[:8]
+    return _slugify(f"{rel.replace(os.sep, '_')}--{base}")
+
+
+def _cache_path(
+    fp: str, sheet: str | None = None, cache_dir: str | None = None
+) -> str:
+    stem = _cache_stem(fp, cache_dir)
+    cache_name = f"{stem}__{sheet}.parquet" if sheet else f"{stem}.parquet"
+    return os.path.join(cache_dir or CACHE_DIR, _slugify(cache_name))
+
+
+# La caché puede estar en una carpeta compartida por varios usuarios: cada
+# Parquet se escribe en un temporal y se renombra, un lock por entrada hace que
+# sólo un proceso convierta cada hoja (el resto espera y la lee), y antes de
+# servir un acierto se comprueba el pie del Parquet y la huella del Excel.
+LOCK_TIMEOUT = 600.0  # segundos esperando a que otro proceso termine
+LOCK_POLL = 0.25
+SOURCE_KEY = b"graphs.source"  # metadato Parquet: "<tamaño>:<mtime_ns>" del Excel
+
+
+def _try_lock(fh) -> bool:
+    try:
+        if os.name == "nt":
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fh) -> None:
+    if os.name == "nt":
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Lock exclusivo (advisory) sobre <path>.lock; entrega False si no se obtuvo.
+
+    Sin permiso de escritura o tras LOCK_TIMEOUT se sigue sin lock: quien llama
+    decide qué hacer (p.ej. leer el Excel sin escribir la caché).
+
+    El .lock (vacío) se queda en la caché a propósito: borrarlo mientras otro
+    proceso espera sobre él dejaría a dos procesos con el lock. Se borra con su
+    entrada en cache_maintenance --delete.
+    """
+    try:
+        fh = open(f"{path}.lock", "a+b")
+    except OSError:
+        yield False
+        return
+    try:
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        waiting = False
+        while not _try_lock(fh):
+            if not waiting:
+                print(f"⏳ Otro proceso está generando {os.path.basename(path)}; esperando…")
+                waiting = True
+            if time.monotonic() > deadline:
+                _warn(f"Tiempo de espera agotado para {os.path.basename(path)}")
+                yield False
+                return
+            time.sleep(LOCK_POLL)
+        try:
+            yield True
+        finally:
+            _unlock(fh)
+    finally:
+        fh.close()
+
+
+def _source_stamp(fp: str) -> bytes:
+    st = os.stat(fp)
+    return f"{st.st_size}:{st.st_mtime_ns}".encode()
+
+
+def _cache_ok(cache_path: str, fp: str) -> bool:
+    """True si el Parquet está completo y corresponde a la versión actual de *fp*.
+
+    Las entradas antiguas sin huella se aceptan si son más nuevas que el Excel.
+    """
+    try:
+        meta = pq.read_schema(cache_path).metadata or {}  # falla si está truncado
+    except (OSError, pa.ArrowInvalid):
+        return False
+    if not fp.lower().endswith(".xlsx"):
+        return True
+    if SOURCE_KEY in meta:
+        return meta[SOURCE_KEY] == _source_stamp(fp)
+    return os.path.getmtime(cache_path) >= os.path.getmtime(fp)
+
+
+def _write_cache(df: pd.DataFrame, cache_path: str, fp: str) -> None:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = {**(table.schema.metadata or {}), SOURCE_KEY: _source_stamp(fp)}
+    with _atomic_target(cache_path) as tmp:
+        pq.write_table(table.replace_schema_metadata(meta), tmp, compression="snappy")
+    hashes = hash_rows(table.to_batches(CHUNK_ROWS))
+    _write_row_hashes(hashes, cache_path, meta[SOURCE_KEY])
+
+
+# ─── Hash de contenido por fila (comparación entre meses, delta.py) ───
+# Al escribir la caché se guarda junto al Parquet (<cache>.rowhash.parquet) un
+# uint64 por fila con el hash de todas sus columnas, en el mismo orden. Así
+# comparar dos periodos lee 8 bytes por fila y no las tablas completas.
+def hash_rows(batches) -> np.ndarray:
+    """Hash de cada fila de *batches* (RecordBatch de Arrow), en orden."""
+    parts = [
+        pd.util.hash_pandas_object(b.to_pandas(), index=False).to_numpy("uint64")
+        for b in batches
+    ]
+    return np.concatenate(parts) if parts else np.empty(0, dtype="uint64")
+
+
+def _write_row_hashes(hashes: np.ndarray, cache_path: str, stamp: bytes) -> None:
+    table = pa.table({"h": pa.array(hashes, type=pa.uint64())})
+    table = table.replace_schema_metadata({SOURCE_KEY: stamp})
+    _save_sidecar(
+        f"{cache_path}.rowhash.parquet",
+        (stamp, len(hashes)),
+        hashes,
+        lambda tmp: pq.write_table(table, tmp),
+    )
+
+
+def row_hashes(cache_path: str) -> np.ndarray:
+    """Hashes por fila del Parquet; se recalculan si el sidecar falta o no coincide."""
+    path = f"{cache_path}.rowhash.parquet"
+    pf = pq.ParquetFile(cache_path)
+    stamp = (pf.schema_arrow.metadata or {}).get(SOURCE_KEY, b"")
+    if os.path.isfile(path):
+        table = pq.read_table(path)
+        got = (table.schema.metadata or {}).get(SOURCE_KEY)
+        if got == stamp and table.num_rows == pf.metadata.num_rows:
+            return table.column(0).to_numpy()
+    if (hashes := _memo_sidecar(path, (stamp, pf.metadata.num_rows))) is not None:
+        return hashes
+    # Caché escrita antes de existir el sidecar: se calcula una vez por lotes
+    hashes = hash_rows(pf.iter_batches(CHUNK_ROWS))
+    _write_row_hashes(hashes, cache_path, stamp)
+    return hashes
+
+
+# ─── Caché en memoria (LRU de DataFrames) ─────────────────────────────
+# En un proceso de larga vida (GUI, corridas por líder) evita volver a
+# decodificar el Parquet. La clave incluye la huella del Excel, así que se
+# invalida igual que la caché en disco. Se entregan copias superficiales:
+# asignar columnas no altera la copia guardada.
+FRAME_CACHE_BYTES = 512 * 2**20  # 0 = desactivada
+FRAME_CACHE_LEADER = True  # guardar también los DataFrames filtrados por CL
+
+
+class FrameCache:
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self.items: OrderedDict[tuple, tuple[pd.DataFrame, int]] = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> pd.DataFrame | None:
+        with self._lock:
+            if key not in self.items:
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return self.items[key][0].copy(deep=False)
+
+    def put(self, key: tuple, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.budget:
+            return
+        with self._lock:
+            # Otra versión del mismo origen (el Excel cambió): ya no sirve
+            for old in [k for k in self.items if k[:3] == key[:3] and k[3] != key[3]]:
+                self._drop(old)
+            if key in self.items:
+                self._drop(key)
+            self.items[key] = (df, size)
+            self.bytes += size
+            while self.bytes > self.budget:
+                self._drop(next(iter(self.items)))
+                self.evictions += 1
+
+    def _drop(self, key: tuple) -> None:
+        self.bytes -= self.items.pop(key)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.items.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.items),
+            "bytes": self.bytes,
+            "budget": self.budget,
+        }
+
+    def summary(self) -> str:
+        return (
+            f"Caché en memoria: {self.hits} aciertos, {self.misses} fallos, "
+            f"{self.evictions} expulsiones · {len(self.items)} tablas, "
+            f"{self.bytes / 2**20:.0f}/{self.budget / 2**20:.0f} MiB"
+        )
+
+
+FRAMES = FrameCache(FRAME_CACHE_BYTES)
+
+
+def _frame_key(kind: str, fp: str, sheet: str | None, *extra) -> tuple:
+    return (kind, os.path.abspath(fp), sheet, _source_stamp(fp), *extra)
+
+
+def read_any(fp: str, **kw) -> pd.DataFrame:
+    key = _frame_key("raw", fp, kw.get("sheet_name"))
+    if FRAMES.budget and (df := FRAMES.get(key)) is not None:
+        return df
+    df = _read_any(fp, **kw)
+    if FRAMES.budget:
+        FRAMES.put(key, df)
+        return df.copy(deep=False)
+    return df
+
+
+def read_leader(fp: str, col_name: str, **kw) -> pd.DataFrame:
+    """read_any + _filter_by_chapter_leader, memorizado por Chapter Leader.
+
+    En un acierto no se repiten los avisos de líder no encontrado.
+    """
+    key = _frame_key(
+        "cl", fp, kw.get("sheet_name"), col_name, CL_NORM, CHAPTER_LEADER_EMAIL
+    )
+    use = FRAMES.budget and FRAME_CACHE_LEADER
+    if use and (df := FRAMES.get(key)) is not None:
+        return df
+    df = _filter_by_chapter_leader(read_any(fp, **kw), col_name)
+    if use:
+        FRAMES.put(key, df)
+        return df.copy(deep=False)
+    return df
+
+
+def _read_any(fp: str, **kw) -> pd.DataFrame:
+    cache_path = _cache_path(fp, kw.get("sheet_name"))
 
-    if os.path.isfile(cache_path):
+    if _cache_ok(cache_path, fp):
         return pd.read_parquet(cache_path)
 
-    df = pd.read_excel(fp, **kw)
-    obj_cols = df.select_dtypes(include="object").columns
-    df[obj_cols] = df[obj_cols].astype("string")
     os.makedirs(CACHE_DIR, exist_ok=True)
-    df.reset_index(drop=True).to_parquet(cache_path, compression="snappy", index=False)
+    with _file_lock(cache_path) as locked:
+        # Otro proceso pudo terminar la conversión mientras esperábamos
+        if locked and _cache_ok(cache_path, fp):
+            return pd.read_parquet(cache_path)
+
+        df = pd.read_excel(fp, **kw)
+        obj_cols = df.select_dtypes(include="object").columns
+        df[obj_cols] = df[obj_cols].astype("string")
+        df = df.reset_index(drop=True)
+        if locked:
+            _write_cache(df, cache_path, fp)
     return df
 
 
+def is_cached(
+    fp: str, sheet: str | None = None, cache_dir: str | None = None
+) -> bool:
+    return not fp.lower().endswith(".xlsx") or _cache_ok(
+        _cache_path(fp, sheet, cache_dir), fp
+    )
+
+
+def warm_cache(fp: str, sheet: str | None, cache_dir: str) -> str:
+    """Convierte una hoja a Parquet sin devolver el DataFrame.
+
+    Pensada para ejecutarse en un proceso hijo (ProcessPoolExecutor): recibe
+    cache_dir porque el hijo no hereda la configuración del padre.
+    """
+    global CACHE_DIR
+    CACHE_DIR = cache_dir
+    if not is_cached(fp, sheet):
+        read_any(fp, **({"sheet_name": sheet} if sheet else {}))
+    return _cache_path(fp, sheet)
+
+
+# ─── Agregación por lotes (exports enormes) ───────────────────────────
+# Para TMD y Dedicación las medias pueden calcularse leyendo el Parquet de la
+# caché en lotes de CHUNK_ROWS filas: cada lote se filtra por el Chapter Leader
+# y se acumula en sumas/conteos por grupo, así que la memoria no depende del
+# tamaño del archivo. La conversión Excel→Parquet inicial sigue siendo completa.
+CHUNK_ROWS = 200_000
+CHUNKED_AGG: bool | None = None  # None = automático según CHUNKED_MIN_BYTES
+CHUNKED_MIN_BYTES = 50 * 2**20  # tamaño del .xlsx a partir del cual se usa
+
+
+def _use_chunked(fp: str) -> bool:
+    if CHUNKED_AGG is not None:
+        return CHUNKED_AGG
+    return os.path.getsize(fp) >= CHUNKED_MIN_BYTES
+
+
+class _MeanAcc:
+    """sum/count por grupo acumulados entre lotes (suma compensada de Kahan).
+
+    El resultado tiene el mismo índice, orden y dtype que la ruta en memoria;
+    las medias pueden diferir de ella en el último bit (tests/test_chunked.py).
+    """
+
+    def __init__(self, key: str, value: str) -> None:
+        self.key, self.value = key, value
+        self.dtype = None  # el de la columna *key*, como en la ruta en memoria
+        self.total = pd.Series(dtype="float64")
+        self.comp = pd.Series(dtype="float64")
+        self.count = pd.Series(dtype="int64")
+
+    def add(self, keys: pd.Series, values: pd.Series) -> None:
+        self.dtype = keys.dtype
+        g = values.groupby(keys, observed=True)
+        sums, counts = g.sum(), g.count()
+        idx = self.total.index.union(sums.index)
+        total = self.total.reindex(idx, fill_value=0.0)
+        y = sums.reindex(idx, fill_value=0.0) - self.comp.reindex(idx, fill_value=0.0)
+        t = total + y
+        self.comp = (t - total) - y
+        self.total = t
+        self.count = self.count.reindex(idx, fill_value=0).add(
+            counts.reindex(idx, fill_value=0)
+        )
+
+    def means(self) -> pd.Series:
+        out = self.total / self.count.where(self.count > 0)
+        if self.dtype is not None:
+            out.index = out.index.astype(self.dtype)
+        out.index.name, out.name = self.key, self.value
+        return out.sort_index()
+
+
+def _chunked_means(
+    fp: str, cl_col: str, keys: list[str], value: str
+) -> dict[str, pd.Series] | None:
+    """Medias de *value* por cada columna de *keys*, filas del Chapter Leader.
+
+    Devuelve None si el líder no tiene filas.
+    """
+    warm_cache(fp, None, CACHE_DIR)
+    cp = _cache_path(fp)
+    li = LeaderIndex.from_counts(_leader_index(cp, cl_col)["values"].items())
+    norm = li.resolve(CHAPTER_LEADER, CHAPTER_LEADER_EMAIL)
+    if norm is None:
+        return None
+    wanted = li.raw[norm]
+
+    accs = {k: _MeanAcc(k, value) for k in keys}
+    pf = pq.ParquetFile(cp)
+    for batch in pf.iter_batches(batch_size=CHUNK_ROWS, columns=[cl_col, *keys, value]):
+        chunk = batch.to_pandas()
+        chunk = chunk[chunk[cl_col].isin(wanted)]
+        if chunk.empty:
+            continue
+        vals = pd.to_numeric(chunk[value], errors="coerce")
+        for k in keys:
+            accs[k].add(chunk[k], vals)
+    return {k: acc.means() for k, acc in accs.items()}
+
+
 # ───────────── 1 · CALIDAD ─────────────
-def plot_calidad_pases(file_path: str) -> None:
+CALIDAD_SHEETS = ("Consolidado Pases", "Consolidado Reversiones")
+
+
+def calidad_counts(file_path: str) -> pd.DataFrame | None:
+    """Pases y reversiones del CL por (Squad, Mes); None si no hay filas."""
     fp = file_path
     if fp.lower().endswith(".xlsx"):
-        pases = read_any(fp, sheet_name="Consolidado Pases")
-        revs = read_any(fp, sheet_name="Consolidado Reversiones")
+        frames = {
+            sh: read_leader(fp, "Chapter leader", sheet_name=sh) for sh in CALIDAD_SHEETS
+        }
     else:  # parquet unificado
-        dfall = read_any(fp)
-        pases = dfall[dfall["Tipo"] == "Pase a Producción"].copy()
-        revs = dfall[dfall["Tipo"] == "Reversión"].copy()
+        dfall = read_leader(fp, "Chapter leader")
+        frames = {
+            CALIDAD_SHEETS[0]: dfall[dfall["Tipo"] == "Pase a Producción"].copy(),
+            CALIDAD_SHEETS[1]: dfall[dfall["Tipo"] == "Reversión"].copy(),
+        }
+    return _calidad_agg(frames)
+
 
-    pases = _filter_by_chapter_leader(pases, "Chapter leader")
-    revs = _filter_by_chapter_leader(revs, "Chapter leader")
+def _calidad_agg(frames: dict) -> pd.DataFrame | None:
+    pases, revs = (frames[sh] for sh in CALIDAD_SHEETS)
     if pases.empty and revs.empty:
-        return _warn("Sin datos de Calidad.")
+        return None
 
     pases["Mes"] = pases["Mes"].astype(MONTH_CAT)
     revs["Mes"] = revs["Mes"].astype(MONTH_CAT)
@@ -183,7 +942,16 @@ def plot_calidad_pases(file_path: str) -> None:
     full = c_p.merge(c_r, on=["Squad", "Mes"], how="outer")
     full["passes"] = full["passes"].fillna(0).astype(int)
     full["revs"] = full["revs"].fillna(0).astype(int)
-    full = full[(full["passes"] + full["revs"]) > 0]
+    return full[(full["passes"] + full["revs"]) > 0]
+
+
+def plot_calidad_pases(file_path: str) -> None:
+    _draw_calidad(calidad_counts(file_path))
+
+
+def _draw_calidad(full: pd.DataFrame | None) -> None:
+    if full is None:
+        return _warn("Sin datos de Calidad.")
 
     for sq in sorted(full["Squad"].unique()):
         d = full[full["Squad"] == sq].sort_values("Mes")
@@ -244,13 +1012,32 @@ def plot_calidad_pases(file_path: str) -> None:
 
 
 # ───────────── 2 · DEDICACIÓN ─────────────
-def plot_dedicacion_tm(file_path: str) -> None:
-    df = read_any(file_path)
-    df = _filter_by_chapter_leader(df, "Nombre CL")
+def _dedicacion_avg(file_path: str) -> pd.Series | None:
+    """Dedicación media por miembro del CL (None si no hay filas)."""
+    if _use_chunked(file_path):
+        res = _chunked_means(file_path, "Nombre CL", ["Nombres"], "Dedicación")
+        return res["Nombres"].sort_values() if res else None
+
+    return _dedicacion_agg({None: read_leader(file_path, "Nombre CL")})
+
+
+def _dedicacion_agg(frames: dict) -> pd.Series | None:
+    df = frames[None]
     if df.empty:
+        return None
+    # Misma coerción que _chunked_means: un texto en la celda cuenta como vacío
+    vals = pd.to_numeric(df["Dedicación"], errors="coerce")
+    return vals.groupby(df["Nombres"]).mean().sort_values()
+
+
+def plot_dedicacion_tm(file_path: str) -> None:
+    _draw_dedicacion(_dedicacion_avg(file_path))
+
+
+def _draw_dedicacion(avg: pd.Series | None) -> None:
+    if avg is None or avg.empty:
         return _warn("Sin dedicación para CL.")
 
-    avg = df.groupby("Nombres")["Dedicación"].mean().sort_values()
     plt.figure(figsize=(10, 6))
     plt.grid(axis="x", ls="--", alpha=0.4)
     bars = plt.barh(avg.index.tolist(), avg.values.tolist(), color="seagreen")
@@ -271,28 +1058,55 @@ def plot_dedicacion_tm(file_path: str) -> None:
 
 
 # ───────────── 3 · NIVELES DE MADUREZ (LEP) ─────────────
-def plot_niveles_madurez(file_path: str) -> None:
-    df = read_any(file_path)
-    df = _filter_by_chapter_leader(df, "Chapter Leader")
+SQ_CANDIDATES = {"SQ", "SQUAD", "SQUAD NAME", "NOMBRE SQUAD"}
+# Barras agrupadas (una barra y una etiqueta por celda) hasta MADUREZ_HEATMAP_CELLS
+# celdas squad × métrica; por encima, mapa de calor: una sola imagen.
+MADUREZ_MODE = "auto"  # "auto" | "barras" | "mapa"
+MADUREZ_HEATMAP_CELLS = 120
+MADUREZ_LABEL_MAX = 800  # celdas del mapa con el valor impreso; más, sólo colores
+MADUREZ_CMAP = "RdYlGn"
+
+
+def madurez_means(file_path: str) -> pd.DataFrame | None:
+    """Promedio de cada LEP_* por squad (índice = squad), mejor squad primero."""
+    return _madurez_agg({None: read_leader(file_path, "Chapter Leader")})
+
+
+def _madurez_agg(frames: dict) -> pd.DataFrame | None:
+    df = frames[None]
     if df.empty:
-        return _warn("Sin registros LEP para CL.")
+        _warn("Sin registros LEP para CL.")
+        return None
 
     lep_cols = [c for c in df.columns if str(c).startswith("LEP_")]
-    sq_candidates = [
-        c
-        for c in df.columns
-        if c.upper() in {"SQ", "SQUAD", "SQUAD NAME", "NOMBRE SQUAD"}
-    ]
+    sq_candidates = [c for c in df.columns if str(c).upper() in SQ_CANDIDATES]
     if not lep_cols or not sq_candidates:
-        return _warn("Faltan columnas LEP_ o Squad.")
-    SQ_COL = sq_candidates[0]
+        _warn("Faltan columnas LEP_ o Squad.")
+        return None
 
-    group_sq = df.groupby(SQ_COL)[lep_cols].mean()
+    group_sq = df.groupby(sq_candidates[0])[lep_cols].mean()
     group_sq["overall_avg"] = group_sq.mean(axis=1)
-    group_sq = group_sq.sort_values("overall_avg", ascending=False).drop(
+    return group_sq.sort_values("overall_avg", ascending=False).drop(
         columns="overall_avg"
     )
 
+
+def plot_niveles_madurez(file_path: str) -> None:
+    _draw_madurez(madurez_means(file_path))
+
+
+def _draw_madurez(group_sq: pd.DataFrame | None) -> None:
+    if group_sq is None:
+        return
+    mode = MADUREZ_MODE
+    if mode == "auto":
+        mode = "mapa" if group_sq.size > MADUREZ_HEATMAP_CELLS else "barras"
+    if mode == "mapa":
+        return _draw_madurez_heatmap(group_sq)
+
+    SQ_COL = group_sq.index.name
+    lep_cols = list(group_sq.columns)
+
     melted_sq = group_sq.reset_index().melt(
         id_vars=SQ_COL,
         value_vars=lep_cols,
@@ -333,11 +1147,53 @@ def plot_niveles_madurez(file_path: str) -> None:
     plt.show()
 
 
+def _draw_madurez_heatmap(group_sq: pd.DataFrame) -> None:
+    """Mapa de calor squad × métrica para matrices LEP grandes."""
+    values = group_sq.to_numpy(dtype="float64")
+    n_sq, n_m = values.shape
+    fig, ax = plt.subplots(figsize=(min(4 + 0.9 * n_m, 22), min(2 + 0.28 * n_sq, 40)))
+    image = ax.imshow(
+        np.ma.masked_invalid(values),
+        cmap=MADUREZ_CMAP,
+        aspect="auto",
+        interpolation="nearest",
+    )
+    ax.set_xticks(np.arange(n_m), labels=group_sq.columns, rotation=35, ha="right")
+    ax.set_yticks(np.arange(n_sq), labels=group_sq.index)
+    ax.tick_params(axis="y", labelsize=9 if n_sq <= 40 else 7)
+    ax.grid(False)
+
+    rows, cols = np.nonzero(~np.isnan(values))
+    if 0 < len(rows) <= MADUREZ_LABEL_MAX:
+        cells = values[rows, cols]
+        # Texto oscuro sobre celdas claras y viceversa (luminancia del color)
+        rgb = image.cmap(image.norm(cells))[:, :3]
+        ink = np.where(rgb @ [0.299, 0.587, 0.114] > 0.55, "#1a1a1a", "white")
+        labels = np.char.mod("%.2f", cells)
+        size = 8 if n_sq <= 40 else 6
+        for x, y, txt, color in zip(cols, rows, labels.tolist(), ink.tolist()):
+            ax.text(x, y, txt, ha="center", va="center", fontsize=size, color=color)
+
+    fig.colorbar(image, ax=ax, label="Puntuación promedio", shrink=0.8)
+    ax.set_title("Niveles de Madurez – Promedio LEP por Squad")
+    ax.set_ylabel("Squad")
+    ax.set_xlabel("Métrica LEP")
+    plt.tight_layout()
+    plt.show()
+
+
 # ───────────── 4 · TMD ─────────────
+CL_CANDIDATES = ["Nombre CL", "cl_dev", "Chapter leader", "Chapter Leader", "NombreCL"]
+
+
 def _find_cl_column(df: pd.DataFrame) -> str | None:
-    candidates = ["Nombre CL", "cl_dev", "Chapter leader", "Chapter Leader", "NombreCL"]
-    for c in df.columns:
-        if normalize_name(c) in map(normalize_name, candidates):
+    return _match_cl_column(df.columns)
+
+
+def _match_cl_column(columns) -> str | None:
+    wanted = set(map(normalize_name, CL_CANDIDATES))
+    for c in columns:
+        if normalize_name(c) in wanted:
             return c
     return None
 
@@ -347,12 +1203,13 @@ def _plot_tmd(series: pd.Series, title: str) -> None:
     labels = series.index.tolist()
     max_val = np.nanmax(vals)
 
-    cmap = cm.get_cmap("RdYlGn_r")
-    norm = colors.Normalize(vmin=TMD_THRESHOLD, vmax=max_val)
+    cmap = colormaps["RdYlGn_r"]
+    # Si todo está bajo el umbral la escala igual debe ser válida (vmin ≤ vmax)
+    norm = colors.Normalize(vmin=TMD_THRESHOLD, vmax=max(max_val, TMD_THRESHOLD + 1))
     bar_colors = [cmap(norm(v)) for v in vals]
 
     plt.figure(figsize=(14, 6))
-    ax = sns.barplot(y=labels, x=vals, palette=bar_colors)
+    ax = sns.barplot(y=labels, x=vals, hue=labels, palette=bar_colors, legend=False)
 
     ax.set_title(title)
     ax.set_xlabel("Promedio de días")
@@ -381,32 +1238,62 @@ def _plot_tmd(series: pd.Series, title: str) -> None:
     plt.show()
 
 
-def plot_tiempo_desarrollo(file_path: str) -> None:
+def _tmd_avgs(file_path: str) -> tuple[pd.Series, pd.Series] | None:
+    """(media por tribu, media por squad) del CL, de mayor a menor."""
+    if _use_chunked(file_path):
+        warm_cache(file_path, None, CACHE_DIR)
+        cl_col = _match_cl_column(pq.read_schema(_cache_path(file_path)).names)
+        if cl_col is None:
+            _warn("No se encontró columna de Chapter Leader en TMD.")
+            return None
+        res = _chunked_means(
+            file_path,
+            cl_col,
+            ["Descripción tribu", "Descripción squad"],
+            "Tiempo Desarrollo",
+        )
+        if res is None:
+            _warn("Sin datos de TMD para CL.")
+            return None
+        tribe_avg, squad_avg = res["Descripción tribu"], res["Descripción squad"]
+        return (
+            tribe_avg.dropna().sort_values(ascending=False),
+            squad_avg.dropna().sort_values(ascending=False),
+        )
+
     df = read_any(file_path)
 
     cl_col = _find_cl_column(df)
     if cl_col is None:
-        return _warn("No se encontró columna de Chapter Leader en TMD.")
+        _warn("No se encontró columna de Chapter Leader en TMD.")
+        return None
 
-    df = _filter_by_chapter_leader(df, cl_col)
-    if df.empty:
-        return _warn("Sin datos de TMD para CL.")
+    return _tmd_agg({None: read_leader(file_path, cl_col)})
 
-    df["Tiempo Desarrollo"] = pd.to_numeric(df["Tiempo Desarrollo"], errors="coerce")
 
-    squad_avg = (
-        df.groupby("Descripción squad")["Tiempo Desarrollo"]
-        .mean()
-        .dropna()
-        .sort_values(ascending=False)
+def _tmd_agg(frames: dict) -> tuple[pd.Series, pd.Series] | None:
+    df = frames[None]
+    if df.empty:
+        _warn("Sin datos de TMD para CL.")
+        return None
+
+    # Sin tocar *df*: puede ser el DataFrame memorizado en FRAMES
+    vals = pd.to_numeric(df["Tiempo Desarrollo"], errors="coerce")
+    tribe_avg, squad_avg = (
+        vals.groupby(df[key]).mean().dropna().sort_values(ascending=False)
+        for key in ("Descripción tribu", "Descripción squad")
     )
+    return tribe_avg, squad_avg
+
+
+def plot_tiempo_desarrollo(file_path: str) -> None:
+    _draw_tmd(_tmd_avgs(file_path))
 
-    tribe_avg = (
-        df.groupby("Descripción tribu")["Tiempo Desarrollo"]
-        .mean()
-        .dropna()
-        .sort_values(ascending=False)
-    )
+
+def _draw_tmd(avgs: tuple[pd.Series, pd.Series] | None) -> None:
+    if avgs is None:
+        return
+    tribe_avg, squad_avg = avgs
 
     _plot_tmd(
         tribe_avg,
@@ -418,6 +1305,840 @@ def plot_tiempo_desarrollo(file_path: str) -> None:
     )
 
 
+# ─── Percentiles de TMD (t-digest por tribu/squad/mes) ─────────────────
+# La media se distorsiona con valores atípicos. Para p50/p90 se guarda junto al
+# Parquet (<cache>.tmd_sketch.parquet) un t-digest por (CL, tribu|squad, mes):
+# cualquier rango de meses se obtiene fusionando esos resúmenes pequeños, sin
+# volver a recorrer las filas. El % sobre el umbral se cuenta de forma exacta.
+TDIGEST_COMPRESSION = 100  # más alto = más centroides y percentiles más exactos
+TMD_QUANTILES = (0.5, 0.9)
+TMD_MONTH_CANDIDATES = ["Mes", "Mes cierre", "Periodo"]
+TMD_LEVELS = {"tribu": "Descripción tribu", "squad": "Descripción squad"}
+_SKETCH_COLUMNS = [
+    "leader", "nivel", "grupo", "mes", "means", "weights", "vmin", "vmax", "over"
+]
+
+
+class TDigest:
+    """t-digest fusionable: la distribución resumida en centroides (media, peso)."""
+
+    def __init__(self, means=(), weights=(), vmin=np.inf, vmax=-np.inf) -> None:
+        self.means = np.asarray(means, dtype="float64")
+        self.weights = np.asarray(weights, dtype="float64")
+        self.vmin, self.vmax = float(vmin), float(vmax)
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values) -> TDigest:
+        v = np.asarray(values, dtype="float64")
+        v = v[~np.isnan(v)]
+        if v.size:
+            self._absorb(v, np.ones(v.size), v.min(), v.max())
+        return self
+
+    def merge(self, other: TDigest) -> TDigest:
+        if other.means.size:
+            self._absorb(other.means, other.weights, other.vmin, other.vmax)
+        return self
+
+    def _absorb(self, means, weights, vmin, vmax) -> None:
+        self.means = np.concatenate([self.means, means])
+        self.weights = np.concatenate([self.weights, weights])
+        self.vmin, self.vmax = min(self.vmin, vmin), max(self.vmax, vmax)
+        self._compress()
+
+    def _compress(self) -> None:
+        order = np.argsort(self.means, kind="stable")
+        m, w = self.means[order], self.weights[order]
+        if m.size > TDIGEST_COMPRESSION:
+            # Función de escala k1: centroides pequeños en las colas, grandes al medio
+            q = (np.cumsum(w) - w / 2) / w.sum()
+            k = np.floor(TDIGEST_COMPRESSION / (2 * np.pi) * np.arcsin(2 * q - 1))
+            starts = np.flatnonzero(np.r_[True, np.diff(k) > 0])
+            w_new = np.add.reduceat(w, starts)
+            m = np.add.reduceat(m * w, starts) / w_new
+            w = w_new
+        self.means, self.weights = m, w
+
+    def quantile(self, q: float) -> float:
+        n = self.count
+        if not n:
+            return float("nan")
+        pos = np.cumsum(self.weights) - self.weights / 2
+        return float(
+            np.interp(
+                q * n, np.r_[0.0, pos, n], np.r_[self.vmin, self.means, self.vmax]
+            )
+        )
+
+
+def _month_labels(s: pd.Series) -> pd.Series:
+    """Etiquetas de MONTHS_ES ("*" si no se reconoce el mes)."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s.dt.month.map(lambda m: MONTHS_ES[int(m) - 1] if m == m else "*")
+    lab = s.astype(str).str.strip().str[:3].str.capitalize()
+    return lab.where(lab.isin(MONTHS_ES), "*")
+
+
+def month_range(txt: str) -> list[str]:
+    """"Ene-Mar,Jun" → ["Ene", "Feb", "Mar", "Jun"]."""
+    out: list[str] = []
+    for part in filter(None, (p.strip() for p in txt.split(","))):
+        lo, _, hi = part.partition("-")
+        lo_m = _month_labels(pd.Series([lo])).iloc[0]
+        hi_m = _month_labels(pd.Series([hi or lo])).iloc[0]
+        if "*" in (lo_m, hi_m):
+            raise ValueError(f"Mes no reconocido: {part!r}")
+        i, j = MONTHS_ES.index(lo_m), MONTHS_ES.index(hi_m)
+        out += MONTHS_ES[i : j + 1] if i <= j else MONTHS_ES[i:] + MONTHS_ES[: j + 1]
+    return list(dict.fromkeys(out))
+
+
+def _tmd_sketches(cache_path: str, cl_col: str) -> pd.DataFrame:
+    """Tabla de t-digests de todo el archivo, una fila por (líder, nivel, grupo, mes).
+
+    Se guarda en <cache>.tmd_sketch.parquet y se invalida con el mtime del
+    Parquet, la columna del CL, el umbral y la compresión.
+    """
+    path = f"{cache_path}.tmd_sketch.parquet"
+    meta = {
+        "stamp": str(os.stat(cache_path).st_mtime_ns),
+        "column": cl_col,
+        "threshold": str(TMD_THRESHOLD),
+        "compression": str(TDIGEST_COMPRESSION),
+    }
+    if os.path.isfile(path):
+        got = pq.read_schema(path).metadata or {}
+        if all(got.get(k.encode()) == v.encode() for k, v in meta.items()):
+            return pq.read_table(path).to_pandas()
+    if (df := _memo_sidecar(path, meta)) is not None:
+        return df
+
+    names = pq.read_schema(cache_path).names
+    month_col = next((c for c in TMD_MONTH_CANDIDATES if c in names), None)
+    cols = [cl_col, *TMD_LEVELS.values(), "Tiempo Desarrollo"]
+    if month_col:
+        cols.append(month_col)
+    digests: dict[tuple, TDigest] = {}
+    over: dict[tuple, int] = {}
+    pf = pq.ParquetFile(cache_path)
+    for batch in pf.iter_batches(CHUNK_ROWS, columns=cols):
+        chunk = batch.to_pandas()
+        chunk["Tiempo Desarrollo"] = pd.to_numeric(
+            chunk["Tiempo Desarrollo"], errors="coerce"
+        )
+        chunk = chunk.dropna(subset=[cl_col, "Tiempo Desarrollo"])
+        chunk["_mes"] = _month_labels(chunk[month_col]) if month_col else "*"
+        for nivel, col in TMD_LEVELS.items():
+            g = chunk.groupby([cl_col, col, "_mes"], observed=True)["Tiempo Desarrollo"]
+            for (leader, grupo, mes), vals in g:
+                key = (str(leader), nivel, str(grupo), mes)
+                digests.setdefault(key, TDigest()).update(vals.to_numpy())
+                over[key] = over.get(key, 0) + int((vals > TMD_THRESHOLD).sum())
+
+    df = pd.DataFrame(
+        [
+            {
+                "leader": leader,
+                "nivel": nivel,
+                "grupo": grupo,
+                "mes": mes,
+                "means": d.means.tolist(),
+                "weights": d.weights.tolist(),
+                "vmin": d.vmin,
+                "vmax": d.vmax,
+                "over": over[(leader, nivel, grupo, mes)],
+            }
+            for (leader, nivel, grupo, mes), d in digests.items()
+        ],
+        columns=_SKETCH_COLUMNS,
+    )
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(meta)
+    _save_sidecar(path, meta, df, lambda tmp: pq.write_table(table, tmp))
+    return df
+
+
+def tmd_percentiles(
+    file_path: str, months: list[str] | None = None
+) -> dict[str, pd.DataFrame] | None:
+    """Percentiles (TMD_QUANTILES), n y % sobre el umbral por tribu y por squad.
+
+    *months* limita a esos meses (None = todos). Cada tabla va ordenada por el
+    último percentil, de mayor a menor.
+    """
+    warm_cache(file_path, None, CACHE_DIR)
+    cp = _cache_path(file_path)
+    cl_col = _match_cl_column(pq.read_schema(cp).names)
+    if cl_col is None:
+        _warn("No se encontró columna de Chapter Leader en TMD.")
+        return None
+    li = LeaderIndex.from_counts(_leader_index(cp, cl_col)["values"].items())
+    norm = li.resolve(CHAPTER_LEADER, CHAPTER_LEADER_EMAIL)
+    if norm is None:
+        _warn("Sin datos de TMD para CL.")
+        return None
+
+    sk = _tmd_sketches(cp, cl_col)
+    sk = sk[sk["leader"].isin(li.raw[norm])]
+    if months:
+        if (sk["mes"] == "*").all():
+            _warn("TMD no tiene columna de mes: se usan todos los registros.")
+        else:
+            sk = sk[sk["mes"].isin(months)]
+    if sk.empty:
+        _warn("Sin datos de TMD para CL en los meses indicados.")
+        return None
+
+    out: dict[str, pd.DataFrame] = {}
+    last = f"p{int(TMD_QUANTILES[-1] * 100)}"
+    for nivel, g in sk.groupby("nivel"):
+        rows = {}
+        for grupo, gg in g.groupby("grupo"):
+            d = TDigest()
+            for r in gg.itertuples():
+                d.merge(TDigest(r.means, r.weights, r.vmin, r.vmax))
+            rows[grupo] = {
+                **{f"p{int(q * 100)}": d.quantile(q) for q in TMD_QUANTILES},
+                "n": int(d.count),
+                "over": gg["over"].sum() / d.count,
+            }
+        out[str(nivel)] = pd.DataFrame.from_dict(rows, orient="index").sort_values(
+            last, ascending=False
+        )
+    return out
+
+
+def _plot_tmd_pct(df: pd.DataFrame, title: str) -> None:
+    labels = df.index.tolist()
+    y = np.arange(len(labels))
+    lo, hi = (f"p{int(q * 100)}" for q in (TMD_QUANTILES[0], TMD_QUANTILES[-1]))
+    max_val = float(np.nanmax(df[hi].to_numpy()))
+
+    plt.figure(figsize=(14, 6))
+    ax = plt.gca()
+    ax.barh(y, df[hi], color="#f4a582", label=hi)
+    ax.barh(y, df[lo], height=0.45, color="#b2182b", label=lo)
+    ax.set_yticks(y, labels)
+    ax.invert_yaxis()
+
+    for yi, (p_lo, p_hi, share) in enumerate(zip(df[lo], df[hi], df["over"])):
+        ax.annotate(
+            f"{p_lo:.1f} / {p_hi:.1f}  ·  {share:.0%} > {TMD_THRESHOLD}",
+            (p_hi, yi),
+            ha="left",
+            va="center",
+            xytext=(3, 0),
+            textcoords="offset points",
+            fontsize=9,
+        )
+
+    ax.axvline(TMD_THRESHOLD, color="black", linestyle="--", linewidth=1)
+    ax.set_xlim(0, np.ceil(max_val * 1.25) + 1)
+    ax.set_title(title)
+    ax.set_xlabel(f"Días ({lo} / {hi} · % de ítems sobre el umbral)")
+    ax.legend(loc="lower right")
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_tmd_percentiles(file_path: str, months: list[str] | None = None) -> None:
+    pct = tmd_percentiles(file_path, months)
+    if pct is None:
+        return
+    span = f", {months[0]}–{months[-1]}" if months else ""
+    for nivel, name in (("tribu", "Tribu"), ("squad", "Squad")):
+        if nivel in pct:
+            _plot_tmd_pct(
+                pct[nivel],
+                f"TMD p50/p90 por {name} (umbral {TMD_THRESHOLD} días{span})",
+            )
+
+
+# ───────────── 5 · REGISTRO DE REPORTES Y PLANIFICADOR ─────────────
+# Cada reporte declara su fuente (clave de FILE_KEYWORDS), hojas y columnas, y
+# cómo agrega las filas del CL y cómo las dibuja. El planificador agrupa los
+# pedidos (reporte × líder) por hoja: se lee una sola vez, sólo con las
+# columnas que piden sus reportes y filtrando por la unión de los líderes; luego
+# se reparten las filas de cada líder a cada reporte.
+#
+# Columnas (la primera es la del Chapter Leader):
+#   "LEP_*"  → al menos una columna con ese prefijo
+#   tupla    → basta con una de las alternativas
+_TMD_COLUMNS = (
+    tuple(CL_CANDIDATES),
+    "Tiempo Desarrollo",
+    "Descripción squad",
+    "Descripción tribu",
+)
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    name: str
+    source: str  # clave de FILE_KEYWORDS
+    label: str
+    sheets: tuple[str | None, ...]  # None = primera hoja
+    columns: tuple
+    plot: Callable[..., None]  # reporte completo a partir de la ruta
+    # {hoja: filas del CL} → resultado, y resultado → gráficas.
+    # Sin aggregate el reporte lee por su cuenta (no entra en el plan).
+    aggregate: Callable[[dict], object] | None = None
+    draw: Callable[[object], None] | None = None
+
+
+REPORTS: dict[str, ReportSpec] = {
+    spec.name: spec
+    for spec in (
+        ReportSpec(
+            "calidad",
+            "calidad",
+            "Calidad (pases vs. reversiones por squad)",
+            CALIDAD_SHEETS,
+            ("Chapter leader", "Mes", "Squad"),
+            plot_calidad_pases,
+            _calidad_agg,
+            _draw_calidad,
+        ),
+        ReportSpec(
+            "dedicacion",
+            "dedicacion",
+            "Dedicación por miembro",
+            (None,),
+            ("Nombre CL", "Nombres", "Dedicación"),
+            plot_dedicacion_tm,
+            _dedicacion_agg,
+            _draw_dedicacion,
+        ),
+        ReportSpec(
+            "madurez",
+            "madurez",
+            "Niveles de Madurez LEP",
+            (None,),
+            ("Chapter Leader", "LEP_*", tuple(SQ_CANDIDATES)),
+            plot_niveles_madurez,
+            _madurez_agg,
+            _draw_madurez,
+        ),
+        ReportSpec(
+            "tiempo",
+            "tiempo",
+            "TMD por tribu y por squad",
+            (None,),
+            _TMD_COLUMNS,
+            plot_tiempo_desarrollo,
+            _tmd_agg,
+            _draw_tmd,
+        ),
+        # Parte de los t-digest del sidecar, ya agregados para todos los líderes
+        ReportSpec(
+            "tiempo_p",
+            "tiempo",
+            "TMD p50/p90 por tribu y por squad",
+            (None,),
+            _TMD_COLUMNS,
+            plot_tmd_percentiles,
+        ),
+    )
+}
+
+# Vistas por reporte que usan la caché, la validación y la GUI
+SOURCE_SHEETS = {name: list(spec.sheets) for name, spec in REPORTS.items()}
+REQUIRED_COLUMNS = {name: list(spec.columns) for name, spec in REPORTS.items()}
+CHART_LABELS = {name: spec.label for name, spec in REPORTS.items()}
+
+
+@dataclass
+class SourceScan:
+    """Una lectura compartida: (archivo, hoja) y los reportes que la consumen."""
+
+    path: str
+    sheet: str | None
+    reports: list[str] = field(default_factory=list)
+    columns: list[str] = field(default_factory=list)
+    rows: int = 0  # filas leídas (ya filtradas por los líderes)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        sheet = f" [{self.sheet}]" if self.sheet else ""
+        return (
+            f"{os.path.basename(self.path)}{sheet}: {self.rows} filas × "
+            f"{len(self.columns)} columnas → {', '.join(self.reports)} "
+            f"({self.seconds:.2f} s)"
+        )
+
+
+def _columns_for(names: list[str], reqs) -> list[str]:
+    """Columnas de *names* que cubren *reqs* (todas las LEP_*, todas las alternativas)."""
+    out: list[str] = []
+    for req in reqs:
+        if isinstance(req, tuple):
+            wanted = {normalize_name(r) for r in req}
+            out += [c for c in names if normalize_name(c) in wanted]
+        elif req.endswith("*"):
+            out += [c for c in names if str(c).startswith(req[:-1])]
+        elif req in names:
+            out.append(req)
+    return list(dict.fromkeys(out))
+
+
+def plan_reports(paths: dict[str, str]) -> list[SourceScan]:
+    """Agrupa los reportes de *paths* (reporte → archivo) por hoja a leer.
+
+    Los reportes sin aggregate o con una fuente que no es .xlsx quedan fuera.
+    """
+    scans: dict[tuple[str, str | None], SourceScan] = {}
+    for report, fp in paths.items():
+        spec = REPORTS[report]
+        if spec.aggregate is None or not fp.lower().endswith(".xlsx"):
+            continue
+        for sheet in spec.sheets:
+            key = (os.path.abspath(fp), sheet)
+            scans.setdefault(key, SourceScan(fp, sheet)).reports.append(report)
+    return list(scans.values())
+
+
+def _run_scan(
+    scan: SourceScan, leaders: list[tuple[str, str]], extra: tuple = ()
+) -> dict[tuple[str, str], pd.DataFrame]:
+    """Lee la hoja una vez y devuelve las filas de cada (reporte, líder).
+
+    *extra*: columnas adicionales a conservar (mismo formato que ReportSpec.columns).
+    """
+    t0 = time.perf_counter()
+    warm_cache(scan.path, scan.sheet, CACHE_DIR)
+    cp = _cache_path(scan.path, scan.sheet)
+    schema = pq.read_schema(cp)
+    cl_cols = {
+        r: _match_required(schema.names, REQUIRED_COLUMNS[r][0]) for r in scan.reports
+    }
+    reqs = [req for r in scan.reports for req in REPORTS[r].columns]
+    scan.columns = _columns_for(schema.names, reqs + [*extra])
+
+    # Columna del CL → líder → valores originales que le corresponden
+    wanted: dict[str, dict[str, set[str]]] = {}
+    for col in dict.fromkeys(c for c in cl_cols.values() if c):
+        li = LeaderIndex.from_counts(_leader_index(cp, col)["values"].items())
+        wanted[col] = {}
+        for name, email in leaders:
+            if (norm := _resolve_leader(li, col, name, email)) is not None:
+                wanted[col][name] = li.raw[norm]
+
+    # Una sola lectura: columnas podadas y filas de cualquiera de los líderes
+    filters = [
+        [(col, "in", sorted(set().union(*by_leader.values())))]
+        for col, by_leader in wanted.items()
+        if by_leader
+    ]
+    if filters:
+        df = pq.read_table(cp, columns=scan.columns, filters=filters).to_pandas()
+    else:
+        df = schema.empty_table().select(scan.columns).to_pandas()
+    scan.rows = len(df)
+
+    out: dict[tuple[str, str], pd.DataFrame] = {}
+    for report in scan.reports:
+        col = cl_cols[report]
+        for name, _ in leaders:
+            raw = wanted.get(col, {}).get(name) if col else None
+            out[(report, name)] = df[df[col].isin(raw)].copy() if raw else df.iloc[0:0]
+    scan.seconds = time.perf_counter() - t0
+    return out
+
+
+def aggregate_reports(
+    plan: list[SourceScan], leaders: list[tuple[str, str]]
+) -> dict[tuple[str, str], object]:
+    """Ejecuta *plan* y devuelve el resultado de aggregate por (reporte, líder).
+
+    Un consumidor cuya hoja o agregación falla no aparece en el resultado: el
+    llamador puede volver a intentarlo con ``spec.plot(ruta)``.
+    """
+    frames: dict[tuple[str, str], dict] = {}
+    for scan in plan:
+        try:
+            rows = _run_scan(scan, leaders)
+        except Exception as e:  # p.ej. un Excel antiguo sin esa hoja
+            _warn(f"Lectura compartida de {os.path.basename(scan.path)}: {e}")
+            continue
+        for key, df in rows.items():
+            frames.setdefault(key, {})[scan.sheet] = df
+
+    out: dict[tuple[str, str], object] = {}
+    for (report, leader), fr in frames.items():
+        spec = REPORTS[report]
+        if len(fr) < len(spec.sheets):
+            continue
+        try:
+            out[(report, leader)] = spec.aggregate(fr)  # type: ignore[misc]
+        except Exception as e:
+            _warn(f"{leader} · {report}: {type(e).__name__}: {e}")
+    return out
+
+
+# ───────────── 6 · VALIDACIÓN (sin renderizar) ─────────────
+_XL_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+
+def _xlsx_headers(fp: str) -> dict[str, list[str]]:
+    """Nombres de hoja → cabecera (fila 1), leyendo el zip en streaming.
+
+    Sólo se parsea hasta el final de la primera fila de cada hoja y hasta el
+    último shared string que use la cabecera; no se carga la hoja completa.
+    """
+    with zipfile.ZipFile(fp) as zf:
+        wb = ET.fromstring(zf.read("xl/workbook.xml"))
+        rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        targets = {r.get("Id"): r.get("Target", "") for r in rels}
+
+        raw: dict[str, list[tuple[str | None, str]]] = {}
+        for sh in wb.iter(f"{_XL_NS}sheet"):
+            target = targets.get(sh.get(f"{_REL_NS}id"), "")
+            member = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+            cells: list[tuple[str | None, str]] = []
+            with zf.open(member) as fh:
+                for ev, el in ET.iterparse(fh, events=("end",)):
+                    if el.tag == f"{_XL_NS}c":
+                        v = el.find(f"{_XL_NS}v")
+                        txt = "".join(t.text or "" for t in el.iter(f"{_XL_NS}t"))
+                        cells.append((el.get("t"), v.text if v is not None else txt))
+                    elif el.tag == f"{_XL_NS}row":
+                        break
+            raw[sh.get("name", "")] = cells
+
+        need = {int(v) for cells in raw.values() for t, v in cells if t == "s" and v}
+        shared: dict[int, str] = {}
+        if need and "xl/sharedStrings.xml" in zf.namelist():
+            last, i = max(need), 0
+            with zf.open("xl/sharedStrings.xml") as fh:
+                for ev, el in ET.iterparse(fh, events=("end",)):
+                    if el.tag != f"{_XL_NS}si":
+                        continue
+                    if i in need:
+                        shared[i] = "".join(t.text or "" for t in el.iter(f"{_XL_NS}t"))
+                    el.clear()
+                    if i == last:
+                        break
+                    i += 1
+
+    return {
+        name: [shared.get(int(v), "") if t == "s" and v else str(v) for t, v in cells]
+        for name, cells in raw.items()
+    }
+
+
+def _source_headers(fp: str, sheets: list[str | None]) -> dict[str | None, list[str]]:
+    """Cabeceras de *sheets*; usa el esquema Parquet de la caché si existe."""
+    out: dict[str | None, list[str]] = {}
+    for sheet in sheets:
+        if is_cached(fp, sheet):
+            out[sheet] = pq.read_schema(_cache_path(fp, sheet)).names
+    if len(out) < len(sheets) and fp.lower().endswith(".xlsx"):
+        for i, (name, cols) in enumerate(_xlsx_headers(fp).items()):
+            out.setdefault(name, cols)
+            if i == 0:
+                out.setdefault(None, cols)  # hoja por defecto de read_excel
+    return out
+
+
+def _match_required(columns: list[str], req) -> str | None:
+    if isinstance(req, tuple):
+        wanted = {normalize_name(r) for r in req}
+        return next((c for c in columns if normalize_name(c) in wanted), None)
+    if req.endswith("*"):
+        return next((c for c in columns if str(c).startswith(req[:-1])), None)
+    return req if req in columns else None
+
+
+def _leader_index(cache_path: str, col: str) -> dict:
+    """Valores distintos de la columna *col* con su número de filas.
+
+    Se guarda junto al Parquet (<cache>.leaders.json) y se invalida con su mtime;
+    sólo lee esa columna del Parquet.
+    """
+    idx_path = f"{cache_path}.leaders.json"
+    stamp = os.stat(cache_path).st_mtime_ns
+    if os.path.isfile(idx_path):
+        with open(idx_path, encoding="utf-8") as fh:
+            idx = json.load(fh)
+        if idx.get("stamp") == stamp and idx.get("column") == col and "values" in idx:
+            return idx
+    if (idx := _memo_sidecar(idx_path, (stamp, col))) is not None:
+        return idx
+
+    counts: pd.Series = pd.Series(dtype="int64")
+    rows = 0
+    for batch in pq.ParquetFile(cache_path).iter_batches(CHUNK_ROWS, columns=[col]):
+        s = batch.column(0).to_pandas()
+        rows += len(s)
+        counts = counts.add(s.dropna().value_counts(), fill_value=0)
+    idx = {
+        "stamp": stamp,
+        "column": col,
+        "rows": rows,
+        "values": {str(k): int(v) for k, v in counts.items()},
+    }
+    def write(tmp: str) -> None:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(idx, fh, ensure_ascii=False)
+
+    _save_sidecar(idx_path, (stamp, col), idx, write)
+    return idx
+
+
+def _leader_rows(idx: dict) -> int:
+    """Filas que devolvería _filter_by_chapter_leader según el índice."""
+    li = LeaderIndex.from_counts(idx["values"].items())
+    norm = li.resolve(CHAPTER_LEADER, CHAPTER_LEADER_EMAIL)
+    return li.count[norm] if norm else 0
+
+
+_LEADER_INDEX_MEMO: dict[tuple, LeaderIndex] = {}
+
+
+def leader_index(files_dir: str | None = None) -> LeaderIndex:
+    """Índice combinado de todas las fuentes ya cacheadas en *files_dir*.
+
+    No convierte ningún Excel: las fuentes sin caché no aportan nombres.
+    """
+    files_dir = files_dir or FILES_DIR
+    cache_dir = os.path.join(files_dir, CACHE_SUBDIR)
+    found: list[tuple[str, str]] = []
+    for task, keyword in FILE_KEYWORDS.items():
+        fp = _find_file_by_keyword(keyword, files_dir, quiet=True)
+        for sheet in SOURCE_SHEETS[task] if fp else []:
+            cp = _cache_path(fp, sheet, cache_dir)
+            if not is_cached(fp, sheet, cache_dir):
+                continue
+            col = _match_required(pq.read_schema(cp).names, REQUIRED_COLUMNS[task][0])
+            if col:
+                found.append((cp, col))
+
+    key = tuple((cp, col, os.stat(cp).st_mtime_ns) for cp, col in found)
+    if key not in _LEADER_INDEX_MEMO:
+        combined = LeaderIndex()
+        for cp, col in found:
+            combined.merge(
+                LeaderIndex.from_counts(_leader_index(cp, col)["values"].items())
+            )
+        _LEADER_INDEX_MEMO.clear()
+        _LEADER_INDEX_MEMO[key] = combined
+    return _LEADER_INDEX_MEMO[key]
+
+
+@dataclass
+class SourceCheck:
+    task: str
+    path: str | None
+    missing: list[str] = field(default_factory=list)
+    rows: int | None = None  # filas del Chapter Leader (None = sin caché)
+
+    @property
+    def ok(self) -> bool:
+        return self.path is not None and not self.missing and self.rows != 0
+
+    def summary(self) -> str:
+        label = CHART_LABELS[self.task]
+        if self.path is None:
+            return f"{label}: sin archivo → gráfica vacía"
+        if self.missing:
+            return f"{label}: faltan columnas {', '.join(self.missing)} → gráfica vacía"
+        if self.rows == 0:
+            return f"{label}: 0 filas para {CHAPTER_LEADER} → gráfica vacía"
+        if self.rows is None:
+            return f"{label}: columnas OK (sin caché: filas del CL no contadas)"
+        return f"{label}: OK ({self.rows} filas del CL)"
+
+
+def check_source(task: str, fp: str | None) -> SourceCheck:
+    """Valida una fuente leyendo sólo cabeceras (y el índice de líderes en caché)."""
+    res = SourceCheck(task, fp)
+    if fp is None:
+        return res
+    if not os.path.isfile(fp):
+        res.path = None
+        return res
+
+    headers = _source_headers(fp, SOURCE_SHEETS[task])
+    rows: int | None = 0
+    for sheet in SOURCE_SHEETS[task]:
+        cols = headers.get(sheet)
+        if cols is None:
+            res.missing.append(f"hoja «{sheet}»")
+            continue
+        hits = [_match_required(cols, req) for req in REQUIRED_COLUMNS[task]]
+        for req, hit in zip(REQUIRED_COLUMNS[task], hits):
+            if hit is None:
+                name = " | ".join(req) if isinstance(req, tuple) else req
+                res.missing.append(f"«{name}»")
+        cp = _cache_path(fp, sheet)
+        if hits[0] is None or rows is None:
+            continue
+        if is_cached(fp, sheet):
+            rows += _leader_rows(_leader_index(cp, hits[0]))
+        else:
+            rows = None
+    res.rows = rows if not res.missing else None
+    return res
+
+
+def check_sources(paths: dict[str, str | None]) -> list[SourceCheck]:
+    return [check_source(task, fp) for task, fp in paths.items()]
+
+
+# ───────────── 7 · SIN PANTALLA (--out) ─────────────
+# Las hojas se leen una sola vez para todos los líderes (plan_reports) y cada
+# (líder, reporte) se dibuja con Agg en un proceso del pool a partir de sus
+# datos ya agregados; cada gráfica se escribe de forma atómica como
+# <líder>__<reporte>__NN.<formato>.
+HEADLESS_FORMATS = ("png", "svg")
+HEADLESS_DPI = 150
+# Cada proceso carga pandas/matplotlib y sus propios DataFrames: más allá de
+# unos pocos el render queda limitado por memoria y disco, no por CPU
+HEADLESS_JOBS = min(4, os.cpu_count() or 1)
+
+
+@dataclass
+class ChartJob:
+    leader: str
+    email: str
+    report: str
+    path: str
+    files_dir: str
+    out_dir: str
+    fmt: str = "png"
+    months: list[str] | None = None
+    planned: bool = False  # True: dibujar *data* en vez de leer *path*
+    data: object = None
+    charts: list[tuple[str, float]] = field(default_factory=list)
+    error: str | None = None
+    seconds: float = 0.0
+
+    @property
+    def prefix(self) -> str:
+        return f"{_slugify(self.leader)}__{self.report}__"
+
+
+def _save_figure(fig, dest: str, fmt: str) -> None:
+    # Sin fecha ni versión en los metadatos: mismo dato → mismo archivo
+    meta = {"Date": None} if fmt == "svg" else {"Software": None}
+    with plt.rc_context({"svg.hashsalt": "graphs"}), _atomic_target(dest) as tmp:
+        fig.savefig(tmp, format=fmt, dpi=HEADLESS_DPI, metadata=meta)
+
+
+def render_job(job: ChartJob) -> ChartJob:
+    """Ejecuta un reporte guardando cada plt.show() en job.out_dir."""
+    plt.switch_backend("Agg")
+    spec = REPORTS[job.report]
+    t0 = last = time.perf_counter()
+    orig = plt.show
+
+    def _save(*_a, **_k):
+        nonlocal last
+        fig = plt.gcf()
+        name = f"{job.prefix}{len(job.charts) + 1:02d}.{job.fmt}"
+        _save_figure(fig, os.path.join(job.out_dir, name), job.fmt)
+        plt.close(fig)
+        now = time.perf_counter()
+        job.charts.append((name, now - last))
+        last = now
+
+    plt.show = _save
+    try:
+        # Con --jobs 1 corre en el proceso principal: al terminar se restauran
+        # el líder y la carpeta de datos de quien llamó
+        with configured(job.leader, job.email, job.files_dir):
+            if job.planned:
+                spec.draw(job.data)  # type: ignore[misc]
+            elif job.report == "tiempo_p":
+                spec.plot(job.path, job.months)
+            else:
+                spec.plot(job.path)
+    except Exception as e:  # un reporte roto no detiene al resto
+        job.error = f"{type(e).__name__}: {e}"
+    finally:
+        plt.show = orig
+        plt.close("all")
+    job.seconds = time.perf_counter() - t0
+
+    if job.error is None:
+        # Gráficas de una corrida anterior que ya no existen (p.ej. squads menos)
+        keep = {name for name, _ in job.charts}
+        for old in os.listdir(job.out_dir):
+            if old.startswith(job.prefix) and old.endswith(f".{job.fmt}") and old not in keep:
+                os.remove(os.path.join(job.out_dir, old))
+    return job
+
+
+def _parse_leader(txt: str) -> tuple[str, str]:
+    """"Nombre <correo>" → (nombre, correo); el correo es opcional."""
+    m = _EMAIL_RE.search(txt)
+    email = m.group(0) if m else ""
+    name = re.sub(r"<[^>]*>|\(.*?\)", "", txt.replace(email, "")).strip()
+    return name, email
+
+
+def run_headless(
+    paths: dict[str, str],
+    leaders: list[tuple[str, str]],
+    out_dir: str,
+    fmt: str = "png",
+    jobs: int = 1,
+    months: list[str] | None = None,
+) -> list[ChartJob]:
+    """Renderiza *paths* (reporte → archivo) para cada líder en *jobs* procesos."""
+    os.makedirs(out_dir, exist_ok=True)
+    t0 = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        if pool:
+            # Primero la caché: que dos procesos no conviertan el mismo Excel
+            sheets = {
+                (fp, sheet)
+                for report, fp in paths.items()
+                for sheet in SOURCE_SHEETS.get(report, [None])
+                if not is_cached(fp, sheet)
+            }
+            for fut in as_completed(
+                pool.submit(warm_cache, fp, sheet, CACHE_DIR) for fp, sheet in sheets
+            ):
+                fut.result()
+
+        plan = plan_reports(paths)
+        shared = aggregate_reports(plan, leaders)
+        for scan in plan:
+            print(f"   lectura compartida · {scan.summary()}")
+        work = [
+            ChartJob(name, email, report, fp, FILES_DIR, out_dir, fmt, months)
+            for name, email in leaders
+            for report, fp in paths.items()
+        ]
+        for j in work:
+            if (j.report, j.leader) in shared:
+                j.planned, j.data = True, shared[(j.report, j.leader)]
+
+        done = list(pool.map(render_job, work)) if pool else [render_job(j) for j in work]
+    finally:
+        if pool:
+            pool.shutdown()
+
+    total = time.perf_counter() - t0
+    n = sum(len(j.charts) for j in done)
+    print(f"✅ {n} gráficas en {out_dir} ({jobs} proceso(s), {total:.1f} s)")
+    for j in done:
+        if j.error:
+            _warn(f"{j.leader} · {j.report}: {j.error}")
+            continue
+        if not j.charts:
+            _warn(f"{j.leader} · {j.report}: sin gráficas")
+        for name, secs in j.charts:
+            print(f"   {secs:6.2f} s  {name}")
+    return done
+
+
 # ───────────── CLI (opcional) ─────────────
 def parse_args():
     p = argparse.ArgumentParser(description="Gráficos filtrados por Chapter Leader")
@@ -450,18 +2171,68 @@ def parse_args():
         default=None,
         help="Generar gráfico de tiempo. Si no se especifica archivo, se busca automáticamente.",
     )
+    p.add_argument(
+        "--tmd-p",
+        nargs="?",
+        const=True,
+        default=None,
+        help="Generar percentiles p50/p90 de tiempo. Si no se especifica archivo, se busca automáticamente.",
+    )
+    p.add_argument(
+        "--meses",
+        type=month_range,
+        default=None,
+        help='Meses para --tmd-p, p.ej. "Ene-Mar" o "Ene,Abr" (por defecto todos).',
+    )
+    p.add_argument(
+        "--check",
+        action="store_true",
+        help="Sólo validar las fuentes (hojas, columnas y filas del CL) sin graficar.",
+    )
+    p.add_argument(
+        "--out",
+        default=None,
+        help="Modo sin pantalla: guardar las gráficas en esta carpeta en vez de mostrarlas.",
+    )
+    p.add_argument(
+        "--format", choices=HEADLESS_FORMATS, default="png", help="Formato con --out."
+    )
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=HEADLESS_JOBS,
+        help=f"Procesos en paralelo con --out (por defecto {HEADLESS_JOBS}).",
+    )
+    p.add_argument(
+        "--leader",
+        action="append",
+        default=None,
+        help='Chapter Leader para --out ("Nombre" o "Nombre <correo>"); repetible.',
+    )
+    p.add_argument(
+        "--profile",
+        nargs="?",
+        const="both",
+        choices=profiling.PROFILE_MODES,
+        default=None,
+        help="Perfilar la corrida (cprofile, sample o both) y guardar en profiles/.",
+    )
     return p.parse_args()
 
 
 def main() -> None:
-    global DATA_DIR, FILES_DIR, CACHE_DIR
-
     a = parse_args()
+    with profiling.profiled("graphs", a.profile) if a.profile else nullcontext():
+        _run(a)
+
+
+def _run(a: argparse.Namespace) -> None:
     if a.root:
-        DATA_DIR = a.root
-        FILES_DIR = DATA_DIR
-        CACHE_DIR = os.path.join(FILES_DIR, CACHE_SUBDIR)
+        set_data_dir(a.root)
     os.makedirs(CACHE_DIR, exist_ok=True)
+    if not a.out:
+        email = CHAPTER_LEADER_EMAIL
+        set_chapter_leader(confirm_leader(CHAPTER_LEADER, email), email)
 
     tasks = [
         ("calidad", a.rev, plot_calidad_pases),
@@ -469,10 +2240,52 @@ def main() -> None:
         ("madurez", a.m, plot_niveles_madurez),
         ("tiempo", a.tmd, plot_tiempo_desarrollo),
     ]
+    # Opcionales: sólo se ejecutan si se piden
+    extra = [
+        ("tiempo", a.tmd_p, lambda fp: plot_tmd_percentiles(fp, a.meses)),
+    ]
+
+    if a.check:
+        selected = [t for t in tasks if t[1] is not None] or tasks
+        paths = {
+            task_key: _resolve_path(arg if isinstance(arg, str) else None, task_key)
+            for task_key, arg, _ in selected
+        }
+        for res in check_sources(paths):
+            print(f"{'✅' if res.ok else '⚠️ '} {res.summary()}")
+        return
+
+    if a.out:
+        wanted = {
+            "calidad": a.rev,
+            "dedicacion": a.dr,
+            "madurez": a.m,
+            "tiempo": a.tmd,
+            "tiempo_p": a.tmd_p,
+        }
+        chosen = {r: arg for r, arg in wanted.items() if arg is not None} or {
+            task_key: True for task_key, _, _ in tasks
+        }
+        paths = {}
+        for report, arg in chosen.items():
+            task_key = "tiempo" if report == "tiempo_p" else report
+            path = _resolve_path(arg if isinstance(arg, str) else None, task_key)
+            if path and os.path.isfile(path):
+                paths[report] = path
+            else:
+                _warn(f"No se encontró archivo para {report}")
+        leaders = [_parse_leader(x) for x in a.leader] if a.leader else [
+            (CHAPTER_LEADER, CHAPTER_LEADER_EMAIL)
+        ]
+        leaders = [(confirm_leader(name, email), email) for name, email in leaders]
+        done = run_headless(paths, leaders, a.out, a.format, a.jobs, a.meses)
+        if not paths or any(j.error for j in done):
+            raise SystemExit(1)
+        return
 
     any_run = False
 
-    for task_key, arg, fn in tasks:
+    for task_key, arg, fn in tasks + extra:
         if arg is not None:
             if arg is True:
                 # Buscar automáticamente el archivo
@@ -0,0 +1,750 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+jobs.py – Cola local de generaciones de presentación.
+
+• Tabla persistente de trabajos en SQLite (chapter_jobs.sqlite junto a la
+  configuración): sobrevive a cierres de la GUI y la comparten varios procesos.
+• Deduplicación: la clave de un trabajo es líder + carpeta + huella de los
+  Excel de origen + opciones. Un trabajo igual en cola o en curso no se repite
+  y uno ya terminado cuyo .pptx sigue en disco se reutiliza tal cual.
+• Prioridades: lo que pide el usuario pasa delante de lo programado.
+• Pool de JOB_WORKERS procesos; los errores de E/S transitorios (archivo
+  abierto en Excel, red) se reintentan con espera exponencial.
+• Programación estilo cron (NIGHTLY_CRON) que de madrugada encola la
+  presentación de cada perfil: por la mañana «Generar» ya está hecho.
+
+Uso:
+    python jobs.py serve                        # pool + programación nocturna
+    python jobs.py enqueue --cl "Nombre" --email correo@bcp.com.pe --root ./files
+    python jobs.py nightly                      # encola ya todos los perfiles
+    python jobs.py list
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import errno
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Callable, Iterator
+
+import graphs
+import profiling
+
+# ───────────── CONFIG ─────────────
+BASE_DIR = Path(
+    Path(sys.executable).resolve().parent
+    if getattr(sys, "frozen", False)
+    else Path(__file__).resolve().parent
+)
+DB_FILE = "chapter_jobs.sqlite"
+CONFIG_FILE = "chapter_config.json"  # perfiles de la GUI (para la programación)
+JOB_WORKERS = 1  # presentaciones en paralelo (cada una usa además INGEST_WORKERS)
+MAX_ATTEMPTS = 3
+RETRY_BASE = 5.0  # segundos; se duplica en cada reintento
+POLL_SECONDS = 1.0
+STALE_SECONDS = 120.0  # «running» sin latido: su proceso murió y se reencola
+NIGHTLY_CRON = "30 2 * * *"  # minuto hora día mes día-semana (0 = domingo)
+CATCH_UP_HOURS = 6  # disparo perdido (equipo apagado) que aún se recupera
+KEEP_DAYS = 30  # historial de trabajos terminados
+PRIORITY_NIGHTLY, PRIORITY_INTERACTIVE = 0, 10
+OUTPUT_NAME = "%Y-%m-%d_{slug}_Presentation.pptx"
+WARN_PREFIX = "⚠️ "  # notas que la GUI muestra como aviso
+
+# Errores de E/S que no merecen reintento: el archivo no va a aparecer solo
+PERMANENT_OS_ERRORS = (FileNotFoundError, IsADirectoryError, NotADirectoryError)
+TRANSIENT_ERRNOS = {errno.EACCES, errno.EAGAIN, errno.EBUSY, errno.ETIMEDOUT}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    leader TEXT NOT NULL,
+    email TEXT NOT NULL,
+    data_dir TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    origin TEXT NOT NULL DEFAULT '',
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    not_before REAL NOT NULL DEFAULT 0,
+    started REAL,
+    finished REAL,
+    heartbeat REAL,
+    owner TEXT NOT NULL DEFAULT '',
+    output TEXT NOT NULL DEFAULT '',
+    message TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT ''
+);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_key
+    ON jobs(key) WHERE state IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs(state, priority DESC, id);
+CREATE TABLE IF NOT EXISTS schedule (name TEXT PRIMARY KEY, last_fire REAL NOT NULL);
+"""
+
+STATE_LABELS = {
+    "queued": "en cola",
+    "running": "en curso",
+    "done": "listo",
+    "failed": "con error",
+}
+
+
+# ───────────── TRABAJOS ─────────────
+@dataclass
+class Job:
+    id: int
+    key: str
+    leader: str
+    email: str
+    data_dir: str
+    options: dict = field(default_factory=dict)
+    origin: str = ""
+    priority: int = 0
+    state: str = "queued"
+    attempts: int = 0
+    created: float = 0.0
+    not_before: float = 0.0
+    started: float | None = None
+    finished: float | None = None
+    heartbeat: float | None = None
+    owner: str = ""
+    output: str = ""
+    message: str = ""
+    notes: str = ""
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> Job:
+        d = {f.name: row[f.name] for f in fields(cls)}
+        d["options"] = json.loads(d["options"])
+        return cls(**d)
+
+    @property
+    def finished_ok(self) -> bool:
+        return self.state == "done" and os.path.isfile(self.output)
+
+    def summary(self) -> str:
+        s = f"#{self.id} {self.leader}: {STATE_LABELS.get(self.state, self.state)}"
+        if self.state == "queued" and self.attempts:
+            wait_s = max(self.not_before - time.time(), 0)
+            s += f" (reintento {self.attempts + 1}/{MAX_ATTEMPTS} en {wait_s:.0f} s)"
+        if self.message:
+            s += f" · {self.message}"
+        return s
+
+
+def source_fingerprint(data_dir: str) -> list:
+    """Excel que puede leer una presentación de *data_dir*, con su huella."""
+    out = []
+    for kind, keyword in sorted(graphs.FILE_KEYWORDS.items()):
+        for f in graphs.find_files(keyword, data_dir):
+            try:
+                stamp = graphs._source_stamp(f.path).decode()
+            except OSError:  # borrado entre el listado y el stat
+                continue
+            out.append([kind, os.path.relpath(f.path, data_dir), stamp])
+    return out
+
+
+def _template_stamp(path: str) -> list | None:
+    try:
+        st = os.stat(path)
+    except OSError:  # sin plantilla el trabajo fallará igual
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def job_key(leader: str, email: str, data_dir: str, options: dict) -> str:
+    import generate_presentation
+
+    key = [
+        graphs.normalize_name(leader),
+        email.strip().lower(),
+        os.path.abspath(data_dir),
+        source_fingerprint(data_dir),
+        sorted(options.items()),
+        # Lo que cambia el dibujo sin tocar los Excel: otra versión del deck,
+        # otro umbral de TMD u otra plantilla no reutilizan el .pptx anterior
+        generate_presentation.DECK_VERSION,
+        graphs.TMD_THRESHOLD,
+        graphs.CL_NORM,
+        _template_stamp(generate_presentation.TEMPLATE_PATH),
+    ]
+    return hashlib.sha1(json.dumps(key, ensure_ascii=False).encode()).hexdigest()
+
+
+def is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, PERMANENT_OS_ERRORS):
+        return False
+    if isinstance(exc, (PermissionError, TimeoutError, ConnectionError)):
+        return True
+    # Windows: violación de uso compartido (Excel o el antivirus tienen el archivo)
+    if getattr(exc, "winerror", None) in (32, 33):
+        return True
+    return isinstance(exc, OSError) and exc.errno in TRANSIENT_ERRNOS
+
+
+# ───────────── TABLA PERSISTENTE ─────────────
+class JobStore:
+    """Trabajos en SQLite; cada operación abre su conexión (vale entre hilos)."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = str(path)
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        if not self._ready:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            self._ready = True
+        return db
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        """Transacción de escritura (BEGIN IMMEDIATE: un escritor a la vez)."""
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        db = self._connect()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def _get(self, db: sqlite3.Connection, job_id: int) -> Job:
+        row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row)
+
+    def get(self, job_id: int) -> Job:
+        with self._read() as db:
+            return self._get(db, job_id)
+
+    def enqueue(
+        self,
+        leader: str,
+        email: str,
+        data_dir: str,
+        options: dict | None = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        origin: str = "",
+    ) -> tuple[Job, bool]:
+        """(trabajo, nuevo). Si ya hay uno igual se devuelve ése.
+
+        Uno en cola hereda la prioridad más alta; uno terminado se reutiliza si
+        su .pptx sigue en disco (salvo al perfilar: hay que volver a medir).
+        """
+        options = options or {}
+        key = job_key(leader, email, data_dir, options)
+        with self._tx() as db:
+            row = db.execute(
+                "SELECT * FROM jobs WHERE key = ? AND state IN ('queued', 'running')",
+                (key,),
+            ).fetchone()
+            if row:
+                if row["state"] == "queued" and priority > row["priority"]:
+                    db.execute(
+                        "UPDATE jobs SET priority = ? WHERE id = ?",
+                        (priority, row["id"]),
+                    )
+                return self._get(db, row["id"]), False
+            if not options.get("profile"):
+                row = db.execute(
+                    "SELECT * FROM jobs WHERE key = ? AND state = 'done' "
+                    "ORDER BY id DESC LIMIT 1",
+                    (key,),
+                ).fetchone()
+                if row and (job := Job.from_row(row)).finished_ok:
+                    return job, False
+            cur = db.execute(
+                "INSERT INTO jobs (key, leader, email, data_dir, options, origin, "
+                "priority, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    leader,
+                    email,
+                    os.path.abspath(data_dir),
+                    json.dumps(options),
+                    origin,
+                    priority,
+                    time.time(),
+                ),
+            )
+            return self._get(db, cur.lastrowid), True
+
+    def claim(self, owner: str) -> tuple[Job | None, list[Job]]:
+        """(siguiente trabajo marcado «running», trabajos huérfanos recuperados)."""
+        now = time.time()
+        with self._tx() as db:
+            stale = [
+                Job.from_row(r)
+                for r in db.execute(
+                    "SELECT * FROM jobs WHERE state = 'running' AND heartbeat < ?",
+                    (now - STALE_SECONDS,),
+                )
+            ]
+            for job in stale:  # el proceso que los corría murió
+                gave_up = job.attempts >= MAX_ATTEMPTS
+                db.execute(
+                    "UPDATE jobs SET state = ?, not_before = 0, message = ?, "
+                    "finished = ? WHERE id = ?",
+                    (
+                        "failed" if gave_up else "queued",
+                        "proceso interrumpido",
+                        now if gave_up else None,
+                        job.id,
+                    ),
+                )
+            stale = [self._get(db, j.id) for j in stale]
+            row = db.execute(
+                "SELECT id FROM jobs WHERE state = 'queued' AND not_before <= ? "
+                "ORDER BY priority DESC, id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None, stale
+            db.execute(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, "
+                "started = ?, heartbeat = ?, owner = ?, message = '' WHERE id = ?",
+                (now, now, owner, row["id"]),
+            )
+            return self._get(db, row["id"]), stale
+
+    def heartbeat(self, ids: list[int]) -> None:
+        if not ids:
+            return
+        with self._tx() as db:
+            db.execute(
+                f"UPDATE jobs SET heartbeat = ? WHERE state = 'running' "
+                f"AND id IN ({','.join('?' * len(ids))})",
+                (time.time(), *ids),
+            )
+
+    def finish(self, job_id: int, result: dict) -> Job:
+        """Anota el resultado de run_job: listo, reintento o error definitivo."""
+        now = time.time()
+        with self._tx() as db:
+            job = self._get(db, job_id)
+            notes = "\n".join(result.get("notes", []))
+            if result["ok"]:
+                db.execute(
+                    "UPDATE jobs SET state = 'done', finished = ?, output = ?, "
+                    "message = ?, notes = ? WHERE id = ?",
+                    (now, result["output"], result["message"], notes, job_id),
+                )
+            elif result.get("transient") and job.attempts < MAX_ATTEMPTS:
+                retry_at = now + RETRY_BASE * 2 ** (job.attempts - 1)
+                db.execute(
+                    "UPDATE jobs SET state = 'queued', not_before = ?, message = ? "
+                    "WHERE id = ?",
+                    (retry_at, result["message"], job_id),
+                )
+            else:
+                db.execute(
+                    "UPDATE jobs SET state = 'failed', finished = ?, message = ?, "
+                    "notes = ? WHERE id = ?",
+                    (now, result["message"], notes, job_id),
+                )
+            return self._get(db, job_id)
+
+    def release(self, ids: list[int]) -> None:
+        """Devuelve a la cola trabajos interrumpidos a propósito (cierre)."""
+        with self._tx() as db:
+            for job_id in ids:
+                db.execute(
+                    "UPDATE jobs SET state = 'queued', not_before = 0, "
+                    "attempts = MAX(attempts - 1, 0) WHERE id = ? AND state = 'running'",
+                    (job_id,),
+                )
+
+    def counts(self) -> dict[str, int]:
+        with self._read() as db:
+            rows = db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+            return {state: n for state, n in rows}
+
+    def recent(self, limit: int = 20) -> list[Job]:
+        with self._read() as db:
+            rows = db.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+            return [Job.from_row(r) for r in rows]
+
+    def prune(self, days: float = KEEP_DAYS) -> int:
+        with self._tx() as db:
+            return db.execute(
+                "DELETE FROM jobs WHERE state IN ('done', 'failed') AND finished < ?",
+                (time.time() - days * 86400,),
+            ).rowcount
+
+    def fire_due(self, name: str, fire: float) -> bool:
+        """True (una sola vez por disparo, entre procesos) si *fire* es nuevo.
+
+        La primera vez sólo se anota: instalar la programación a media mañana no
+        dispara la de esa madrugada.
+        """
+        with self._tx() as db:
+            row = db.execute(
+                "SELECT last_fire FROM schedule WHERE name = ?", (name,)
+            ).fetchone()
+            db.execute(
+                "INSERT INTO schedule (name, last_fire) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET last_fire = MAX(last_fire, ?)",
+                (name, fire, fire),
+            )
+            return row is not None and fire > row["last_fire"]
+
+
+# ───────────── PROGRAMACIÓN (cron) ─────────────
+def _cron_field(spec: str, lo: int, hi: int) -> frozenset[int]:
+    """«*», «5», «1-5», «*/15», «0,30» → valores permitidos."""
+    out: set[int] = set()
+    for part in spec.split(","):
+        rng, _, step = part.partition("/")
+        if rng == "*":
+            a, b = lo, hi
+        elif "-" in rng:
+            a, b = map(int, rng.split("-"))
+        else:
+            a = int(rng)
+            b = hi if step else a
+        if not lo <= a <= b <= hi:
+            raise ValueError(f"Campo cron fuera de rango: {part!r} ({lo}-{hi})")
+        out.update(range(a, b + 1, int(step or 1)))
+    return frozenset(out)
+
+
+@dataclass(frozen=True)
+class Cron:
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]  # 0 = domingo
+
+    @classmethod
+    def parse(cls, spec: str) -> Cron:
+        parts = spec.split()
+        if len(parts) != 5:
+            raise ValueError(f"Se esperaban 5 campos cron: {spec!r}")
+        m, h, d, mo, wd = parts
+        weekdays = {w % 7 for w in _cron_field(wd, 0, 7)}  # 7 también es domingo
+        return cls(
+            _cron_field(m, 0, 59),
+            _cron_field(h, 0, 23),
+            _cron_field(d, 1, 31),
+            _cron_field(mo, 1, 12),
+            frozenset(weekdays),
+        )
+
+    def _day_ok(self, d: dt.date) -> bool:
+        return (
+            d.day in self.days
+            and d.month in self.months
+            and (d.weekday() + 1) % 7 in self.weekdays
+        )
+
+    def last_fire(self, now: dt.datetime) -> dt.datetime | None:
+        """Último instante programado ≤ *now* (en el último año)."""
+        now = now.replace(second=0, microsecond=0)
+        for back in range(367):
+            d = now.date() - dt.timedelta(days=back)
+            if not self._day_ok(d):
+                continue
+            for h in sorted(self.hours, reverse=True):
+                for m in sorted(self.minutes, reverse=True):
+                    if (fire := dt.datetime.combine(d, dt.time(h, m))) <= now:
+                        return fire
+        return None
+
+    def next_fire(self, now: dt.datetime) -> dt.datetime | None:
+        start = now.replace(second=0, microsecond=0) + dt.timedelta(minutes=1)
+        for ahead in range(367):
+            d = start.date() + dt.timedelta(days=ahead)
+            if not self._day_ok(d):
+                continue
+            for h in sorted(self.hours):
+                for m in sorted(self.minutes):
+                    if (fire := dt.datetime.combine(d, dt.time(h, m))) >= start:
+                        return fire
+        return None
+
+
+def nightly_targets(config_path: str | Path) -> list[tuple[str, str, str]]:
+    """(nombre, correo, carpeta) de cada perfil guardado por la GUI."""
+    try:
+        cfg = json.loads(Path(config_path).read_text("utf-8"))
+    except (OSError, ValueError):
+        return []
+    data_dir = cfg.get("data_dir") or graphs.DATA_DIR
+    return [(p["name"], p["email"], data_dir) for p in cfg.get("profiles", [])]
+
+
+def enqueue_nightly(store: JobStore, config_path: str | Path) -> list[Job]:
+    out = []
+    for name, email, data_dir in nightly_targets(config_path):
+        if not os.path.isdir(data_dir):
+            graphs._warn(f"Programación: no existe la carpeta {data_dir} ({name})")
+            continue
+        job, _ = store.enqueue(name, email, data_dir, {}, PRIORITY_NIGHTLY, "nightly")
+        out.append(job)
+    return out
+
+
+# ───────────── EJECUCIÓN (procesos del pool) ─────────────
+def job_output(job: Job) -> str:
+    """.pptx propio de cada trabajo: dos líderes en paralelo no se pisan."""
+    import generate_presentation
+
+    slug = "_".join(graphs.normalize_name(job.leader).split()) or f"job{job.id}"
+    name = dt.datetime.today().strftime(OUTPUT_NAME.format(slug=slug))
+    return os.path.join(generate_presentation.OUT_DIR, name)
+
+
+def run_job(job: Job) -> dict:
+    """Genera la presentación de *job* en el proceso actual (hijo del pool)."""
+    import generate_presentation  # pesado: sólo en los procesos que generan
+    import mpl_setup
+
+    # Los avisos de graphs se quedarían en la consola del hijo: viajan en notes
+    warned: list[str] = []
+    prev_warn = graphs._warn
+
+    def collect(msg: str) -> None:
+        warned.append(msg)
+        prev_warn(msg)
+
+    graphs._warn = collect
+    t0 = time.perf_counter()
+    try:
+        graphs.set_chapter_leader(job.leader, job.email)
+        graphs.set_data_dir(job.data_dir)
+        opts = job.options
+        ctx = (
+            profiling.profiled("presentation", opts["profile"], opts.get("profile_dir"))
+            if opts.get("profile")
+            else nullcontext()
+        )
+        with ctx:
+            out = generate_presentation.build_presentation(
+                stream=opts.get("stream"), out_path=job_output(job)
+            )
+        notes = [f"{WARN_PREFIX}{m}" for m in warned]
+        notes.append(graphs.FRAMES.summary())
+        if (rec := mpl_setup.first_chart) and not rec.get("registrado"):
+            notes.append(mpl_setup.describe(rec))
+            rec["registrado"] = True
+        secs = time.perf_counter() - t0
+        return {
+            "ok": True,
+            "output": out,
+            "message": f"generada en {secs:.1f} s",
+            "notes": notes,
+        }
+    except Exception as exc:
+        return {
+            "ok": False,
+            "message": f"{type(exc).__name__}: {exc}",
+            "transient": is_transient(exc),
+            "notes": [f"{WARN_PREFIX}{m}" for m in warned],
+        }
+    finally:
+        graphs._warn = prev_warn
+
+
+def _failed(exc: BaseException, transient: bool = False) -> dict:
+    """Resultado de un trabajo que no llegó a terminar en el proceso hijo."""
+    msg = f"{type(exc).__name__}: {exc}"
+    return {"ok": False, "message": msg, "transient": transient}
+
+
+class JobRunner:
+    """Hilo que reparte la cola entre un pool de procesos.
+
+    *on_change(job)* se llama (desde ese hilo) en cada cambio de estado.
+    Con *config_path* también dispara la programación NIGHTLY_CRON.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = JOB_WORKERS,
+        on_change: Callable[[Job], None] | None = None,
+        config_path: str | Path | None = None,
+        cron: str = NIGHTLY_CRON,
+    ) -> None:
+        self.store = store
+        self.workers = max(workers, 1)
+        self.on_change = on_change or (lambda job: None)
+        self.config_path = config_path
+        self.cron = Cron.parse(cron)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="jobs", daemon=True)
+        self._next_tick = 0.0
+
+    def start(self) -> JobRunner:
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+
+    def submit(self, *args, **kwargs) -> tuple[Job, bool]:
+        """JobStore.enqueue y despierta al despachador."""
+        job, new = self.store.enqueue(*args, **kwargs)
+        if new:
+            self._wake.set()
+            self.on_change(job)
+        return job, new
+
+    def next_nightly(self) -> dt.datetime | None:
+        return self.cron.next_fire(dt.datetime.now()) if self.config_path else None
+
+    def _tick_schedule(self) -> None:
+        if self.config_path is None or time.monotonic() < self._next_tick:
+            return
+        self._next_tick = time.monotonic() + 30
+        now = dt.datetime.now()
+        fire = self.cron.last_fire(now)
+        if fire is None or now - fire > dt.timedelta(hours=CATCH_UP_HOURS):
+            return
+        if self.store.fire_due("nightly", fire.timestamp()):
+            for job in enqueue_nightly(self.store, self.config_path):
+                self.on_change(job)
+            self.store.prune()
+
+    def _step(
+        self, pool: ProcessPoolExecutor, running: dict[Future, Job]
+    ) -> ProcessPoolExecutor:
+        """Una vuelta del despachador; devuelve el pool (otro si se rompió)."""
+        self._tick_schedule()
+        broken = False
+        while len(running) < self.workers and not broken:
+            job, stale = self.store.claim(self.owner)
+            for s in stale:
+                self.on_change(s)
+            if job is None:
+                break
+            self.on_change(job)
+            try:
+                running[pool.submit(run_job, job)] = job
+            except Exception as exc:  # pool roto o trabajo que no se puede enviar
+                broken = isinstance(exc, BrokenProcessPool)
+                self.on_change(self.store.finish(job.id, _failed(exc, broken)))
+        if not running and not broken:
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+            return pool
+        done, _ = wait(running, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+        for fut in done:
+            job = running.pop(fut)
+            try:
+                result = fut.result()
+            except BrokenProcessPool as exc:  # un hijo murió (memoria, crash)
+                broken = True
+                result = _failed(exc, transient=True)
+            except Exception as exc:  # p.ej. un resultado que no se pudo recibir
+                result = _failed(exc)
+            self.on_change(self.store.finish(job.id, result))
+        if broken:
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.store.heartbeat([j.id for j in running.values()])
+        return pool
+
+    def _loop(self) -> None:
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        running: dict[Future, Job] = {}
+        try:
+            while not self._stop.is_set():
+                try:
+                    pool = self._step(pool, running)
+                except Exception as exc:  # p.ej. la base bloqueada: se reintenta
+                    graphs._warn(f"Cola: {type(exc).__name__}: {exc}")
+                    self._stop.wait(POLL_SECONDS)
+        finally:
+            self.store.release([j.id for j in running.values()])
+            # Sin API pública para cancelar una tarea ya en curso (hasta 3.14):
+            # al cerrar no se espera a que termine la presentación a medias.
+            for p in list(getattr(pool, "_processes", {}).values()):
+                p.terminate()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ───────────── CLI ─────────────
+def parse_args():
+    p = argparse.ArgumentParser(description="Cola local de presentaciones")
+    p.add_argument("--db", default=str(BASE_DIR / DB_FILE), help="Base de trabajos")
+    p.add_argument(
+        "--config", default=str(BASE_DIR / CONFIG_FILE), help="Perfiles de la GUI"
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve", help="Procesar la cola y la programación nocturna")
+    s.add_argument("--workers", type=int, default=JOB_WORKERS)
+    s.add_argument("--cron", default=NIGHTLY_CRON)
+    e = sub.add_parser("enqueue", help="Encolar una presentación")
+    e.add_argument("--cl", required=True, help="Chapter Leader")
+    e.add_argument("--email", default="")
+    e.add_argument("--root", default=graphs.DATA_DIR, help="Carpeta de datos")
+    e.add_argument("--priority", type=int, default=PRIORITY_INTERACTIVE)
+    sub.add_parser("nightly", help="Encolar ya la presentación de cada perfil")
+    sub.add_parser("list", help="Últimos trabajos")
+    return p.parse_args()
+
+
+def main() -> None:
+    a = parse_args()
+    store = JobStore(a.db)
+    if a.cmd == "enqueue":
+        cl = graphs.confirm_leader(a.cl, a.email, a.root)
+        job, new = store.enqueue(cl, a.email, a.root, {}, a.priority, "cli")
+        print(("✅ Encolado " if new else "⚠️ Ya existía ") + job.summary())
+    elif a.cmd == "nightly":
+        for job in enqueue_nightly(store, a.config):
+            print(f"   {job.summary()}")
+    elif a.cmd == "list":
+        for job in store.recent():
+            print(f"   {job.summary()}")
+    else:
+        runner = JobRunner(
+            store, a.workers, lambda job: print(f"   {job.summary()}"), a.config, a.cron
+        )
+        print(f"✅ Cola en {a.db}")
+        if nxt := runner.next_nightly():
+            print(f"   Próxima generación nocturna: {nxt:%Y-%m-%d %H:%M}")
+        runner.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            runner.stop()
+
+
+if __name__ == "__main__":
+    main()
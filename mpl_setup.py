@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+mpl_setup.py – Arranque rápido de matplotlib en el ejecutable PyInstaller.
+
+El runtime hook de PyInstaller apunta MPLCONFIGDIR a una carpeta temporal
+nueva en cada arranque, así que matplotlib vuelve a escanear todas las fuentes
+del sistema (segundos en Windows). Este módulo, importado antes que
+matplotlib:
+
+• fija un MPLCONFIGDIR persistente junto al ejecutable (o en %LOCALAPPDATA%
+  si esa carpeta no es escribible);
+• la primera vez la siembra con la lista de fuentes y el estilo generados al
+  empaquetar (``--build-seed``, lo llama presentation_gui.spec);
+• ofrece prewarm() para cargar fuentes y maquetar texto en segundo plano;
+• mide la latencia de la primera gráfica y la anota en first_chart.jsonl.
+
+CHAPTER_SYNC_MPL_CACHE=0 desactiva la carpeta persistente (para medir el
+«antes»). Uso:
+    python mpl_setup.py --build-seed build/mplconfig_seed
+    python mpl_setup.py --report ruta/a/mplconfig
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import enum
+import glob
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+T0 = time.perf_counter()  # lo más cerca posible del arranque
+
+# ───────────── CONFIG ─────────────
+FROZEN = bool(getattr(sys, "frozen", False))
+BUNDLE_DIR = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parent))
+SEED_DIR = BUNDLE_DIR / "mplconfig_seed"
+CONFIG_SUBDIR = "mplconfig"
+STYLE_FILE = "chapter_sync.mplstyle"
+LATENCY_LOG = "first_chart.jsonl"
+ENV_SWITCH = "CHAPTER_SYNC_MPL_CACHE"
+THEME = {"style": "whitegrid", "context": "notebook"}  # sns.set_theme
+
+
+def _writable(d: Path) -> bool:
+    try:
+        d.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryFile(dir=d):
+            pass
+        return True
+    except OSError:
+        return False
+
+
+def _persistent_dir() -> Path | None:
+    candidates = [Path(sys.executable).resolve().parent / CONFIG_SUBDIR]
+    if local := os.environ.get("LOCALAPPDATA"):
+        candidates.append(Path(local) / "ChapterSync" / CONFIG_SUBDIR)
+    return next((d for d in candidates if _writable(d)), None)
+
+
+def _fontlists(d: Path) -> list[str]:
+    return glob.glob(str(d / "fontlist-v*.json"))
+
+
+def configure() -> str:
+    """Fija MPLCONFIGDIR antes de importar matplotlib; devuelve el estado de fuentes."""
+    if not FROZEN:
+        return "sistema"  # fuera del ejecutable ~/.matplotlib ya es persistente
+    if os.environ.get(ENV_SWITCH) == "0":
+        return "temporal"
+    if (d := _persistent_dir()) is None:
+        return "temporal"
+    os.environ["MPLCONFIGDIR"] = str(d)
+    if _fontlists(d):
+        return "persistente"
+    seeds = _fontlists(SEED_DIR)
+    for src in seeds:
+        shutil.copy2(src, d)
+    # Sin semilla matplotlib la construye ahora y queda guardada para el siguiente
+    return "semilla" if seeds else "nueva"
+
+
+FONT_CACHE = configure()
+LOG_DIR = _persistent_dir() if FROZEN else None
+PREWARMED = False
+first_chart: dict | None = None
+_chart_t0: float | None = None
+
+
+# ───────────── ESTILO ─────────────
+def apply_style() -> None:
+    """Estilo de las gráficas: el .mplstyle empaquetado o, sin él, sns.set_theme."""
+    import matplotlib.pyplot as plt
+
+    if (style := SEED_DIR / STYLE_FILE).exists():
+        plt.style.use(str(style))
+    else:
+        import seaborn as sns
+
+        sns.set_theme(**THEME)
+
+
+def _style_value(v) -> str:
+    if isinstance(v, (list, tuple)):
+        return ", ".join(str(x) for x in v)
+    if isinstance(v, enum.Enum):  # p.ej. CapStyle.round → round
+        return str(v.value)
+    return str(v)
+
+
+def _write_style(path: Path) -> int:
+    """Vuelca a *path* los rcParams que cambia sns.set_theme; devuelve cuántos."""
+    import matplotlib as mpl
+    import seaborn as sns
+
+    with mpl.rc_context():
+        before = dict(mpl.rcParams)
+        sns.set_theme(**THEME)
+        changed = {k: v for k, v in mpl.rcParams.items() if before.get(k) != v}
+    lines = [f"{k}: {_style_value(v)}" for k, v in sorted(changed.items())]
+    path.write_text("# Generado por mpl_setup.py --build-seed\n" + "\n".join(lines) + "\n")
+    return len(changed)
+
+
+def _fontlist_name() -> str:
+    from matplotlib import font_manager
+
+    return f"fontlist-v{font_manager.FontManager.__version__}.json"
+
+
+def build_seed(out_dir: str) -> None:
+    """Lista de fuentes + estilo para empaquetar junto al ejecutable."""
+    out = Path(out_dir)
+    shutil.rmtree(out, ignore_errors=True)
+    out.mkdir(parents=True)
+    # Config vacía: matplotlib escanea las fuentes y escribe ahí su fontlist
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["MPLCONFIGDIR"] = tmp
+        if "matplotlib" in sys.modules:
+            raise SystemExit("--build-seed debe correr en un proceso limpio")
+        from matplotlib import font_manager
+
+        font_manager.json_dump(font_manager.fontManager, out / _fontlist_name())
+    n = _write_style(out / STYLE_FILE)
+    print(f"✅ Semilla en {out}: {len(font_manager.fontManager.ttflist)} fuentes, {n} rcParams")
+
+
+# ───────────── PRECALENTADO ─────────────
+def prewarm() -> float:
+    """Carga las fuentes y maqueta texto como en las gráficas reales; devuelve segundos.
+
+    Usa la API orientada a objetos (sin pyplot): puede correr en otro hilo.
+    """
+    global PREWARMED
+    t0 = time.perf_counter()
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(6, 4))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.barh(["Squad A", "Squad B"], [13.5, 8.25])
+    ax.set_title("Tiempo promedio de desarrollo – ÁÉÍÓÚ ñ", fontweight="bold")
+    ax.set_xlabel("Días promedio")
+    ax.text(1, 0, "13.5", fontsize=9, bbox={"boxstyle": "round,pad=0.3"})
+    fig.legend(["Pases", "Reversiones"], loc="upper right")
+    fig.canvas.draw()
+    PREWARMED = True
+    return time.perf_counter() - t0
+
+
+# ───────────── LATENCIA DE LA PRIMERA GRÁFICA ─────────────
+def chart_started() -> None:
+    global _chart_t0
+    if _chart_t0 is None:
+        _chart_t0 = time.perf_counter()
+
+
+def chart_done() -> None:
+    """Anota la primera gráfica del proceso (las siguientes no cuentan)."""
+    global first_chart
+    if first_chart is not None or _chart_t0 is None:
+        return
+    now = time.perf_counter()
+    first_chart = {
+        "fecha": dt.datetime.now().isoformat(timespec="seconds"),
+        "desde_arranque": round(now - T0, 3),
+        "grafica": round(now - _chart_t0, 3),
+        "fuentes": FONT_CACHE,
+        "precalentado": PREWARMED,
+        "ejecutable": FROZEN,
+    }
+    if LOG_DIR is not None:
+        with open(LOG_DIR / LATENCY_LOG, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(first_chart) + "\n")
+
+
+def describe(rec: dict) -> str:
+    warm = "precalentado" if rec["precalentado"] else "en frío"
+    return (
+        f"Primera gráfica en {rec['grafica']:.2f} s ({rec['desde_arranque']:.1f} s "
+        f"desde el arranque; fuentes: {rec['fuentes']}, {warm})"
+    )
+
+
+def report(log_dir: str) -> None:
+    """Mediana de la primera gráfica por estado de caché: el «antes y después»."""
+    path = Path(log_dir) / LATENCY_LOG
+    if not path.exists():
+        raise SystemExit(f"No hay mediciones en {path}")
+    groups: dict[tuple, list[dict]] = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        rec = json.loads(line)
+        groups.setdefault((rec["fuentes"], rec["precalentado"]), []).append(rec)
+    print(f"{'fuentes':<12} {'precalentado':<13} {'n':>3} {'gráfica':>9} {'arranque':>9}")
+    for (fonts, warm), recs in sorted(groups.items()):
+        g = statistics.median(r["grafica"] for r in recs)
+        a = statistics.median(r["desde_arranque"] for r in recs)
+        print(f"{fonts:<12} {str(warm):<13} {len(recs):>3} {g:>8.2f}s {a:>8.1f}s")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Caché de fuentes/estilo de matplotlib")
+    g = p.add_mutually_exclusive_group(required=True)
+    g.add_argument("--build-seed", metavar="DIR", help="Generar la semilla a empaquetar")
+    g.add_argument("--report", metavar="DIR", help=f"Resumir {LATENCY_LOG} de DIR")
+    a = p.parse_args()
+    if a.build_seed:
+        build_seed(a.build_seed)
+    else:
+        report(a.report)
+
+
+if __name__ == "__main__":
+    main()
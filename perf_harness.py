@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+perf_harness.py – Regresión de rendimiento del pipeline por etapas.
+
+Genera libros sintéticos (semilla fija) con la forma de los reales (Calidad con
+sus dos hojas, DR, NivelesMadurez y TMD) y mide cada etapa:
+
+  ingest     Excel → Parquet (caché en disco fría)
+  filter     lectura del Parquet + filtro por Chapter Leader
+  aggregate  medias de Dedicación/TMD, índice de líderes y t-digests de TMD
+  render     gráficas de las cuatro secciones capturadas como PNG
+  assemble   colocación en la plantilla y guardado del .pptx
+
+Los tiempos se expresan en unidades de un bucle de calibración (CPU Python +
+numpy), así que son comparables entre máquinas. La memoria es el pico de
+tracemalloc de la etapa (en una pasada aparte, sin cronometrar).
+
+Uso:
+    python perf_harness.py                    # compara con perf_baseline.json
+    python perf_harness.py --save-baseline    # registra la línea base
+    python perf_harness.py --scale 2 --repeat 5
+    python -m pytest -m perf tests            # lo mismo como prueba de pytest
+
+Termina con código 1 si una etapa supera su presupuesto.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+import generate_presentation as gp
+import graphs
+
+# ───────────── CONFIG ─────────────
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "perf_baseline.json"
+)
+MAX_SLOWDOWN = 1.5  # tiempo permitido respecto a la línea base
+MAX_MEM_GROWTH = 1.5  # pico de memoria permitido respecto a la línea base
+MEM_SLACK_MIB = 8.0  # holgura absoluta (etapas pequeñas son ruidosas)
+TIME_SLACK_UNITS = 1.0  # ídem para el tiempo: etapas de menos de una unidad
+SEED = 20250501
+
+# Presupuestos sin línea base, a escala 1: (unidades de calibración, MiB).
+# Aproximadamente el doble de lo medido al crear el arnés.
+DEFAULT_BUDGETS: dict[str, tuple[float, float]] = {
+    "ingest": (60.0, 40.0),
+    "filter": (5.0, 40.0),
+    "aggregate": (15.0, 40.0),
+    "render": (110.0, 80.0),
+    "assemble": (5.0, 20.0),
+}
+
+LEADER = "ANA MARIA TORRES QUISPE"
+LEADER_EMAIL = "atorres@bcp.com.pe"
+
+
+# ───────────── DATOS SINTÉTICOS ─────────────
+def _leaders(rng: np.random.Generator, n: int) -> list[str]:
+    first = ["ANA", "LUIS", "JORGE", "ROSA", "CARLOS", "MARIA", "PEDRO", "LUCIA"]
+    last = ["TORRES", "QUISPE", "ROJAS", "FLORES", "DIAZ", "MENDOZA", "CASTRO"]
+    out = {LEADER}
+    while len(out) < n:
+        f1, f2, l1, l2 = rng.choice(first, 2).tolist() + rng.choice(last, 2).tolist()
+        out.add(f"{f1} {f2} {l1} {l2}")
+    return sorted(out)
+
+
+def _email(name: str) -> str:
+    parts = name.lower().split()
+    return f"{parts[0][0]}{parts[2]}@bcp.com.pe"
+
+
+def make_workbooks(root: str, scale: float = 1.0) -> dict[str, str]:
+    """Escribe los cuatro libros en *root*; devuelve sección → ruta."""
+    rng = np.random.default_rng(SEED)
+    leaders = _leaders(rng, 30)
+    # El CL medido tiene pocos squads propios, como en los datos reales
+    squads = [f"SQ {i:02d}" for i in range(60)]
+    own = squads[:8]
+    tribes = [f"TRIBU {c}" for c in "ABCDEF"]
+
+    def pick_leader(n: int) -> np.ndarray:
+        p = np.full(len(leaders), 1.0)
+        p[leaders.index(LEADER)] = 3.0
+        return rng.choice(leaders, n, p=p / p.sum())
+
+    def squads_for(cl: np.ndarray) -> np.ndarray:
+        sq = rng.choice(squads, len(cl))
+        mine = cl == LEADER
+        sq[mine] = rng.choice(own, mine.sum())
+        return sq
+
+    n = lambda base: max(int(base * scale), 50)  # noqa: E731
+    paths = {}
+
+    # Calidad: dos hojas, CL como «Nombre (correo)»
+    sheets = {}
+    for sheet, rows, tipo in (
+        ("Consolidado Pases", n(20_000), "Pase a Producción"),
+        ("Consolidado Reversiones", n(600), "Reversión"),
+    ):
+        cl = pick_leader(rows)
+        sheets[sheet] = pd.DataFrame(
+            {
+                "Codigo": [f"OCD-{i}" for i in rng.integers(10_000, 99_999, rows)],
+                "Descripcion": rng.choice(["Cambio BAU", "Release", "Hotfix"], rows),
+                "Chapter leader": [f"{c.title()} ({_email(c)})" for c in cl],
+                "Año": 2025,
+                "Mes": rng.choice(graphs.MONTHS_ES[:6], rows),
+                "Tipo": tipo,
+                "Tribu": rng.choice(tribes, rows),
+                "Squad": squads_for(cl),
+            }
+        )
+    paths["calidad"] = os.path.join(root, "Calidad__Pases_sintetico.xlsx")
+    with pd.ExcelWriter(paths["calidad"]) as xw:
+        for sheet, df in sheets.items():
+            df.to_excel(xw, sheet_name=sheet, index=False)
+
+    rows = n(2_000)
+    cl = pick_leader(rows)
+    paths["dedicacion"] = os.path.join(root, "DR__Reporte_sintetico.xlsx")
+    pd.DataFrame(
+        {
+            "Nombre CL": cl,
+            "Nombres": [f"DEV {i % 40:02d} {c.split()[-1]}" for i, c in enumerate(cl)],
+            "Dedicación": rng.choice([25, 50, 75, 100], rows),
+        }
+    ).to_excel(paths["dedicacion"], index=False)
+
+    rows = n(900)
+    cl = pick_leader(rows)
+    lep = {
+        f"LEP_{k}": rng.uniform(1, 5, rows).round(2) for k in ("DEV", "OPS", "QA", "ARQ")
+    }
+    paths["madurez"] = os.path.join(root, "NivelesMadurez__Reporte_sintetico.xlsx")
+    pd.DataFrame({"Chapter Leader": cl, "Squad": squads_for(cl), **lep}).to_excel(
+        paths["madurez"], index=False
+    )
+
+    rows = n(5_000)
+    cl = pick_leader(rows)
+    sq = squads_for(cl)
+    paths["tiempo"] = os.path.join(root, "TMD__reporte_sintetico.xlsx")
+    pd.DataFrame(
+        {
+            "Nombre CL": cl,
+            "Descripción tribu": [tribes[int(s[-2:]) % len(tribes)] for s in sq],
+            "Descripción squad": sq,
+            "Tiempo Desarrollo": rng.lognormal(2.5, 0.6, rows).round(1),
+            "Mes": rng.choice(graphs.MONTHS_ES[:6], rows),
+        }
+    ).to_excel(paths["tiempo"], index=False)
+    return paths
+
+
+# ───────────── CALIBRACIÓN ─────────────
+def calibrate(repeat: int = 5) -> float:
+    """Segundos de un bucle fijo (dict/str de Python + ordenamiento numpy)."""
+    data = np.random.default_rng(0).random(400_000)
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        d: dict[str, int] = {}
+        for i in range(150_000):
+            d[f"k{i % 5000}"] = d.get(f"k{i % 5000}", 0) + i
+        np.sort(data)
+        pd.Series(data).groupby((data * 50).astype(int)).mean()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+# ───────────── ETAPAS ─────────────
+def _drop_caches(cache: bool = False, sidecars: bool = False) -> None:
+    graphs.FRAMES.clear()
+    graphs._LEADER_INDEX_MEMO.clear()
+    gp._PNG_CACHE.clear()
+    if not os.path.isdir(graphs.CACHE_DIR):
+        return
+    for name in os.listdir(graphs.CACHE_DIR):
+        is_sidecar = ".parquet." in name
+        if (cache and not is_sidecar) or ((cache or sidecars) and is_sidecar):
+            os.remove(os.path.join(graphs.CACHE_DIR, name))
+
+
+class Pipeline:
+    def __init__(self, paths: dict[str, str]) -> None:
+        self.paths = paths
+        self.pngs: list[tuple[str, bytes]] = []
+
+    def ingest(self) -> None:
+        for section, fp in self.paths.items():
+            for sheet in graphs.SOURCE_SHEETS[section]:
+                graphs.read_any(fp, **({"sheet_name": sheet} if sheet else {}))
+
+    def filter(self) -> None:
+        cal = self.paths["calidad"]
+        graphs.read_leader(cal, "Chapter leader", sheet_name="Consolidado Pases")
+        graphs.read_leader(cal, "Chapter leader", sheet_name="Consolidado Reversiones")
+        graphs.read_leader(self.paths["dedicacion"], "Nombre CL")
+        graphs.read_leader(self.paths["madurez"], "Chapter Leader")
+        graphs.read_leader(self.paths["tiempo"], "Nombre CL")
+
+    def aggregate(self) -> None:
+        graphs._dedicacion_avg(self.paths["dedicacion"])
+        graphs._tmd_avgs(self.paths["tiempo"])
+        graphs.tmd_percentiles(self.paths["tiempo"])
+
+    def render(self) -> None:
+        self.pngs = []
+        for section, fn, (box_w, box_h) in gp.SECTIONS:
+            if section not in self.paths:  # p.ej. el ranking, que lee todas
+                continue
+            fp = self.paths[section]
+            sink = lambda png, s=section: self.pngs.append((s, png))  # noqa: E731
+            gp.capture(lambda: fn(fp), box_w, box_h, sink)
+
+    def assemble(self) -> None:
+        builder = gp._DeckBuilder(gp.TEMPLATE.get())
+        for section, png in self.pngs:
+            builder.place(section, io.BytesIO(png), gp._png_size(png))
+        builder.prs.save(io.BytesIO())
+
+
+# (etapa, preparación antes de cada repetición)
+STAGES: list[tuple[str, Callable[[], None]]] = [
+    ("ingest", lambda: _drop_caches(cache=True)),
+    ("filter", lambda: _drop_caches()),
+    ("aggregate", lambda: _drop_caches(sidecars=True)),
+    ("render", lambda: _drop_caches()),
+    ("assemble", lambda: None),
+]
+
+
+@dataclass
+class StageResult:
+    stage: str
+    seconds: float
+    units: float
+    mem_mib: float
+    budget_units: float = 0.0
+    budget_mib: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.units <= self.budget_units and self.mem_mib <= self.budget_mib
+
+
+def run_stages(pipe: Pipeline, unit: float, repeat: int) -> list[StageResult]:
+    out = []
+    for stage, prepare in STAGES:
+        fn = getattr(pipe, stage)
+        best = float("inf")
+        for _ in range(repeat):
+            prepare()
+            gc.collect()
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+
+        prepare()
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        out.append(StageResult(stage, best, best / unit, peak / 2**20))
+    return out
+
+
+def _budgets(baseline: dict | None, scale: float) -> dict[str, tuple[float, float]]:
+    if not baseline:
+        k = max(scale, 1.0)
+        return {st: (u * k, m * k) for st, (u, m) in DEFAULT_BUDGETS.items()}
+    return {
+        stage: (
+            b["units"] * MAX_SLOWDOWN + TIME_SLACK_UNITS,
+            b["mem_mib"] * MAX_MEM_GROWTH + MEM_SLACK_MIB,
+        )
+        for stage, b in baseline["stages"].items()
+    }
+
+
+def load_baseline(path: str, scale: float) -> dict | None:
+    """Línea base de *path* si existe y es de la misma escala."""
+    if not os.path.isfile(path):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    if baseline.get("scale") != scale:
+        print(
+            f"⚠️  La línea base es de escala {baseline.get('scale')}; "
+            "se usan los presupuestos por defecto"
+        )
+        return None
+    return baseline
+
+
+def measure(
+    scale: float = 1.0, repeat: int = 3, keep: str | None = None
+) -> tuple[float, list[StageResult]]:
+    """(segundos por unidad, resultados por etapa) sobre libros sintéticos."""
+    import matplotlib.pyplot as plt
+
+    plt.switch_backend("Agg")
+    root = keep or tempfile.mkdtemp(prefix="perf_harness_")
+    os.makedirs(root, exist_ok=True)
+    try:
+        graphs.set_data_dir(root)
+        graphs.set_chapter_leader(LEADER, LEADER_EMAIL)
+        print(f"Generando libros sintéticos (escala {scale}) en {root}…")
+        pipe = Pipeline(make_workbooks(root, scale))
+
+        unit = calibrate()
+        print(f"Calibración: 1 unidad = {unit * 1000:.1f} ms")
+        return unit, run_stages(pipe, unit, repeat)
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def apply_budgets(results: list[StageResult], baseline: dict | None, scale: float):
+    """Asigna a cada resultado el presupuesto de *baseline* (o el por defecto)."""
+    budgets = _budgets(baseline, scale)
+    for r in results:
+        r.budget_units, r.budget_mib = budgets[r.stage]
+
+
+def save_baseline(path: str, scale: float, unit: float, results) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(
+            {
+                "scale": scale,
+                "unit_seconds": unit,
+                "stages": {r.stage: asdict(r) for r in results},
+            },
+            fh,
+            indent=2,
+        )
+        fh.write("\n")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Regresión de rendimiento por etapas")
+    p.add_argument(
+        "--scale", type=float, default=1.0, help="Multiplica las filas sintéticas"
+    )
+    p.add_argument(
+        "--repeat", type=int, default=3, help="Repeticiones por etapa (vale el mínimo)"
+    )
+    p.add_argument("--baseline", default=BASELINE_PATH, help="Archivo de línea base")
+    p.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Guardar los resultados como línea base",
+    )
+    p.add_argument(
+        "--keep", default=None, help="Carpeta donde dejar los libros sintéticos"
+    )
+    a = p.parse_args()
+
+    unit, results = measure(a.scale, a.repeat, a.keep)
+    baseline = None if a.save_baseline else load_baseline(a.baseline, a.scale)
+    apply_budgets(results, baseline, a.scale)
+
+    print(f"\n{'etapa':<10} {'seg':>7} {'unid':>8} {'máx':>8} {'MiB':>7} {'máx':>7}")
+    for r in results:
+        mark = "✅" if r.ok else "❌"
+        print(
+            f"{r.stage:<10} {r.seconds:7.2f} {r.units:8.1f} {r.budget_units:8.1f} "
+            f"{r.mem_mib:7.1f} {r.budget_mib:7.1f}  {mark}"
+        )
+
+    if a.save_baseline:
+        save_baseline(a.baseline, a.scale, unit, results)
+        print(f"\n✅ Línea base guardada en {a.baseline}")
+        return
+
+    failed = [r.stage for r in results if not r.ok]
+    ref = "línea base" if baseline else "presupuestos por defecto"
+    if failed:
+        print(f"\n❌ Fuera de presupuesto ({ref}): {', '.join(failed)}")
+        sys.exit(1)
+    print(f"\n✅ Todas las etapas dentro del presupuesto ({ref})")
+
+
+if __name__ == "__main__":
+    main()
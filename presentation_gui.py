@@ -11,19 +11,27 @@
 from __future__ import annotations
 
 import json
+import logging
+import multiprocessing
 import os
+import queue
 import re
-import runpy
 import subprocess
 import sys
+import threading
+import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from typing import List, Tuple
 
 import dearpygui.dearpygui as dpg
 
 import graphs
+import jobs
+import mpl_setup
 
 # ╔══════════════════ CONFIG VISUAL ══════════════════════════════════╗
 LEFT_PAD = 20
@@ -69,9 +77,6 @@ CONFIG_PATH = EXEC_DIR / "chapter_config.json"
 # Carpeta de archivos de ejemplo incluida en el paquete
 FILES_DIR_DEMO = APP_DIR / "files"  # carpeta fija del workspace
 
-# Script que se ejecuta dinámicamente para generar las diapositivas
-PRESENTATION_SCRIPT = APP_DIR / "generate_presentation.py"
-
 # ╔══════════════════ TAGS ═══════════════════════════════════════════╗
 (
     TAG_ROOT,
@@ -83,15 +88,28 @@ PRESENTATION_SCRIPT = APP_DIR / "generate_presentation.py"
     TAG_BTN_DEL,
     TAG_INPUT_CL,
     TAG_INPUT_EMAIL,
+    TAG_LBL_SUGGEST,
+    TAG_GRP_SUGGEST,
     TAG_BTN_CANCEL,
     TAG_INFO,
     TAG_CHK_DEMO,
     TAG_INPUT_DIR,
     TAG_BTN_BROWSE_DIR,
+    TAG_CHK_PROFILE,
     TAG_BTN_GENERAR,
+    TAG_BTN_VALIDAR,
     TAG_BTN_OPEN_FOLDER,
     TAG_BTN_OPEN_PPTX,
     TAG_LBL_STATUS,
+    TAG_LBL_JOBS,
+    TAG_PREVIEW_HEADER,
+    TAG_COMBO_CHART,
+    TAG_COMBO_SQUAD,
+    TAG_BTN_PREVIEW,
+    TAG_LBL_PREVIEW,
+    TAG_PLOT,
+    TAG_PLOT_X,
+    TAG_PLOT_Y,
     TAG_LOG_CHILD,
 ) = (
     "##root",
@@ -103,15 +121,28 @@ PRESENTATION_SCRIPT = APP_DIR / "generate_presentation.py"
     "##btn_del",
     "##input_cl",
     "##input_email",
+    "##lbl_suggest",
+    "##grp_suggest",
     "##btn_cancel",
     "##lbl_info",
     "##chk_demo",
     "##input_dir",
     "##btn_browse_dir",
+    "##chk_profile",
     "##btn_generar",
+    "##btn_validar",
     "##btn_open_folder",
     "##btn_open_pptx",
     "##lbl_status",
+    "##lbl_jobs",
+    "##preview_header",
+    "##combo_chart",
+    "##combo_squad",
+    "##btn_preview",
+    "##lbl_preview",
+    "##plot",
+    "##plot_x",
+    "##plot_y",
     "##log_child",
 )
 
@@ -124,8 +155,10 @@ RESPONSIVE_TAGS = [
     TAG_BTN_CANCEL,
     TAG_INPUT_DIR,
     TAG_BTN_GENERAR,
+    TAG_BTN_VALIDAR,
     TAG_BTN_OPEN_FOLDER,
     TAG_BTN_OPEN_PPTX,
+    TAG_PLOT,
     TAG_LOG_CHILD,
 ]
 
@@ -150,14 +183,27 @@ def load_config() -> Tuple[List[Profile], str]:
         return [], ""
 
 
+def load_data_dir() -> str:
+    """Última carpeta con la que se generó (la usa la generación nocturna)."""
+    try:
+        return json.loads(CONFIG_PATH.read_text("utf-8")).get("data_dir", "")
+    except Exception:
+        return ""
+
+
 PROFILES, ACTIVE_EMAIL = load_config()
+DATA_DIR_USED = load_data_dir()
 EDIT_MODE: str | None = None  # "new"|"edit"|None
 
 
 def save_config(active_email: str):
     CONFIG_PATH.write_text(
         json.dumps(
-            {"active": active_email, "profiles": [asdict(p) for p in PROFILES]},
+            {
+                "active": active_email,
+                "profiles": [asdict(p) for p in PROFILES],
+                "data_dir": DATA_DIR_USED,
+            },
             indent=2,
         ),
         "utf-8",
@@ -169,11 +215,125 @@ def prof_by_email(e: str) -> Profile | None:
 
 
 # ╔══════════════════ LOG helpers ════════════════════════════════════╗
+# log_message sólo encola, así que vale desde cualquier hilo. Una vez por frame
+# pump_frame() vacía la cola, junta los mensajes repetidos seguidos («… (×N)»)
+# en un anillo de LOG_LINES entradas y lo vuelca sobre LOG_LINES widgets de
+# texto creados al inicio y reutilizados. El árbol de items no crece y el costo
+# por frame está acotado, se registre lo que se registre.
+LOG_LINES = 200  # líneas visibles en el panel
+LOG_DRAIN_MAX = 5000  # mensajes a sacar de la cola por frame (el resto, al siguiente)
+LOG_FILE: Path | None = EXEC_DIR / "chapter_sync.log"  # None = sin copia en disco
+LOG_FILE_BYTES = 2**20
+LOG_FILE_BACKUPS = 3
+LOG_COLORS = {"error": COLOR_ERR, "warn": COLOR_WARN}
+_LOG_LEVELS = {"error": logging.ERROR, "warn": logging.WARNING}
+
+LOG_QUEUE: queue.SimpleQueue[Tuple[str, str]] = queue.SimpleQueue()
+UI_CALLS: queue.SimpleQueue = queue.SimpleQueue()  # (func, args) para el hilo GUI
+
+
+class LogRing:
+    """Últimas *size* entradas [mensaje, nivel, repeticiones]."""
+
+    def __init__(self, size: int) -> None:
+        self.lines: deque[list] = deque(maxlen=size)
+        self.dirty = False
+
+    def add(self, msg: str, level: str) -> None:
+        if self.lines and self.lines[-1][:2] == [msg, level]:
+            self.lines[-1][2] += 1
+        else:
+            self.lines.append([msg, level, 1])
+        self.dirty = True
+
+    def rows(self) -> List[Tuple[str, str]]:
+        return [(f"{m} (×{n})" if n > 1 else m, lvl) for m, lvl, n in self.lines]
+
+
+LOG_RING = LogRing(LOG_LINES)
+_log_slots: List[Tuple[str, str] | None] = [None] * LOG_LINES  # texto de cada widget
+
+
+def _file_logger() -> logging.Logger | None:
+    if LOG_FILE is None:
+        return None
+    logger = logging.getLogger("chapter_sync.gui")
+    if not logger.handlers:
+        try:
+            handler = RotatingFileHandler(
+                LOG_FILE,
+                maxBytes=LOG_FILE_BYTES,
+                backupCount=LOG_FILE_BACKUPS,
+                encoding="utf-8",
+                delay=True,  # el archivo se abre con el primer mensaje
+            )
+        except OSError:  # carpeta de sólo lectura: sólo el panel
+            return None
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+# Se abre en __main__: los procesos hijos (spawn) importan este módulo y no
+# deben tocar el archivo de registro
+FILE_LOG: logging.Logger | None = None
+
+
 def log_message(msg: str, level="info"):
-    col = {"error": COLOR_ERR, "warn": COLOR_WARN}.get(level, COLOR_INFO)
-    dpg.add_text(msg, parent=TAG_LOG_CHILD, color=col)
-    if (kids := dpg.get_item_children(TAG_LOG_CHILD, 1)) and len(kids) > 500:
-        dpg.delete_item(kids[0])
+    LOG_QUEUE.put((msg, level))
+    if FILE_LOG is not None:
+        FILE_LOG.log(_LOG_LEVELS.get(level, logging.INFO), msg)
+
+
+def _log_tag(i: int) -> str:
+    return f"##log_{i}"
+
+
+def _flush_log() -> None:
+    """Vuelca el anillo en los widgets; sólo toca los que cambian."""
+    rows = LOG_RING.rows()
+    scroll = dpg.get_y_scroll(TAG_LOG_CHILD)
+    bottom = dpg.get_y_scroll_max(TAG_LOG_CHILD)
+    for i in range(LOG_LINES):
+        row = rows[i] if i < len(rows) else None
+        if row == _log_slots[i]:
+            continue
+        tag = _log_tag(i)
+        if row is None:
+            dpg.configure_item(tag, show=False)
+        else:
+            msg, level = row
+            dpg.set_value(tag, msg)
+            dpg.configure_item(tag, color=LOG_COLORS.get(level, COLOR_INFO), show=True)
+        _log_slots[i] = row
+    LOG_RING.dirty = False
+    if scroll >= bottom - 1:  # seguir la cola salvo que el usuario haya subido
+        dpg.set_y_scroll(TAG_LOG_CHILD, -1.0)
+
+
+def pump_frame() -> None:
+    """Trabajo del hilo GUI antes de cada frame: llamadas pendientes y registro."""
+    while True:
+        try:
+            func, args = UI_CALLS.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            func(*args)
+        except Exception as exc:  # una llamada rota no debe cerrar la GUI
+            name = getattr(func, "__name__", repr(func))
+            log_message(f"Error en {name}: {exc}", "error")
+            if FILE_LOG is not None:
+                FILE_LOG.exception("pump_frame: %s", name)
+    for _ in range(LOG_DRAIN_MAX):
+        try:
+            LOG_RING.add(*LOG_QUEUE.get_nowait())
+        except queue.Empty:
+            break
+    if LOG_RING.dirty:
+        _flush_log()
 
 
 graphs._warn = lambda m: log_message(m, "warn")  # type: ignore[attr-defined]
@@ -243,6 +403,101 @@ def on_profile_selected(_, sel, __):
         ACTIVE_EMAIL = p.email
         hide_inputs()
         set_status(f"Perfil activo: {sel}")
+        future = EXECUTOR.submit(leader_hint, p.name, p.email, _form_data_dir())
+        future.add_done_callback(lambda fut: _invoke(on_profile_hint, fut))
+        if dpg.get_value(TAG_PREVIEW_HEADER):
+            preview_cb()
+
+
+def _form_data_dir() -> str:
+    if dpg.get_value(TAG_CHK_DEMO):
+        return str(FILES_DIR_DEMO)
+    return dpg.get_value(TAG_INPUT_DIR).strip()
+
+
+def leader_hint(name: str, email: str, data_dir: str) -> Tuple[str, List[str]]:
+    """(aviso, candidatos) si *name* no coincide tal cual con un líder.
+
+    Sólo el nombre exacto o el correo se aceptan solos; los candidatos se
+    muestran como botones para que el usuario confirme uno. Usa el índice de
+    líderes de la caché (no lee ningún Excel), pero recorre la carpeta de
+    datos: se llama en el hilo de trabajo, nunca en el hilo GUI.
+    """
+    if not name.strip() or not data_dir or not Path(data_dir).is_dir():
+        return "", []
+    idx = graphs.leader_index(data_dir)
+    if not idx.raw:
+        return "", []
+    norm = idx.resolve(name, email)
+    if norm == graphs.normalize_name(name):
+        return "", []
+    if norm:
+        return f"El correo es de «{idx.display[norm]}»; se usará ese líder.", []
+    if sugg := idx.suggest(name, 5):
+        return "Sin coincidencia exacta. Elige el líder correcto:", sugg
+    return "", []
+
+
+# El aviso se recalcula HINT_DELAY s después de la última tecla: en una carpeta
+# de red cada búsqueda puede tardar, y no debe bloquear la escritura.
+HINT_DELAY = 0.3
+_hint_timer: threading.Timer | None = None
+_hint_seq = 0  # última tecla; las respuestas de búsquedas anteriores se descartan
+
+
+def on_leader_typed(*_):
+    global _hint_timer, _hint_seq
+    _hint_seq += 1
+    if _hint_timer is not None:
+        _hint_timer.cancel()
+    form = (
+        dpg.get_value(TAG_INPUT_CL),
+        dpg.get_value(TAG_INPUT_EMAIL),
+        _form_data_dir(),
+    )
+    _hint_timer = threading.Timer(HINT_DELAY, _hint_due, (_hint_seq, *form))
+    _hint_timer.daemon = True
+    _hint_timer.start()
+
+
+def _hint_due(seq: int, name: str, email: str, data_dir: str) -> None:
+    future = EXECUTOR.submit(leader_hint, name, email, data_dir)
+    future.add_done_callback(lambda fut: _invoke(on_hint, seq, fut))
+
+
+def on_hint(seq: int, fut) -> None:
+    if seq != _hint_seq:  # el usuario siguió escribiendo
+        return
+    hint, cands = _hint_result(fut)
+    dpg.configure_item(TAG_LBL_SUGGEST, default_value=hint, show=bool(hint))
+    dpg.delete_item(TAG_GRP_SUGGEST, children_only=True)
+    for name in cands:
+        dpg.add_button(
+            label=name, parent=TAG_GRP_SUGGEST, callback=on_pick_leader, user_data=name
+        )
+    dpg.configure_item(TAG_GRP_SUGGEST, show=bool(cands))
+
+
+def on_pick_leader(_, __, name: str) -> None:
+    """El usuario confirma uno de los candidatos: pasa a ser el nombre."""
+    dpg.set_value(TAG_INPUT_CL, name)
+    on_leader_typed()
+
+
+def on_profile_hint(fut) -> None:
+    hint, cands = _hint_result(fut)
+    if cands:
+        hint += " " + ", ".join(cands) + " (Editar para cambiarlo)"
+    if hint:
+        log_message(hint, "warn")
+
+
+def _hint_result(fut) -> Tuple[str, List[str]]:
+    try:
+        return fut.result()
+    except Exception as exc:
+        log_message(f"Sin sugerencias de líder: {exc}", "warn")
+        return "", []
 
 
 def show_inputs(name: str = "", email: str = ""):
@@ -265,6 +520,8 @@ def hide_inputs():
         TAG_INPUT_CL,
         "lbl_correo",
         TAG_INPUT_EMAIL,
+        TAG_LBL_SUGGEST,
+        TAG_GRP_SUGGEST,
         TAG_BTN_CANCEL,
         TAG_INFO,
     ):
@@ -310,30 +567,158 @@ def on_cancel(*_):
 
 
 # ╔══════════════════ GENERACIÓN PPT  (hilo) ═════════════════════════╗
-def _gen_ppt(cl: str, email: str, data_dir: str):
-    try:
-        # Actualizar rutas dinámicas en graphs
-        graphs.CHAPTER_LEADER, graphs.CHAPTER_LEADER_EMAIL = cl, email
-        graphs.CL_NORM = graphs.normalize_name(cl)
-        graphs.DATA_DIR = data_dir
-        graphs.FILES_DIR = data_dir
-        graphs.CACHE_DIR = os.path.join(data_dir, graphs.CACHE_SUBDIR)
-
-        runpy.run_path(str(PRESENTATION_SCRIPT))
-
-        # La ruta de salida depende de si la aplicación está congelada
-        if getattr(sys, "frozen", False):
-            src_dir = EXEC_DIR / "outputs"
-        else:
-            src_dir = APP_DIR / "outputs"
+# Los hilos de trabajo reciben (nombre, correo, carpeta) leídos en el hilo GUI
+# y los aplican a graphs sólo mientras trabajan (graphs.configured).
+# Las presentaciones se generan en los procesos de la cola (jobs.py): un doble
+# clic o una generación ya hecha de madrugada no vuelven a generar nada.
+JOBS = jobs.JobRunner(
+    jobs.JobStore(EXEC_DIR / jobs.DB_FILE),
+    on_change=lambda job: _invoke(on_job_changed, job),
+    config_path=CONFIG_PATH,
+)
+FORM_JOBS: dict[int, Tuple[str, str, str]] = {}  # trabajo → (nombre, correo, carpeta)
+
 
-        pptxs = list(src_dir.glob("*.pptx"))
-        if not pptxs:
-            return False, "No se generó .pptx", None, None
-        ultimo = max(pptxs, key=lambda p: p.stat().st_mtime)
-        return True, "Presentación generada.", str(src_dir), str(ultimo)
+def _validate(cl: str, email: str, data_dir: str):
+    """Sólo cabeceras + índice de líderes: no parsea hojas ni renderiza."""
+    try:
+        with graphs.configured(cl, email, data_dir):
+            paths = {k: graphs._resolve_path(None, k) for k in graphs.FILE_KEYWORDS}
+            results = graphs.check_sources(paths)
+        return [(r.ok, r.summary()) for r in results], None
+    except Exception as exc:
+        return [], f"Error: {exc}"
+
+
+# ╔══════════════════ VISTA PREVIA ═══════════════════════════════════╗
+# Gráficas nativas de Dear PyGui a partir de los agregados de graphs. La carga
+# (Parquet + filtro por CL) va en el hilo de trabajo; cambiar de gráfica o de
+# squad sólo redibuja con los datos ya agregados.
+PREVIEW_CHARTS = [
+    "Calidad por squad",
+    "Dedicación",
+    "TMD por squad",
+    "TMD por tribu",
+    "Madurez LEP",
+]
+PREVIEW: dict[str, object] = {}  # agregados del último perfil cargado
+
+
+def _preview_data(data_dir: str) -> dict[str, object]:
+    path = {
+        k: graphs._find_file_by_keyword(kw, data_dir, quiet=True)
+        for k, kw in graphs.FILE_KEYWORDS.items()
+    }
+    data: dict[str, object] = {}
+    if path["calidad"]:
+        data["calidad"] = graphs.calidad_counts(path["calidad"])
+    if path["dedicacion"]:
+        data["dedicacion"] = graphs._dedicacion_avg(path["dedicacion"])
+    if path["tiempo"] and (avgs := graphs._tmd_avgs(path["tiempo"])):
+        data["tmd_tribu"], data["tmd_squad"] = avgs
+    if path["madurez"]:
+        data["madurez"] = graphs.madurez_means(path["madurez"])
+    return data
+
+
+def _load_preview(cl: str, email: str, data_dir: str):
+    """Agregados de las cuatro fuentes (hilo de trabajo)."""
+    t0 = time.perf_counter()
+    try:
+        with graphs.configured(cl, email, data_dir):
+            data = _preview_data(data_dir)
+        return data, time.perf_counter() - t0, None
     except Exception as exc:
-        return False, f"Error: {exc}", None, None
+        return {}, time.perf_counter() - t0, f"Error en la vista previa: {exc}"
+
+
+def preview_cb(*_):
+    if (form := _read_form()) is None:
+        return
+    dpg.set_value(TAG_LBL_PREVIEW, "Cargando datos…")
+    future = EXECUTOR.submit(_load_preview, *form)
+    future.add_done_callback(lambda fut: _invoke(on_preview_loaded, fut))
+
+
+def on_preview_loaded(fut):
+    data, secs, error = fut.result()
+    dpg.configure_item(TAG_SPINNER, show=False)
+    if error:
+        return _err(error)
+    PREVIEW.clear()
+    PREVIEW.update(data)
+
+    cal = PREVIEW.get("calidad")
+    squads = sorted(cal["Squad"].unique()) if cal is not None else []  # type: ignore[index]
+    dpg.configure_item(TAG_COMBO_SQUAD, items=squads)
+    if squads and dpg.get_value(TAG_COMBO_SQUAD) not in squads:
+        dpg.set_value(TAG_COMBO_SQUAD, squads[0])
+    draw_preview()
+    log_message(f"Vista previa: datos agregados en {secs:.2f} s")
+
+
+def _hbars(series, label: str) -> None:
+    """Barras horizontales, una por índice de *series* (el primero arriba)."""
+    labels = [str(x) for x in series.index][::-1]
+    values = [float(v) for v in series.to_numpy()][::-1]
+    pos = list(range(len(values)))
+    dpg.add_bar_series(values, pos, label=label, weight=0.7, horizontal=True, parent=TAG_PLOT_Y)
+    dpg.set_axis_ticks(TAG_PLOT_Y, tuple(zip(labels, pos)))
+
+
+def draw_preview(*_):
+    t0 = time.perf_counter()
+    chart = dpg.get_value(TAG_COMBO_CHART)
+    dpg.configure_item(TAG_COMBO_SQUAD, show=chart == PREVIEW_CHARTS[0])
+    dpg.delete_item(TAG_PLOT_Y, children_only=True)
+    dpg.reset_axis_ticks(TAG_PLOT_X)
+    dpg.reset_axis_ticks(TAG_PLOT_Y)
+
+    if chart == "Calidad por squad":
+        cal = PREVIEW.get("calidad")
+        sq = dpg.get_value(TAG_COMBO_SQUAD)
+        if cal is not None and sq:
+            d = cal[cal["Squad"] == sq].sort_values("Mes")  # type: ignore[index]
+            months = d["Mes"].astype(str).tolist()
+            x = list(range(len(months)))
+            dpg.add_line_series(x, d["passes"].tolist(), label="Pases", parent=TAG_PLOT_Y)
+            dpg.add_line_series(x, d["revs"].tolist(), label="Reversiones", parent=TAG_PLOT_Y)
+            dpg.set_axis_ticks(TAG_PLOT_X, tuple(zip(months, x)))
+    elif chart == "Dedicación":
+        if (s := PREVIEW.get("dedicacion")) is not None:
+            _hbars(s, "Dedicación promedio (horas)")
+    elif chart in ("TMD por squad", "TMD por tribu"):
+        key = "tmd_squad" if chart.endswith("squad") else "tmd_tribu"
+        if (s := PREVIEW.get(key)) is not None:
+            _hbars(s, "Días promedio")
+            dpg.add_inf_line_series(
+                [float(graphs.TMD_THRESHOLD)], label="Umbral", parent=TAG_PLOT_Y
+            )
+    elif chart == "Madurez LEP":
+        if (m := PREVIEW.get("madurez")) is not None:
+            m = m.iloc[::-1]  # type: ignore[attr-defined]
+            # Una serie por métrica con su posición explícita dentro de cada
+            # squad: no depende de cómo agrupe add_bar_group_series
+            width = 0.8 / max(len(m.columns), 1)
+            for j, col in enumerate(m.columns):
+                offset = (j - (len(m.columns) - 1) / 2) * width
+                dpg.add_bar_series(
+                    [float(v) for v in m[col].to_numpy()],
+                    [i + offset for i in range(len(m.index))],
+                    label=str(col),
+                    weight=width,
+                    horizontal=True,
+                    parent=TAG_PLOT_Y,
+                )
+            dpg.set_axis_ticks(
+                TAG_PLOT_Y, tuple((str(sq), i) for i, sq in enumerate(m.index))
+            )
+
+    dpg.fit_axis_data(TAG_PLOT_X)
+    dpg.fit_axis_data(TAG_PLOT_Y)
+    ms = (time.perf_counter() - t0) * 1000
+    empty = "sin datos · " if not dpg.get_item_children(TAG_PLOT_Y, 1) else ""
+    dpg.set_value(TAG_LBL_PREVIEW, f"{chart}: {empty}dibujado en {ms:.0f} ms")
 
 
 # ─── util cross-thread → hilo GUI ────────────────────────────────────
@@ -361,26 +746,18 @@ def _invoke(func, *args):
 
         dpg.set_render_callback(_once)  # type: ignore[attr-defined]
         return
-    func(*args)
+    UI_CALLS.put((func, args))  # la ejecuta pump_frame en el hilo GUI
 
 
-def generar_cb(*_):
-    global EDIT_MODE, ACTIVE_EMAIL
-    dpg.configure_item(TAG_BTN_OPEN_FOLDER, show=False)
-    dpg.configure_item(TAG_BTN_OPEN_PPTX, show=False)
-    set_status("")
-    dpg.configure_item(TAG_SPINNER, show=True)
-
+def _read_form() -> Tuple[str, str, str] | None:
+    """(nombre, correo, carpeta) del formulario, o None tras mostrar el error."""
     cl, email = (
         (dpg.get_value(TAG_INPUT_CL).strip(), dpg.get_value(TAG_INPUT_EMAIL).strip())
         if dpg.is_item_shown(TAG_INPUT_CL)
         else current_name_email()
     )
 
-    if dpg.get_value(TAG_CHK_DEMO):
-        data_dir = str(FILES_DIR_DEMO)
-    else:
-        data_dir = dpg.get_value(TAG_INPUT_DIR).strip()
+    data_dir = _form_data_dir()
 
     if not cl:
         return _err("Nombre vacío")
@@ -390,18 +767,111 @@ def generar_cb(*_):
         return _err("Carpeta de datos no seleccionada")
     if not Path(data_dir).exists():
         return _err(f"Ruta no encontrada: {data_dir}")
+    return cl, email, data_dir
 
-    future = EXECUTOR.submit(_gen_ppt, cl, email, data_dir)
-    future.add_done_callback(lambda fut: _invoke(on_done, fut, cl, email))
+
+def generar_cb(*_):
+    global EDIT_MODE, ACTIVE_EMAIL
+    dpg.configure_item(TAG_BTN_OPEN_FOLDER, show=False)
+    dpg.configure_item(TAG_BTN_OPEN_PPTX, show=False)
+    set_status("")
+    dpg.configure_item(TAG_SPINNER, show=True)
+
+    if (form := _read_form()) is None:
+        return
+    cl, email, data_dir = form
+
+    options = (
+        {"profile": "both", "profile_dir": str(EXEC_DIR / "profiles")}
+        if dpg.get_value(TAG_CHK_PROFILE)
+        else {}
+    )
+    # La huella de los Excel recorre la carpeta: fuera del hilo GUI
+    future = EXECUTOR.submit(
+        JOBS.submit, cl, email, data_dir, options, jobs.PRIORITY_INTERACTIVE, "gui"
+    )
+    future.add_done_callback(
+        lambda fut: _invoke(on_submitted, fut, cl, email, data_dir)
+    )
 
 
-def on_done(fut, cl, email):
-    ok, msg, dst, ppt = fut.result()
+def validar_cb(*_):
+    set_status("")
+    dpg.configure_item(TAG_SPINNER, show=True)
+    if (form := _read_form()) is None:
+        return
+    future = EXECUTOR.submit(_validate, *form)
+    future.add_done_callback(lambda fut: _invoke(on_validated, fut))
+
+
+def on_validated(fut):
+    results, error = fut.result()
     dpg.configure_item(TAG_SPINNER, show=False)
-    if not ok:
-        return _err(msg)
+    if error:
+        return _err(error)
+    for ok, line in results:
+        log_message(line, "info" if ok else "warn")
+    vacias = sum(1 for ok, _ in results if not ok)
+    set_status(
+        f"Validación: {vacias} gráfica(s) saldrían vacías."
+        if vacias
+        else "Validación OK: todas las fuentes tienen datos."
+    )
 
-    global EDIT_MODE, ACTIVE_EMAIL
+
+def on_submitted(fut, cl, email, data_dir):
+    try:
+        job, new = fut.result()
+    except Exception as exc:
+        return _err(f"Error: {exc}")
+    FORM_JOBS[job.id] = (cl, email, data_dir)
+    job = JOBS.store.get(job.id)  # pudo terminar mientras tanto
+    if job.state in ("done", "failed"):
+        return on_done(job, reused=not new)
+    if not new:
+        log_message(f"Ya estaba pedida: {job.summary()}")
+    set_status(f"Trabajo #{job.id} {jobs.STATE_LABELS[job.state]}…")
+
+
+def refresh_jobs_label():
+    counts = JOBS.store.counts()
+    pending = [
+        f"{counts[s]} {jobs.STATE_LABELS[s]}"
+        for s in ("running", "queued")
+        if counts.get(s)
+    ]
+    txt = "Cola: " + (", ".join(pending) or "sin trabajos pendientes")
+    if nxt := JOBS.next_nightly():
+        txt += f" · generación nocturna {nxt:%d/%m %H:%M}"
+    dpg.set_value(TAG_LBL_JOBS, txt)
+
+
+def on_job_changed(job: jobs.Job):
+    log_message(job.summary(), "error" if job.state == "failed" else "info")
+    refresh_jobs_label()
+    if job.id in FORM_JOBS and job.state in ("done", "failed"):
+        on_done(job)
+
+
+def _log_notes(job: jobs.Job) -> None:
+    """Notas del proceso hijo: avisos de graphs y resumen de la generación."""
+    for note in filter(None, job.notes.splitlines()):
+        if note.startswith(jobs.WARN_PREFIX):
+            log_message(note[len(jobs.WARN_PREFIX) :], "warn")
+        else:
+            log_message(note)
+
+
+def on_done(job: jobs.Job, reused: bool = False):
+    cl, email, data_dir = FORM_JOBS.pop(job.id)
+    dpg.configure_item(TAG_SPINNER, show=bool(FORM_JOBS))
+    if job.state == "failed":
+        _log_notes(job)
+        return _err(f"Error: {job.message}")
+    if not job.finished_ok:
+        return _err("No se generó .pptx")
+
+    global EDIT_MODE, ACTIVE_EMAIL, DATA_DIR_USED
     if EDIT_MODE == "new":
         PROFILES.append(Profile(cl, email, True))
         ACTIVE_EMAIL = email
@@ -414,13 +884,20 @@ def on_done(fut, cl, email):
             p.validated = True
 
     EDIT_MODE = None
+    DATA_DIR_USED = data_dir
     save_config(ACTIVE_EMAIL)
     refresh_combo()
     hide_inputs()
-    if dst and ppt:
-        dpg.configure_item(TAG_BTN_OPEN_FOLDER, user_data=dst, show=True)
-        dpg.configure_item(TAG_BTN_OPEN_PPTX, user_data=ppt, show=True)
-        log_message(f"Archivo disponible en {dst}")
+    dst = str(Path(job.output).parent)
+    dpg.configure_item(TAG_BTN_OPEN_FOLDER, user_data=dst, show=True)
+    dpg.configure_item(TAG_BTN_OPEN_PPTX, user_data=job.output, show=True)
+    log_message(f"Archivo disponible en {dst}")
+    if reused:
+        return set_status(f"Sin cambios en los datos: se reutiliza el trabajo #{job.id}.")
+    _log_notes(job)
+    msg = "Presentación generada."
+    if profile_dir := job.options.get("profile_dir"):
+        msg += f" Perfil en {profile_dir}"
     set_status(msg)
 
 
@@ -453,6 +930,7 @@ def resize_cb(_, data):
         dpg.configure_item(t, width=each)
 
     dpg.configure_item(TAG_INFO, wrap=usable_w)
+    dpg.configure_item(TAG_LBL_SUGGEST, wrap=usable_w)
 
     if dpg.does_item_exist(TAG_HEADER_GROUP):
         w_head, h_head = dpg.get_item_rect_size(TAG_HEADER_GROUP)
@@ -510,9 +988,17 @@ def build_ui():
             dpg.add_button(label="Eliminar", tag=TAG_BTN_DEL, callback=on_del)
 
         dpg.add_text("Nombre del Chapter Leader:", tag="lbl_nombre", show=False)
-        dpg.add_input_text(tag=TAG_INPUT_CL, hint=HINT_NAME, show=False)
+        dpg.add_input_text(
+            tag=TAG_INPUT_CL, hint=HINT_NAME, show=False, callback=on_leader_typed
+        )
         dpg.add_text("Correo del Chapter Leader:", tag="lbl_correo", show=False)
-        dpg.add_input_text(tag=TAG_INPUT_EMAIL, hint=HINT_EMAIL, show=False)
+        dpg.add_input_text(
+            tag=TAG_INPUT_EMAIL, hint=HINT_EMAIL, show=False, callback=on_leader_typed
+        )
+        dpg.add_text(
+            "", tag=TAG_LBL_SUGGEST, wrap=WIN_INIT_W, color=COLOR_WARN, show=False
+        )
+        dpg.add_group(tag=TAG_GRP_SUGGEST, show=False)
 
         dpg.add_text(
             "Los cambios se guardarán automáticamente\ncuando la presentación se genere correctamente.",
@@ -550,10 +1036,19 @@ def build_ui():
                 show=False,
             )
 
+        dpg.add_checkbox(
+            label="Perfilar la generación (guarda en ./profiles)",
+            default_value=False,
+            tag=TAG_CHK_PROFILE,
+        )
+
         dpg.add_spacer(height=6)
         dpg.add_button(
             label="Generar presentación", tag=TAG_BTN_GENERAR, callback=generar_cb
         )
+        dpg.add_button(
+            label="Validar fuentes", tag=TAG_BTN_VALIDAR, callback=validar_cb
+        )
         dpg.add_button(
             label="Abrir carpeta",
             tag=TAG_BTN_OPEN_FOLDER,
@@ -568,10 +1063,37 @@ def build_ui():
         )
 
         dpg.add_text("", tag=TAG_LBL_STATUS)
+        dpg.add_text("", tag=TAG_LBL_JOBS, color=COLOR_INFO)
+
+        with dpg.collapsing_header(
+            label="Vista previa de datos", tag=TAG_PREVIEW_HEADER, default_open=False
+        ):
+            with dpg.group(horizontal=True):
+                dpg.add_combo(
+                    PREVIEW_CHARTS,
+                    default_value=PREVIEW_CHARTS[0],
+                    tag=TAG_COMBO_CHART,
+                    width=180,
+                    callback=draw_preview,
+                )
+                dpg.add_combo(
+                    [], tag=TAG_COMBO_SQUAD, width=140, callback=draw_preview
+                )
+                dpg.add_button(
+                    label="Actualizar", tag=TAG_BTN_PREVIEW, callback=preview_cb
+                )
+            dpg.add_text("", tag=TAG_LBL_PREVIEW, color=COLOR_INFO)
+            with dpg.plot(tag=TAG_PLOT, height=260, no_title=True):
+                dpg.add_plot_legend()
+                dpg.add_plot_axis(dpg.mvXAxis, tag=TAG_PLOT_X)
+                dpg.add_plot_axis(dpg.mvYAxis, tag=TAG_PLOT_Y)
+
         dpg.add_separator()
 
         dpg.add_text("Registro de mensajes:")
-        dpg.add_child_window(tag=TAG_LOG_CHILD, height=140, border=True)
+        with dpg.child_window(tag=TAG_LOG_CHILD, height=140, border=True):
+            for i in range(LOG_LINES):
+                dpg.add_text("", tag=_log_tag(i), show=False)
 
     (
         dpg.add_viewport_resize_callback  # type: ignore[attr-defined]
@@ -588,6 +1110,10 @@ def build_ui():
 
 # ╔══════════════════ MAIN ═══════════════════════════════════════════╗
 if __name__ == "__main__":
+    # La ingesta usa procesos hijos; en el ejecutable PyInstaller deben
+    # arrancar sin volver a abrir la GUI.
+    multiprocessing.freeze_support()
+    FILE_LOG = _file_logger()
     dpg.create_context()
     build_ui()
     dpg.create_viewport(
@@ -599,5 +1125,15 @@ if __name__ == "__main__":
     dpg.set_primary_window(TAG_ROOT, True)
     dpg.setup_dearpygui()
     dpg.show_viewport()
-    dpg.start_dearpygui()
+    # Fuentes y maquetado de texto listos antes del primer «Generar» (mismo
+    # hilo de trabajo: una generación temprana simplemente espera detrás)
+    EXECUTOR.submit(mpl_setup.prewarm).add_done_callback(
+        lambda fut: _invoke(log_message, f"Motor de gráficas listo en {fut.result():.1f} s")
+    )
+    JOBS.start()
+    refresh_jobs_label()
+    while dpg.is_dearpygui_running():
+        pump_frame()
+        dpg.render_dearpygui_frame()
+    JOBS.stop()  # lo que quede en cola sigue ahí en el próximo arranque
     dpg.destroy_context()
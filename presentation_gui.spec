@@ -1,12 +1,20 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+import subprocess
+import sys
+
 block_cipher = None
 
+# Lista de fuentes y estilo de matplotlib precalculados (ver mpl_setup.py)
+subprocess.run(
+    [sys.executable, 'mpl_setup.py', '--build-seed', 'build/mplconfig_seed'], check=True
+)
+
 
 added_files = [
     ('files', 'files'),
     ('inputs/Template.pptx', 'inputs'),
-    ('generate_presentation.py', '.')
+    ('build/mplconfig_seed', 'mplconfig_seed'),
 ]
 
 hidden = [
@@ -18,6 +26,7 @@ hidden = [
     'pyarrow',
     'pptx',
     'dearpygui.dearpygui',
+    'generate_presentation',
 ]
 
 
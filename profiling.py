@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+profiling.py – Perfilado de una corrida completa sin herramientas externas.
+
+Modos:
+• cprofile → <nombre>_<fecha>.prof (pstats) y un resumen .txt por tiempo acumulado.
+• sample   → <nombre>_<fecha>.collapsed: pilas muestreadas cada SAMPLE_INTERVAL
+             en formato «a;b;c N», listo para flamegraph.pl, speedscope o inferno.
+• both     → ambos a la vez (el muestreo ve también el costo de cProfile).
+
+Uso:
+    with profiling.profiled("graphs", "both") as run:
+        ...
+    print(run.files)
+
+Sólo se perfila el proceso actual: los procesos hijo del pool de conversión
+no aparecen (sí el tiempo que el padre pasa esperándolos).
+"""
+
+from __future__ import annotations
+
+import cProfile
+import datetime as dt
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# ───────────── CONFIG ─────────────
+PROFILE_MODES = ("cprofile", "sample", "both")
+PROFILE_DIR = "profiles"
+SAMPLE_INTERVAL = 0.005  # segundos entre muestras
+SUMMARY_LINES = 40
+
+
+class StackSampler:
+    """Muestrea las pilas de los hilos del perfilado con sys._current_frames()."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+        self._owner = 0
+        self._skip: set[int] = set()
+
+    def start(self) -> None:
+        # Hilo que entra al perfilado + los que se creen después (p.ej. el
+        # productor del modo --stream); no el bucle de la GUI ni otros previos.
+        self._owner = threading.get_ident()
+        self._skip = {t.ident for t in threading.enumerate() if t.ident} - {self._owner}
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == me or tid in self._skip:
+                    continue
+                if tid not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, n in self.stacks.most_common():
+                fh.write(f"{stack} {n}\n")
+
+
+@dataclass
+class ProfileRun:
+    name: str
+    mode: str
+    seconds: float = 0.0
+    files: list[str] = field(default_factory=list)
+
+
+def _write_summary(prof: cProfile.Profile, path: str, seconds: float) -> None:
+    buf = io.StringIO()
+    st = pstats.Stats(prof, stream=buf)
+    st.strip_dirs().sort_stats("cumulative").print_stats(SUMMARY_LINES)
+    st.sort_stats("tottime").print_stats(SUMMARY_LINES)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(f"Tiempo total: {seconds:.2f} s\n")
+        fh.write(buf.getvalue())
+
+
+@contextmanager
+def profiled(name: str, mode: str = "both", out_dir: str | None = None):
+    """Perfila el bloque; al salir escribe los archivos en *out_dir*."""
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Modo de perfilado desconocido: {mode!r}")
+    out_dir = out_dir or PROFILE_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{name}_{dt.datetime.now():%Y%m%d-%H%M%S}")
+    run = ProfileRun(name, mode)
+
+    prof = cProfile.Profile() if mode in ("cprofile", "both") else None
+    sampler = StackSampler() if mode in ("sample", "both") else None
+    t0 = time.perf_counter()
+    if sampler:
+        sampler.start()
+    if prof:
+        prof.enable()
+    try:
+        yield run
+    finally:
+        if prof:
+            prof.disable()
+        if sampler:
+            sampler.stop()
+        run.seconds = time.perf_counter() - t0
+
+        if prof:
+            prof.dump_stats(f"{base}.prof")
+            _write_summary(prof, f"{base}.txt", run.seconds)
+            run.files += [f"{base}.prof", f"{base}.txt"]
+        if sampler:
+            sampler.write(f"{base}.collapsed")
+            run.files.append(f"{base}.collapsed")
+        print(f"✅ Perfil ({mode}, {run.seconds:.1f} s): {', '.join(run.files)}")
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ranking.py – Posición del Chapter Leader entre todos sus pares.
+
+Una sola pasada por fuente y sin filtrar por líder: se leen de la caché
+Parquet, por lotes, sólo la columna del CL y las de la métrica, y un groupby
+acumula numerador y denominador por líder. El resultado (una fila por líder,
+unos KiB) se guarda en <cache>/org_rollup.parquet con la huella de los Excel de
+origen; cada presentación sólo lee ese archivo y calcula su percentil.
+
+Métricas:
+• % reversiones (Calidad)     → reversiones / pases; mejor bajo
+• dedicación media (DR)       → mejor alto
+• nivel LEP medio (Madurez)   → media de todas las celdas LEP_*; mejor alto
+• TMD medio (TMD)             → mejor bajo
+
+Uso:
+    python ranking.py --root ./files --cl "Nombre del CL"
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import graphs
+
+# ───────────── CONFIG ─────────────
+ROLLUP_FILE = "org_rollup.parquet"
+ROLLUP_VERSION = 2  # subir al cambiar el cálculo de alguna métrica
+ROLLUP_KEY = b"ranking.sources"  # metadato: huella de los Excel de origen
+MIN_ROWS = 10  # pases, registros o celdas mínimas para entrar en el ranking
+BAND_COLORS = ((66, "#2a9d8f"), (33, "#e9c46a"), (0, "#e76f51"))  # percentil ≥
+
+
+@dataclass(frozen=True)
+class Metric:
+    name: str
+    report: str  # reporte de graphs.REPORTS cuya fuente se lee
+    label: str
+    fmt: str  # formato del valor
+    lower_is_better: bool
+    scale: float = 1.0
+
+
+METRICS = (
+    Metric("reversiones", "calidad", "% reversiones", "{:.1f} %", True, 100.0),
+    Metric("dedicacion", "dedicacion", "Dedicación media", "{:.1f} h", False),
+    Metric("madurez", "madurez", "Nivel LEP medio", "{:.2f}", False),
+    Metric("tiempo", "tiempo", "TMD medio", "{:.1f} días", True),
+)
+VALUE_COLUMNS = {
+    "dedicacion": ["Dedicación"],
+    "madurez": ["LEP_*"],
+    "tiempo": ["Tiempo Desarrollo"],
+}
+
+
+# ───────────── ORIGEN ─────────────
+def _source_paths() -> dict[str, str]:
+    """Reporte → Excel más reciente (el mismo que usa la presentación)."""
+    out = {}
+    for m in METRICS:
+        keyword = graphs.FILE_KEYWORDS[graphs.REPORTS[m.report].source]
+        if found := graphs._find_file_by_keyword(keyword, quiet=True):
+            out[m.report] = found
+    return out
+
+
+def sources() -> list[tuple[str, str | None]]:
+    """(Excel, hoja) que lee el rollup, p.ej. para precalentarlos en paralelo."""
+    return [
+        (fp, sheet)
+        for report, fp in _source_paths().items()
+        for sheet in graphs.SOURCE_SHEETS[report]
+    ]
+
+
+def sources_stamp() -> str:
+    """Huella de los Excel de origen: cambia si cambia cualquiera de ellos."""
+    key: list = [ROLLUP_VERSION, MIN_ROWS]
+    for report, fp in sorted(_source_paths().items()):
+        key.append([report, os.path.basename(fp), graphs._source_stamp(fp).decode()])
+    return json.dumps(key, ensure_ascii=False)
+
+
+def rollup_path() -> str:
+    return os.path.join(graphs.CACHE_DIR, ROLLUP_FILE)
+
+
+# ───────────── ROLLUP (una pasada por fuente) ─────────────
+def _leader_column(cp: str, report: str) -> str | None:
+    names = pq.read_schema(cp).names
+    return graphs._match_required(names, graphs.REQUIRED_COLUMNS[report][0])
+
+
+def _metric_rows(metric: Metric, fp: str) -> pd.DataFrame:
+    """num/den de *metric* por valor original de la columna del CL."""
+    empty = pd.DataFrame(columns=["num", "den"], dtype="float64")
+    if metric.name == "reversiones":
+        # Sólo hacen falta filas por líder: las da el índice de líderes (sidecar)
+        counts = {}
+        for sheet in graphs.CALIDAD_SHEETS:
+            cp = graphs.warm_cache(fp, sheet, graphs.CACHE_DIR)
+            if (col := _leader_column(cp, metric.report)) is None:
+                return empty
+            values = graphs._leader_index(cp, col)["values"]
+            counts[sheet] = pd.Series(values, dtype="float64")
+        passes = counts["Consolidado Pases"]
+        revs = counts["Consolidado Reversiones"]
+        return pd.DataFrame({"num": revs, "den": passes}).fillna(0.0)
+
+    cp = graphs.warm_cache(fp, graphs.SOURCE_SHEETS[metric.report][0], graphs.CACHE_DIR)
+    col = _leader_column(cp, metric.report)
+    names = pq.read_schema(cp).names
+    cols = graphs._columns_for(names, VALUE_COLUMNS[metric.name])
+    if col is None or not cols:
+        return empty
+
+    parts = []
+    for batch in pq.ParquetFile(cp).iter_batches(graphs.CHUNK_ROWS, columns=[col, *cols]):
+        df = batch.to_pandas()
+        v = df[cols].apply(pd.to_numeric, errors="coerce")
+        frame = pd.DataFrame({"num": v.sum(axis=1), "den": v.notna().sum(axis=1)})
+        parts.append(frame.groupby(df[col], observed=True).sum())
+    return pd.concat(parts).groupby(level=0).sum() if parts else empty
+
+
+def build_rollup() -> pd.DataFrame:
+    """Una fila por líder: valores originales del nombre y num/den por métrica."""
+    paths = _source_paths()
+    raws: dict[str, set[str]] = {}
+    cols = {}
+    for m in METRICS:
+        if m.report not in paths:
+            continue
+        rows = _metric_rows(m, paths[m.report])
+        rows.index = rows.index.astype(str)
+        norms = rows.index.map(graphs.normalize_name)
+        for raw, norm in zip(rows.index, norms):
+            raws.setdefault(norm, set()).add(raw)
+        g = rows.groupby(norms).sum()
+        cols[f"{m.name}_num"], cols[f"{m.name}_den"] = g["num"], g["den"]
+
+    out = pd.DataFrame(cols).fillna(0.0)
+    out = out[out.index != ""]
+    out.index.name = "leader"
+    out.insert(0, "valores", [sorted(raws[n]) for n in out.index])
+    return out.reset_index()
+
+
+def load_rollup() -> pd.DataFrame:
+    """El rollup de la caché; se recalcula si cambió algún Excel de origen."""
+    path, stamp = rollup_path(), sources_stamp()
+
+    def fresh() -> pd.DataFrame | None:
+        if not os.path.isfile(path):
+            return None
+        table = pq.read_table(path)
+        if (table.schema.metadata or {}).get(ROLLUP_KEY) != stamp.encode():
+            return None
+        return table.to_pandas()
+
+    if (df := fresh()) is not None:
+        return df
+    os.makedirs(graphs.CACHE_DIR, exist_ok=True)
+    with graphs._file_lock(path) as locked:
+        # Otro proceso pudo calcularlo mientras esperábamos
+        if locked and (df := fresh()) is not None:
+            return df
+        df = build_rollup()
+        if locked:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            meta = {**(table.schema.metadata or {}), ROLLUP_KEY: stamp.encode()}
+            with graphs._atomic_target(path) as tmp:
+                pq.write_table(table.replace_schema_metadata(meta), tmp)
+    return df
+
+
+# ───────────── RANKING DEL CL ─────────────
+def leader_ranking(rollup: pd.DataFrame) -> tuple[str, pd.DataFrame] | None:
+    """(nombre, tabla por métrica) del CL configurado; None si no aparece.
+
+    percentil = % de pares (con ≥ MIN_ROWS) a los que supera; 100 = el mejor.
+    """
+    li = graphs.LeaderIndex.from_counts(
+        (raw, 1) for raws in rollup["valores"] for raw in raws
+    )
+    norm = graphs._resolve_leader(
+        li, "ranking", graphs.CHAPTER_LEADER, graphs.CHAPTER_LEADER_EMAIL
+    )
+    if norm is None:
+        return None
+    me = rollup.index[rollup["leader"] == norm]
+
+    rows = []
+    for m in METRICS:
+        if f"{m.name}_den" not in rollup:
+            continue
+        num, den = rollup[f"{m.name}_num"], rollup[f"{m.name}_den"]
+        value = m.scale * num / den.where(den > 0)
+        peers = value[den >= MIN_ROWS]
+        mine = value[me].iloc[0] if len(me) and den[me].iloc[0] >= MIN_ROWS else np.nan
+        pct = np.nan
+        if pd.notna(mine) and len(peers) > 1:
+            worse = (peers > mine) if m.lower_is_better else (peers < mine)
+            ties = (peers == mine).sum() - 1  # sin contarse a sí mismo
+            pct = 100 * (worse.sum() + 0.5 * ties) / (len(peers) - 1)
+        rows.append(
+            {
+                "metrica": m.name,
+                "etiqueta": m.label,
+                "valor": mine,
+                "mediana": peers.median(),
+                "percentil": pct,
+                "lideres": len(peers),
+            }
+        )
+    return li.display[norm], pd.DataFrame(rows)
+
+
+def _band_color(pct: float) -> str:
+    return next(c for lo, c in BAND_COLORS if pct >= lo)
+
+
+def plot_ranking(path: str | None = None) -> None:
+    """Gráfica de percentiles del CL.
+
+    *path* (rollup_path()) sólo identifica la sección en la presentación: el
+    rollup siempre es el de la carpeta de datos actual.
+    """
+    res = leader_ranking(load_rollup())
+    if res is None:
+        return graphs._warn("El CL no aparece en ninguna fuente: sin ranking.")
+    _draw_ranking(*res)
+
+
+def _draw_ranking(who: str, df: pd.DataFrame) -> None:
+    if df.empty:
+        return graphs._warn("Sin métricas para el ranking.")
+    fmts = {m.name: m.fmt for m in METRICS}
+    df = df.iloc[::-1]
+    pct = df["percentil"].fillna(0.0)
+    fig, ax = plt.subplots(figsize=(10, 0.9 * len(df) + 1.4))
+    ax.barh(df["etiqueta"], pct, color=[_band_color(p) for p in pct], height=0.55)
+    ax.axvline(50, color="grey", ls="--", lw=1)
+    for y, row in enumerate(df.itertuples()):
+        if pd.isna(row.percentil):
+            txt = "sin datos suficientes"
+        else:
+            fmt = fmts[row.metrica]
+            txt = (
+                f"P{row.percentil:.0f} · {fmt.format(row.valor)} "
+                f"(mediana {fmt.format(row.mediana)}, {row.lideres} líderes)"
+            )
+        ax.text(pct.iloc[y] + 1, y, txt, va="center", fontsize=9)
+    ax.grid(axis="y", visible=False)
+    ax.set_xlim(0, 130)
+    ax.set_xticks(range(0, 101, 25))
+    ax.set_xlabel("Percentil entre Chapter Leaders (100 = mejor)")
+    ax.set_title(f"Posición en la organización – {who}", fontweight="bold")
+    plt.tight_layout()
+    plt.show()
+
+
+# ───────────── CLI ─────────────
+def parse_args():
+    p = argparse.ArgumentParser(description="Ranking del CL entre sus pares")
+    p.add_argument("--root", default=None, help="Carpeta de datos")
+    p.add_argument("--cl", default=None, help="Chapter Leader")
+    p.add_argument("--email", default="", help="Correo del Chapter Leader")
+    return p.parse_args()
+
+
+def main() -> None:
+    a = parse_args()
+    if a.root:
+        graphs.set_data_dir(a.root)
+    if a.cl:
+        graphs.set_chapter_leader(graphs.confirm_leader(a.cl, a.email), a.email)
+    t0 = time.perf_counter()
+    rollup = load_rollup()
+    print(f"✅ Rollup: {len(rollup)} líderes en {time.perf_counter() - t0:.2f} s")
+    if (res := leader_ranking(rollup)) is None:
+        raise SystemExit(1)
+    who, df = res
+    print(f"   {who}")
+    for row in df.itertuples():
+        print(
+            f"   {row.etiqueta:<18} valor {row.valor:8.2f}  mediana {row.mediana:8.2f}"
+            f"  P{row.percentil:>3.0f} de {row.lideres}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del proyecto viven en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PERF_ENV = "CHAPTER_PERF"
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        f"perf: tiempo y memoria contra perf_baseline.json (-m perf o {PERF_ENV}=1)",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # Las mediciones dependen de la máquina y tardan: sólo a petición
+    if os.environ.get(PERF_ENV) or "perf" in (config.getoption("markexpr") or ""):
+        return
+    skip = pytest.mark.skip(reason=f"medición de rendimiento: -m perf o {PERF_ENV}=1")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,74 @@
+"""Validación de fuentes sólo con cabeceras (--check y la GUI)."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+import graphs
+
+LEADER = "ANA MARIA TORRES QUISPE"
+
+
+def _dr(leaders: list[str]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Nombre CL": leaders,
+            "Nombres": [f"DEV {i}" for i in range(len(leaders))],
+            "Dedicación": [1.0] * len(leaders),
+        }
+    )
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    with graphs.configured(LEADER, "", str(tmp_path)):
+        yield tmp_path
+
+
+def test_xlsx_headers_reads_every_sheet(tmp_path):
+    path = tmp_path / "Calidad.xlsx"
+    with pd.ExcelWriter(path) as xw:
+        pd.DataFrame({"Chapter leader": ["A"], "Mes": ["Ene"], 2025: [1]}).to_excel(
+            xw, sheet_name="Consolidado Pases", index=False
+        )
+        pd.DataFrame({"Squad": ["S"], "Código": ["X1"]}).to_excel(
+            xw, sheet_name="Consolidado Reversiones", index=False
+        )
+    assert graphs._xlsx_headers(str(path)) == {
+        "Consolidado Pases": ["Chapter leader", "Mes", "2025"],
+        "Consolidado Reversiones": ["Squad", "Código"],
+    }
+
+
+def test_missing_file_and_column(data_dir):
+    assert graphs.check_source("dedicacion", None).path is None
+    gone = graphs.check_source("dedicacion", str(data_dir / "no_existe.xlsx"))
+    assert gone.path is None and not gone.ok
+
+    path = data_dir / "DR.xlsx"
+    _dr([LEADER]).drop(columns="Dedicación").to_excel(path, index=False)
+    res = graphs.check_source("dedicacion", str(path))
+    assert res.missing == ["«Dedicación»"]
+    assert res.rows is None and not res.ok
+
+
+def test_missing_sheet(data_dir):
+    path = data_dir / "Calidad.xlsx"
+    cols = {"Chapter leader": [LEADER], "Mes": ["Ene"], "Squad": ["S"]}
+    pd.DataFrame(cols).to_excel(path, sheet_name="Consolidado Pases", index=False)
+    res = graphs.check_source("calidad", str(path))
+    assert res.missing == ["hoja «Consolidado Reversiones»"]
+
+
+def test_rows_are_counted_only_once_cached(data_dir):
+    path = str(data_dir / "DR.xlsx")
+    _dr([LEADER, "OTRO LIDER", LEADER.lower()]).to_excel(path, index=False)
+    res = graphs.check_source("dedicacion", path)
+    assert (res.ok, res.missing, res.rows) == (True, [], None)  # sin caché
+
+    graphs.read_any(path)
+    assert graphs.check_source("dedicacion", path).rows == 2
+    with graphs.configured("NADIE", "", str(data_dir)):
+        res = graphs.check_source("dedicacion", path)
+    assert res.rows == 0 and not res.ok
@@ -0,0 +1,78 @@
+"""Agregación por lotes frente a la agregación en memoria."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import graphs
+
+LEADER = "ANA MARIA TORRES QUISPE"
+
+
+@pytest.fixture
+def exports(tmp_path, monkeypatch):
+    rng = np.random.default_rng(33)
+    rows = 3000
+    tmd = pd.DataFrame(
+        {
+            "Nombre CL": rng.choice([LEADER, "OTRO LIDER"], rows),
+            "Descripción tribu": rng.choice([f"TRIBU {i}" for i in range(4)], rows),
+            "Descripción squad": rng.choice([f"SQ {i:02d}" for i in range(25)], rows),
+            "Tiempo Desarrollo": rng.gamma(2.0, 6.0, rows).round(3),
+        }
+    )
+    tmd.loc[::97, "Tiempo Desarrollo"] = np.nan
+    dr = pd.DataFrame(
+        {
+            "Nombre CL": rng.choice([LEADER, "OTRO LIDER"], rows),
+            "Nombres": rng.choice([f"DEV {i:03d}" for i in range(60)], rows),
+            "Dedicación": rng.choice([0.1, 0.2, 0.3, 1 / 3, 0.7], rows),
+        }
+    )
+    paths = {"tiempo": tmp_path / "TMD.xlsx", "dedicacion": tmp_path / "DR.xlsx"}
+    tmd.to_excel(paths["tiempo"], index=False)
+    dr.to_excel(paths["dedicacion"], index=False)
+    monkeypatch.setattr(graphs, "CHUNK_ROWS", 128)  # muchos lotes
+    with graphs.configured(LEADER, "", str(tmp_path)):
+        yield {k: str(v) for k, v in paths.items()}
+
+
+# Kahan por lote y entre lotes frente a una sola pasada de pandas: mismo
+# índice y orden, y las medias a lo sumo difieren en el último bit
+RTOL = 1e-14
+
+
+def _both(monkeypatch, fn, fp):
+    out = []
+    for chunked in (False, True):
+        monkeypatch.setattr(graphs, "CHUNKED_AGG", chunked)
+        out.append(fn(fp))
+    return out
+
+
+def test_chunked_tmd_matches_in_memory(exports, monkeypatch):
+    mem, chunked = _both(monkeypatch, graphs._tmd_avgs, exports["tiempo"])
+    for a, b in zip(mem, chunked):
+        pd.testing.assert_index_equal(a.index, b.index, exact=True)
+        pd.testing.assert_series_equal(a, b, rtol=RTOL, atol=0)
+
+
+def test_chunked_dedicacion_matches_in_memory(exports, monkeypatch):
+    mem, chunked = _both(monkeypatch, graphs._dedicacion_avg, exports["dedicacion"])
+    pd.testing.assert_index_equal(mem.index, chunked.index, exact=True)
+    pd.testing.assert_series_equal(mem, chunked, rtol=RTOL, atol=0)
+
+
+def test_tmd_agg_leaves_input_frame_untouched():
+    df = pd.DataFrame(
+        {
+            "Descripción tribu": ["T"] * 2,
+            "Descripción squad": ["S"] * 2,
+            "Tiempo Desarrollo": ["4", "x"],
+        }
+    )
+    before = df.copy()
+    graphs._tmd_agg({None: df})
+    pd.testing.assert_frame_equal(df, before)
@@ -0,0 +1,93 @@
+"""Cambios del mes entre dos exports con el mismo nombre en carpetas por mes."""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import delta
+import graphs
+
+LEADER = "ANA MARIA TORRES QUISPE"
+EXPORT = "DR__Reporte_detallado_general.xlsx"
+
+
+def _dr(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    return pd.DataFrame(
+        {
+            "Nombre CL": np.where(np.arange(rows) % 3 == 0, LEADER, "OTRO LIDER"),
+            "Matricula TM": [f"T{i:05d}" for i in range(rows)],
+            "Nombres": [f"DEV {i:03d}" for i in range(rows)],
+            "Dedicación": rng.choice([0.5, 1.0, 1.5, 2.0], rows),
+        }
+    )
+
+
+@pytest.fixture
+def two_months(tmp_path):
+    old = _dr(300)
+    new = old.drop(index=range(0, 15)).copy()  # 15 bajas
+    new.loc[30:59, "Dedicación"] += 0.5  # 30 cambios
+    for month, df, mtime in (("2025 04", old, 1_000_000), ("2025 05", new, 2_000_000)):
+        path = tmp_path / month / EXPORT
+        path.parent.mkdir()
+        df.to_excel(path, index=False)
+        os.utime(path, (mtime, mtime))
+    graphs.set_data_dir(str(tmp_path))
+    graphs.set_chapter_leader(LEADER)
+    return tmp_path
+
+
+def test_same_name_exports_get_separate_cache_entries(two_months):
+    old, new = (str(two_months / m / EXPORT) for m in ("2025 04", "2025 05"))
+    assert graphs._cache_path(old) != graphs._cache_path(new)
+
+
+def test_month_changes_across_month_folders(two_months):
+    assert delta.periods("dedicacion") == tuple(
+        str(two_months / m / EXPORT) for m in ("2025 05", "2025 04")
+    )
+    (d,) = delta.month_changes()
+    assert (d.added, d.removed, d.changed) == (0, 15, 30)
+    # Sólo las filas del CL (una de cada tres) llegan a la slide
+    assert sum(txt == "Baja" for _, txt in d.lines) == 5
+    assert sum(txt.startswith("Dedicación") for _, txt in d.lines) == 10
+
+
+def _tmd(rows: int) -> pd.DataFrame:
+    squad = np.arange(rows) // 50  # un squad por row group
+    return pd.DataFrame(
+        {
+            "Nombre CL": np.where(np.arange(rows) % 2 == 0, LEADER, "OTRO LIDER"),
+            "Descripción squad": [f"SQ {s:02d}" for s in squad],
+            "Tiempo Desarrollo": (squad + 1).astype("float64"),
+        }
+    )
+
+
+def test_tmd_lines_read_only_changed_squads(tmp_path, monkeypatch):
+    old_cp, new_cp = str(tmp_path / "old.parquet"), str(tmp_path / "new.parquet")
+    old = _tmd(500)
+    new = pd.concat([old, old.iloc[[100]].assign(**{"Tiempo Desarrollo": 30.0})])
+    old.to_parquet(old_cp, row_group_size=50, index=False)
+    new.to_parquet(new_cp, row_group_size=50, index=False)
+    d = delta.SheetDiff(
+        np.array([500]), np.empty(0, "int64"), *[np.empty(0, "int64")] * 2, 501
+    )
+    reads: list[int] = []
+    read = delta.pq.ParquetFile.read_row_group
+    monkeypatch.setattr(
+        delta.pq.ParquetFile,
+        "read_row_group",
+        lambda self, i, **kw: (reads.append(i), read(self, i, **kw))[1],
+    )
+    with graphs.configured(LEADER, "", str(tmp_path)):
+        lines = delta._tmd_lines(d, old_cp, new_cp)
+    # SQ 02: 25 filas del CL con 3 días + una de 30 → media 4.0
+    assert lines == [("SQ 02", "TMD 3.0 → 4.0 días")]
+    # la fila nueva (último row group del nuevo) y el squad en el anterior
+    assert sorted(reads) == [2, 10]
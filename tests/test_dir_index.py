@@ -0,0 +1,102 @@
+"""Índice de la carpeta de datos (graphs._DirIndex) y su TTL."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+import graphs
+
+
+def _touch(path, data: bytes = b"x", mtime: int | None = None) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def _names(entries) -> list[str]:
+    return [os.path.basename(e.path) for e in entries]
+
+
+@pytest.fixture
+def root(tmp_path):
+    _touch(tmp_path / "TMD_enero.xlsx", mtime=1_000_000)
+    _touch(tmp_path / "2025 05" / "TMD_mayo.xlsx", mtime=2_000_000)
+    _touch(tmp_path / "~$TMD_abierto.xlsx")  # bloqueo de Excel: no cuenta
+    # Como en una carpeta ya usada: si no, crearla al guardar el índice cambia
+    # el mtime de la raíz y ésta se lista una vez más
+    (tmp_path / graphs.CACHE_SUBDIR).mkdir()
+    return tmp_path
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    """Carpetas listadas con os.scandir, en orden."""
+    out: list[str] = []
+    scan = graphs._DirIndex._scan
+
+    def counted(self, path, mtime_ns):
+        out.append(path)
+        scan(self, path, mtime_ns)
+
+    monkeypatch.setattr(graphs._DirIndex, "_scan", counted)
+    return out
+
+
+def test_finds_newest_first_including_month_folders(root):
+    idx = graphs._DirIndex(str(root))
+    assert _names(idx.find("TMD")) == ["TMD_mayo.xlsx", "TMD_enero.xlsx"]
+
+
+def test_within_ttl_the_folder_is_not_checked(root, scans, monkeypatch):
+    monkeypatch.setattr(graphs, "DIR_INDEX_TTL", 3600.0)
+    idx = graphs._DirIndex(str(root))
+    idx.find("TMD")
+    _touch(root / "TMD_junio.xlsx")
+    assert "TMD_junio.xlsx" not in _names(idx.find("TMD"))
+    assert len(scans) == 2  # raíz y «2025 05», una sola vez
+    monkeypatch.setattr(graphs, "DIR_INDEX_TTL", 0.0)
+    assert "TMD_junio.xlsx" in _names(idx.find("TMD"))
+
+
+def test_after_ttl_only_changed_folders_are_listed(root, scans, monkeypatch):
+    monkeypatch.setattr(graphs, "DIR_INDEX_TTL", 0.0)
+    idx = graphs._DirIndex(str(root))
+    idx.find("TMD")
+    scans.clear()
+    _touch(root / "2025 05" / "DR_mayo.xlsx")
+    st = os.stat(root / "2025 05")
+    os.utime(root / "2025 05", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert _names(idx.find("DR")) == ["DR_mayo.xlsx"]
+    assert scans == [str(root / "2025 05")]
+
+
+def test_overwritten_file_reports_its_new_size(root, monkeypatch):
+    monkeypatch.setattr(graphs, "DIR_INDEX_TTL", 3600.0)
+    idx = graphs._DirIndex(str(root))
+    idx.find("ENERO")
+    _touch(root / "TMD_enero.xlsx", b"mucho mas grande", mtime=3_000_000)
+    (entry,) = idx.find("ENERO")
+    assert (entry.size, entry.mtime_ns) == (16, 3_000_000 * 10**9)
+
+
+def test_saved_index_is_reused_by_a_new_process(root, scans, monkeypatch):
+    graphs._DirIndex(str(root)).find("TMD")
+    assert os.path.isfile(root / graphs.CACHE_SUBDIR / graphs.DIR_INDEX_FILE)
+    scans.clear()
+    monkeypatch.setattr(graphs, "DIR_INDEX_TTL", 0.0)
+    fresh = graphs._DirIndex(str(root))
+    assert _names(fresh.find("TMD")) == ["TMD_mayo.xlsx", "TMD_enero.xlsx"]
+    assert scans == []  # nada cambió: sólo stat de cada carpeta
+
+
+def test_removed_month_folder_drops_its_files(root, monkeypatch):
+    monkeypatch.setattr(graphs, "DIR_INDEX_TTL", 0.0)
+    idx = graphs._DirIndex(str(root))
+    idx.find("TMD")
+    os.remove(root / "2025 05" / "TMD_mayo.xlsx")
+    os.rmdir(root / "2025 05")
+    assert _names(idx.find("TMD")) == ["TMD_enero.xlsx"]
+    assert str(root / "2025 05") not in idx.dirs
@@ -0,0 +1,84 @@
+"""LRU en memoria de las tablas leídas (graphs.FrameCache)."""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import graphs
+
+
+def _frame(rows: int = 1000) -> pd.DataFrame:
+    return pd.DataFrame({"v": np.arange(rows, dtype="float64")})
+
+
+def _size(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _key(name: str, stamp: bytes = b"1") -> tuple:
+    return ("raw", f"/datos/{name}.xlsx", None, stamp)
+
+
+def test_evicts_least_recently_used_first():
+    df = _frame()
+    cache = graphs.FrameCache(3 * _size(df))
+    for name in "abc":
+        cache.put(_key(name), df)
+    assert cache.get(_key("a")) is not None  # «a» pasa a ser la más reciente
+    cache.put(_key("d"), df)
+    assert cache.get(_key("b")) is None
+    assert all(cache.get(_key(n)) is not None for n in "acd")
+    assert cache.evictions == 1
+    assert cache.bytes == 3 * _size(df) <= cache.budget
+
+
+def test_frame_larger_than_budget_is_not_kept():
+    cache = graphs.FrameCache(_size(_frame(10)))
+    cache.put(_key("a"), _frame(10))
+    cache.put(_key("big"), _frame(10_000))
+    assert cache.get(_key("big")) is None
+    assert cache.get(_key("a")) is not None
+    assert cache.evictions == 0
+
+
+def test_new_source_version_replaces_the_old_one():
+    cache = graphs.FrameCache(10 * _size(_frame()))
+    cache.put(_key("a", b"old"), _frame())
+    cache.put(_key("a", b"new"), _frame())
+    assert cache.get(_key("a", b"old")) is None
+    assert len(cache.items) == 1
+    assert cache.bytes == _size(_frame())
+
+
+def test_hits_are_shallow_copies():
+    cache = graphs.FrameCache(10 * _size(_frame()))
+    cache.put(_key("a"), _frame())
+    got = cache.get(_key("a"))
+    got["extra"] = 1.0  # columnas nuevas del llamador no llegan a la caché
+    assert list(cache.get(_key("a")).columns) == ["v"]
+    assert (cache.hits, cache.misses) == (2, 0)
+
+
+@pytest.fixture
+def export(tmp_path, monkeypatch):
+    monkeypatch.setattr(graphs, "FRAMES", graphs.FrameCache(64 * 2**20))
+    path = tmp_path / "TMD.xlsx"
+    _frame(50).to_excel(path, index=False)
+    with graphs.configured("ANA", "", str(tmp_path)):
+        yield path
+
+
+def test_read_any_misses_again_after_the_source_changes(export):
+    graphs.read_any(str(export))
+    graphs.read_any(str(export))
+    assert (graphs.FRAMES.hits, graphs.FRAMES.misses) == (1, 1)
+    _frame(60).to_excel(export, index=False)
+    st = os.stat(export)
+    os.utime(export, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert len(graphs.read_any(str(export))) == 60
+    assert (graphs.FRAMES.hits, graphs.FRAMES.misses) == (1, 2)
+    assert len(graphs.FRAMES.items) == 1  # la versión anterior se descartó
@@ -0,0 +1,117 @@
+"""Cola de presentaciones: programación cron, deduplicación y reintentos."""
+
+from __future__ import annotations
+
+import datetime as dt
+import time
+
+import pytest
+
+import jobs
+
+LEADER = "ANA MARIA TORRES QUISPE"
+MONDAY = dt.datetime(2025, 6, 2, 10, 0)
+
+
+# ───────────── CRON ─────────────
+def test_cron_parse_fields():
+    c = jobs.Cron.parse("*/15 2 1,15 * 1-5")
+    assert c.minutes == {0, 15, 30, 45}
+    assert c.hours == {2}
+    assert c.days == {1, 15}
+    assert c.months == set(range(1, 13))
+    assert c.weekdays == {1, 2, 3, 4, 5}
+    assert jobs.Cron.parse("0 0 * * 7").weekdays == {0}  # 7 también es domingo
+
+
+@pytest.mark.parametrize("spec", ["* * * *", "60 * * * *", "0 24 * * *", "5-1 * * * *"])
+def test_cron_parse_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        jobs.Cron.parse(spec)
+
+
+def test_cron_last_and_next_fire():
+    weekdays = jobs.Cron.parse("30 2 * * 1-5")
+    assert weekdays.last_fire(MONDAY) == dt.datetime(2025, 6, 2, 2, 30)
+    # Antes de la hora del lunes: la última fue el viernes
+    early = MONDAY.replace(hour=2, minute=0)
+    assert weekdays.last_fire(early) == dt.datetime(2025, 5, 30, 2, 30)
+    # El propio instante cuenta como disparado; los segundos no importan
+    on_time = MONDAY.replace(hour=2, minute=30, second=59)
+    assert weekdays.last_fire(on_time) == dt.datetime(2025, 6, 2, 2, 30)
+    friday = dt.datetime(2025, 6, 6, 3, 0)
+    assert weekdays.next_fire(friday) == dt.datetime(2025, 6, 9, 2, 30)
+
+
+def test_cron_without_a_matching_day_never_fires():
+    feb30 = jobs.Cron.parse("0 0 30 2 *")
+    assert feb30.last_fire(MONDAY) is None
+    assert feb30.next_fire(MONDAY) is None
+
+
+# ───────────── JOBSTORE ─────────────
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "RETRY_BASE", 0.0)  # reintentos sin esperar
+    (tmp_path / "data").mkdir()
+    return jobs.JobStore(tmp_path / "jobs.db")
+
+
+def _enqueue(store, data_dir, **kw):
+    return store.enqueue(LEADER, "", str(data_dir), **kw)
+
+
+def test_enqueue_dedups_pending_jobs(store, tmp_path):
+    data = tmp_path / "data"
+    first, new = _enqueue(store, data, priority=jobs.PRIORITY_NIGHTLY)
+    again, new_again = _enqueue(store, data)
+    assert new and not new_again
+    assert again.id == first.id
+    assert again.priority == jobs.PRIORITY_INTERACTIVE  # hereda la más alta
+    other, new_other = _enqueue(store, data, options={"stream": True})
+    assert new_other and other.id != first.id
+
+
+def test_enqueue_reuses_a_finished_deck_while_it_exists(store, tmp_path):
+    data = tmp_path / "data"
+    job, _ = _enqueue(store, data)
+    claimed, _ = store.claim("test")
+    assert claimed.id == job.id
+    out = tmp_path / "deck.pptx"
+    out.write_bytes(b"pptx")
+    store.finish(job.id, {"ok": True, "output": str(out), "message": "ok"})
+    reused, new = _enqueue(store, data)
+    assert (reused.id, new) == (job.id, False)
+    out.unlink()
+    fresh, new = _enqueue(store, data)
+    assert new and fresh.id != job.id
+
+
+def test_transient_failures_retry_until_max_attempts(store, tmp_path):
+    job, _ = _enqueue(store, tmp_path / "data")
+    failure = {"ok": False, "message": "PermissionError", "transient": True}
+    for attempt in range(1, jobs.MAX_ATTEMPTS + 1):
+        claimed, _ = store.claim("test")
+        assert (claimed.id, claimed.attempts) == (job.id, attempt)
+        done = store.finish(job.id, failure)
+    assert done.state == "failed"
+    assert store.claim("test") == (None, [])
+
+
+def test_retry_waits_with_backoff(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "RETRY_BASE", 60.0)
+    job, _ = _enqueue(store, tmp_path / "data")
+    store.claim("test")
+    failure = {"ok": False, "message": "TimeoutError", "transient": True}
+    queued = store.finish(job.id, failure)
+    assert queued.state == "queued"
+    assert queued.not_before >= time.time() + 55
+    assert store.claim("test")[0] is None  # todavía no le toca
+
+
+def test_permanent_failure_is_not_retried(store, tmp_path):
+    job, _ = _enqueue(store, tmp_path / "data")
+    store.claim("test")
+    failure = {"ok": False, "message": "FileNotFoundError", "transient": False}
+    assert store.finish(job.id, failure).state == "failed"
+    assert store.claim("test") == (None, [])
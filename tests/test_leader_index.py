@@ -0,0 +1,52 @@
+"""Resolución de Chapter Leaders: sólo nombre exacto o correo; el resto sugiere."""
+
+from __future__ import annotations
+
+import graphs
+
+COUNTS = [
+    ("Rene Ruben Plaz Cabrera (rplaz@bcp.com.pe)", 40),
+    ("RENE RUBEN PLAZ CABRERA", 10),
+    ("Rene Plaz Rojas (rplazr@bcp.com.pe)", 5),
+    ("Ana Maria Torres Quispe (atorres@bcp.com.pe)", 7),
+]
+
+
+def _idx() -> graphs.LeaderIndex:
+    return graphs.LeaderIndex.from_counts(COUNTS)
+
+
+def test_exact_name_ignores_case_accents_and_email_suffix():
+    idx = _idx()
+    norm = idx.resolve("  rené rubén plaz cabrera ")
+    assert norm == graphs.normalize_name("RENE RUBEN PLAZ CABRERA")
+    assert idx.count[norm] == 50
+    assert idx.raw[norm] == {COUNTS[0][0], COUNTS[1][0]}
+
+
+def test_email_resolves_any_name():
+    assert _idx().resolve("Otro Nombre", "ATORRES@bcp.com.pe ") == (
+        graphs.normalize_name("Ana Maria Torres Quispe")
+    )
+
+
+def test_partial_or_misspelled_names_only_suggest():
+    idx = _idx()
+    for name in ("Rene Plaz", "Rene Ruben Plaz Cabrerra", "Ana Torres"):
+        assert idx.resolve(name) is None
+    assert idx.suggest("Rene Plaz Cabrera")[0] == "Rene Ruben Plaz Cabrera"
+    assert "Ana Maria Torres Quispe" in idx.suggest("Ana Torres")
+
+
+def test_unresolved_leader_filters_nothing_and_warns(monkeypatch):
+    warned: list[str] = []
+    monkeypatch.setattr(graphs, "_warn", warned.append)
+    idx = _idx()
+    assert graphs._resolve_leader(idx, "Chapter leader", "Rene Plaz", "") is None
+    assert warned and "¿quizá" in warned[0]
+
+
+def test_merge_adds_counts():
+    a, b = _idx(), graphs.LeaderIndex.from_counts(COUNTS[:1])
+    a.merge(b)
+    assert a.count[graphs.normalize_name("RENE RUBEN PLAZ CABRERA")] == 90
@@ -0,0 +1,99 @@
+"""--update: sustitución de imágenes por sección sin relaciones rotas ni sobrantes."""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import zipfile
+
+import pytest
+from PIL import Image
+from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+
+import generate_presentation as gp
+
+
+def _png(color: str, size: tuple[int, int] = (400, 300)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+RED, GREEN, BLUE = _png("red"), _png("green"), _png("blue")
+
+
+def _build(pngs: dict[str, list[bytes]]):
+    prs = gp.TEMPLATE.get()
+    builder = gp._DeckBuilder(prs, {s: "v1" for s in pngs})
+    for section, images in pngs.items():
+        for png in images:
+            builder.place(section, io.BytesIO(png), gp._png_size(png))
+    return prs
+
+
+def _patch(prs, section: str, pngs: list[bytes]) -> tuple[int, int, int]:
+    old = gp._tagged_pictures(prs)[section]
+    builder = gp._DeckBuilder(prs, {section: "v2"})
+    return gp._patch_section(builder, section, old, pngs)
+
+
+def _assert_rels_match_images(prs) -> None:
+    """Cada imagen apunta a una relación válida y no sobra ninguna."""
+    for slide in prs.slides:
+        embeds = set(slide._element.xpath(".//a:blip/@r:embed"))
+        images = {
+            rId for rId, rel in slide.part.rels.items() if rel.reltype == RT.IMAGE
+        }
+        assert embeds == images
+
+
+def _media(prs) -> int:
+    buf = io.BytesIO()
+    prs.save(buf)
+    Presentation(io.BytesIO(buf.getvalue()))  # vuelve a abrir sin errores
+    with zipfile.ZipFile(buf) as zf:
+        return sum(n.startswith("ppt/media/") for n in zf.namelist())
+
+
+@pytest.fixture
+def base_media():
+    return _media(gp.TEMPLATE.get())
+
+
+def test_identical_images_share_a_relationship_that_survives_removal():
+    prs = _build({"calidad": [RED, RED]})
+    (slide, first, _), (_, second, _) = gp._tagged_pictures(prs)["calidad"]
+    assert first._element.blip_rId == second._element.blip_rId
+    gp._remove_picture(slide, second)
+    _assert_rels_match_images(prs)
+    assert gp._image_sha1(slide, first) == hashlib.sha1(RED).hexdigest()
+
+
+def test_calidad_shrink_drops_continuation_slide(base_media):
+    prs = _build({"calidad": [RED, GREEN, RED, GREEN, BLUE, BLUE]})
+    slides = len(prs.slides)
+    assert _media(prs) == base_media + 3
+
+    assert _patch(prs, "calidad", [RED, BLUE, RED]) == (1, 0, 3)
+    assert len(prs.slides) == slides - 1  # la continuación quedó vacía
+    _assert_rels_match_images(prs)
+    assert _media(prs) == base_media + 2  # GREEN ya no se usa
+    tags = [pic.name for _, pic, _ in gp._tagged_pictures(prs)["calidad"]]
+    assert tags == [f"{gp.TAG_PREFIX} calidad#{i} v2" for i in range(3)]
+
+
+def test_calidad_grow_adds_continuation_slide():
+    prs = _build({"calidad": [RED, GREEN]})
+    slides = len(prs.slides)
+    assert _patch(prs, "calidad", [RED, GREEN, BLUE, BLUE, RED]) == (0, 3, 0)
+    assert len(prs.slides) == slides + 1
+    _assert_rels_match_images(prs)
+
+
+def test_stacked_section_is_placed_again(base_media):
+    prs = _build({"tiempo": [RED, GREEN]})
+    assert _patch(prs, "tiempo", [RED, GREEN]) == (0, 0, 0)
+    assert _patch(prs, "tiempo", [BLUE]) == (1, 0, 1)
+    _assert_rels_match_images(prs)
+    assert _media(prs) == base_media + 1
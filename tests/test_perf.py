@@ -0,0 +1,112 @@
+"""Regresión de rendimiento del pipeline por etapas (perf_harness.py).
+
+Por defecto sólo se comprueba lo determinista sobre libros sintéticos
+pequeños: filas convertidas, filas del CL y aciertos de la caché en memoria.
+
+Con ``-m perf`` (o CHAPTER_PERF=1) cada etapa debe además quedar dentro de
+MAX_SLOWDOWN× el tiempo y MAX_MEM_GROWTH× la memoria de perf_baseline.json.
+Tras una mejora (o en otra máquina de CI) se regenera con
+``python perf_harness.py --save-baseline``.
+"""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+import graphs
+import perf_harness as ph
+
+SCALE = 1.0
+SMALL_SCALE = 0.05  # filas de cada libro: max(base × escala, 50)
+STAGES = [stage for stage, _ in ph.STAGES]
+
+
+# ───────────── DETERMINISTA ─────────────
+@pytest.fixture(scope="module")
+def small(tmp_path_factory) -> ph.Pipeline:
+    root = tmp_path_factory.mktemp("perf_small")
+    graphs.set_data_dir(str(root))
+    graphs.set_chapter_leader(ph.LEADER, ph.LEADER_EMAIL)
+    pipe = ph.Pipeline(ph.make_workbooks(str(root), SMALL_SCALE))
+    ph._drop_caches(cache=True)
+    pipe.ingest()
+    return pipe
+
+
+def _sheets(pipe: ph.Pipeline):
+    for section, fp in pipe.paths.items():
+        for sheet in graphs.SOURCE_SHEETS[section]:
+            yield fp, sheet
+
+
+def test_ingest_converts_every_row(small):
+    rows = {"Consolidado Pases": 1000, "Consolidado Reversiones": 50}
+    for fp, sheet in _sheets(small):
+        kw = {"sheet_name": sheet} if sheet else {}
+        excel = pd.read_excel(fp, **kw)
+        assert graphs.is_cached(fp, sheet)
+        assert len(graphs.read_any(fp, **kw)) == len(excel) == rows.get(sheet, len(excel))
+
+
+def test_cached_reads_skip_excel(small, monkeypatch):
+    def no_excel(*a, **kw):
+        raise AssertionError("se volvió a leer el Excel")
+
+    graphs.FRAMES.clear()
+    monkeypatch.setattr(graphs.pd, "read_excel", no_excel)
+    for fp, sheet in _sheets(small):
+        graphs.read_any(fp, **({"sheet_name": sheet} if sheet else {}))
+
+
+def test_filter_keeps_leader_rows_and_hits_memory(small):
+    fp = small.paths["dedicacion"]
+    expected = int((graphs.read_any(fp)["Nombre CL"] == ph.LEADER).sum())
+    graphs.FRAMES.clear()
+    assert len(graphs.read_leader(fp, "Nombre CL")) == expected > 0
+
+    before = graphs.FRAMES.stats()
+    assert len(graphs.read_leader(fp, "Nombre CL")) == expected
+    after = graphs.FRAMES.stats()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] == before["misses"]
+
+
+# ───────────── MEDICIÓN (opcional) ─────────────
+perf = pytest.mark.perf
+
+
+@pytest.fixture(scope="module")
+def baseline() -> dict | None:
+    return ph.load_baseline(ph.BASELINE_PATH, SCALE)
+
+
+@pytest.fixture(scope="module")
+def results(baseline) -> dict[str, ph.StageResult]:
+    _, results = ph.measure(SCALE)
+    ph.apply_budgets(results, baseline, SCALE)
+    return {r.stage: r for r in results}
+
+
+@perf
+def test_baseline_covers_every_stage(baseline):
+    assert baseline is not None, f"Falta {ph.BASELINE_PATH} de escala {SCALE}"
+    assert set(baseline["stages"]) == set(STAGES)
+
+
+@perf
+@pytest.mark.parametrize("stage", STAGES)
+def test_stage_time(results, stage):
+    r = results[stage]
+    assert r.units <= r.budget_units, (
+        f"{stage}: {r.units:.1f} unidades (máx. {r.budget_units:.1f})"
+    )
+
+
+@perf
+@pytest.mark.parametrize("stage", STAGES)
+def test_stage_memory(results, stage):
+    r = results[stage]
+    assert r.mem_mib <= r.budget_mib, (
+        f"{stage}: {r.mem_mib:.1f} MiB (máx. {r.budget_mib:.1f})"
+    )
@@ -0,0 +1,76 @@
+"""Percentiles del CL entre sus pares a partir del rollup (ranking.leader_ranking)."""
+
+from __future__ import annotations
+
+import math
+
+import pandas as pd
+import pytest
+
+import graphs
+import ranking
+
+MIN = ranking.MIN_ROWS
+
+
+def _rollup(rows: dict[str, dict[str, tuple[float, float]]]) -> pd.DataFrame:
+    """{líder: {métrica: (num, den)}} → tabla como la de load_rollup."""
+    records = []
+    for name, metrics in rows.items():
+        rec = {"leader": graphs.normalize_name(name), "valores": [name]}
+        for m, (num, den) in metrics.items():
+            rec[f"{m}_num"], rec[f"{m}_den"] = num, den
+        records.append(rec)
+    return pd.DataFrame(records)
+
+
+# reversiones / pases (mejor bajo) y horas de dedicación (mejor alto)
+PEERS = {
+    "ANA": {"reversiones": (1, 100), "dedicacion": (10 * MIN, MIN)},  # 1 %, 10 h
+    "BETO": {"reversiones": (5, 100), "dedicacion": (8 * MIN, MIN)},  # 5 %, 8 h
+    "CARLA": {"reversiones": (5, 100), "dedicacion": (6 * MIN, MIN)},  # 5 %, 6 h
+    "DANI": {"reversiones": (9, 100), "dedicacion": (4 * MIN, MIN)},  # 9 %, 4 h
+    "EVA": {"reversiones": (0, MIN - 1), "dedicacion": (99, 1)},  # pocas filas
+}
+
+
+def _rank(who: str, rows=PEERS) -> dict[str, pd.Series]:
+    with graphs.configured(who, "", graphs.DATA_DIR):
+        res = ranking.leader_ranking(_rollup(rows))
+    assert res is not None
+    return {r.metrica: r for _, r in res[1].iterrows()}
+
+
+def test_best_and_worst_get_the_extremes():
+    ana, dani = _rank("ANA"), _rank("DANI")
+    assert ana["reversiones"]["percentil"] == 100.0  # menos reversiones: mejor
+    assert ana["dedicacion"]["percentil"] == 100.0  # más horas: mejor
+    assert dani["reversiones"]["percentil"] == dani["dedicacion"]["percentil"] == 0.0
+    assert ana["reversiones"]["valor"] == pytest.approx(1.0)  # en %
+
+
+def test_ties_count_half():
+    beto = _rank("BETO")["reversiones"]
+    # supera a DANI (1) y empata con CARLA (½) entre 3 pares
+    assert beto["percentil"] == pytest.approx(100 * 1.5 / 3)
+    assert beto["mediana"] == pytest.approx(5.0)
+
+
+def test_leaders_below_min_rows_are_not_ranked():
+    eva = _rank("EVA")
+    assert math.isnan(eva["reversiones"]["valor"])
+    assert math.isnan(eva["reversiones"]["percentil"])
+    assert eva["reversiones"]["lideres"] == 4  # EVA no cuenta como par
+    # Con su dedicación tampoco hay filas suficientes
+    assert math.isnan(eva["dedicacion"]["percentil"])
+
+
+def test_metrics_without_source_are_skipped():
+    only_revs = {k: {"reversiones": v["reversiones"]} for k, v in PEERS.items()}
+    assert set(_rank("ANA", only_revs)) == {"reversiones"}
+
+
+def test_unknown_leader_has_no_ranking(monkeypatch):
+    monkeypatch.setattr(graphs, "_warn", lambda msg: None)
+    with graphs.configured("NADIE", "", graphs.DATA_DIR):
+        assert ranking.leader_ranking(_rollup(PEERS)) is None
@@ -0,0 +1,65 @@
+"""Plan de lecturas compartidas (ReportSpec → SourceScan) para varios líderes."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+import graphs
+
+ANA, LUIS = "ANA MARIA TORRES QUISPE", "LUIS ALBERTO PEREZ ROJAS"
+
+
+@pytest.fixture
+def sources(tmp_path):
+    dr = pd.DataFrame(
+        {
+            "Nombre CL": [ANA, ANA, LUIS, "OTRO LIDER", ANA.lower()],
+            "Nombres": ["DEV 1", "DEV 2", "DEV 3", "DEV 4", "DEV 1"],
+            "Dedicación": [1.0, 0.5, 2.0, 1.5, 0.0],
+            "Comentario": ["no se lee"] * 5,
+        }
+    )
+    calidad = pd.DataFrame({"Chapter leader": [ANA], "Mes": ["Ene"], "Squad": ["S"]})
+    paths = {"dedicacion": tmp_path / "DR.xlsx", "calidad": tmp_path / "Calidad.xlsx"}
+    dr.to_excel(paths["dedicacion"], index=False)
+    # Sólo la hoja de pases: a Calidad le falta «Consolidado Reversiones»
+    calidad.to_excel(paths["calidad"], sheet_name=graphs.CALIDAD_SHEETS[0], index=False)
+    with graphs.configured(ANA, "", str(tmp_path)):
+        yield {k: str(v) for k, v in paths.items()}
+
+
+def test_plan_groups_reports_by_sheet(tmp_path):
+    tmd, cal = str(tmp_path / "TMD.xlsx"), str(tmp_path / "Calidad.xlsx")
+    plan = graphs.plan_reports(
+        {"tiempo": tmd, "tiempo_p": tmd, "calidad": cal, "madurez": "m.parquet"}
+    )
+    got = [(s.path, s.sheet, s.reports) for s in plan]
+    # tiempo_p no tiene aggregate y un .parquet no entra en el plan
+    assert got == [
+        (tmd, None, ["tiempo"]),
+        (cal, graphs.CALIDAD_SHEETS[0], ["calidad"]),
+        (cal, graphs.CALIDAD_SHEETS[1], ["calidad"]),
+    ]
+
+
+def test_shared_read_matches_per_leader_reports(sources):
+    plan = graphs.plan_reports({"dedicacion": sources["dedicacion"]})
+    shared = graphs.aggregate_reports(plan, [(ANA, ""), (LUIS, "")])
+    (scan,) = plan
+    assert "Comentario" not in scan.columns  # sólo las columnas requeridas
+    assert scan.rows == 4  # una lectura con las filas de los dos líderes
+    for leader in (ANA, LUIS):
+        with graphs.configured(leader, "", graphs.DATA_DIR):
+            alone = graphs._dedicacion_avg(sources["dedicacion"])
+        pd.testing.assert_series_equal(shared[("dedicacion", leader)], alone)
+
+
+def test_report_with_a_missing_sheet_is_left_out(sources, monkeypatch):
+    warned: list[str] = []
+    monkeypatch.setattr(graphs, "_warn", warned.append)
+    plan = graphs.plan_reports(sources)
+    shared = graphs.aggregate_reports(plan, [(ANA, "")])
+    assert ("dedicacion", ANA) in shared
+    assert ("calidad", ANA) not in shared  # el llamador recurre a spec.plot
+    assert any(graphs.CALIDAD_SHEETS[1] in w for w in warned)
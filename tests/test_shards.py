@@ -0,0 +1,93 @@
+"""Reparto de las filas del CL en presentaciones por tribu / grupos de squads."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import generate_presentation as gp
+import graphs
+
+KEY = gp.SHARD_KEY
+PASES, REVS = graphs.CALIDAD_SHEETS
+
+
+def _frame(squads: list[str | None], tribus: list[str | None]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Chapter leader": ["ANA"] * len(squads),
+            "Mes": ["Ene", "Feb"] * (len(squads) // 2) + ["Mar"] * (len(squads) % 2),
+            "Squad": pd.array(squads, dtype="string"),
+            "Tribu": pd.array(tribus, dtype="string"),
+        }
+    )
+
+
+def _keyed(df: pd.DataFrame, by: str) -> pd.DataFrame:
+    col = gp.SHARD_COLUMNS[by][0]
+    return df.assign(**{KEY: graphs.norm_series(df[col]).to_numpy()})
+
+
+@pytest.fixture
+def calidad():
+    squads = ["SQ 10", "SQ 2", "sq 2", None, "SQ 1", "SQ 10", "SQ 3"]
+    tribus = ["Pagos", "pagos", "PAGOS", "Ahorro", None, "Pagos", "Ahorro"]
+    revs = _frame(["SQ 2", "SQ 10", None], ["Pagos", "Pagos", None])
+    return {
+        by: {
+            ("calidad", PASES): _keyed(_frame(squads, tribus), by),
+            ("calidad", REVS): _keyed(revs, by),
+        }
+        for by in ("tribu", "squad")
+    }
+
+
+def test_tribu_labels_use_most_common_spelling(calidad):
+    labels = gp._shard_labels(calidad["tribu"], "tribu", gp.SHARD_GROUP)
+    assert labels == {
+        "": (gp._slug(gp.SHARD_NONE), gp.SHARD_NONE),
+        "AHORRO": ("Ahorro", "Ahorro"),
+        "PAGOS": ("Pagos", "Pagos"),
+    }
+
+
+def test_squads_are_grouped_in_natural_order(calidad):
+    labels = gp._shard_labels(calidad["squad"], "squad", 2)
+    assert labels[""] == (gp._slug(gp.SHARD_NONE), gp.SHARD_NONE)
+    assert labels["SQ1"] == labels["SQ2"] == ("squads_01", "Squads SQ 1 – SQ 2")
+    assert labels["SQ3"] == labels["SQ10"] == ("squads_02", "Squads SQ 3 – SQ 10")
+
+
+@pytest.mark.parametrize("by", ["tribu", "squad"])
+def test_slices_split_and_merge_back_to_the_same_rows(calidad, tmp_path, by):
+    frames = calidad[by]
+    labels = gp._shard_labels(frames, by, 2)
+    slices = gp._write_shard_tables(frames, labels, str(tmp_path))
+    assert set(slices) == {name for name, _ in labels.values()}
+
+    merged: dict[tuple, list[pd.DataFrame]] = {}
+    for name, parts in slices.items():
+        for report, sheet, path, offset, n in parts:
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+            part = table.slice(offset, n).to_pandas()
+            assert (part[KEY] == name).all()  # cada tramo es sólo de su shard
+            merged.setdefault((report, sheet), []).append(part.drop(columns=KEY))
+
+    def ordered(df: pd.DataFrame) -> pd.DataFrame:
+        return df.sort_values(["Squad", "Mes"]).reset_index(drop=True)
+
+    for key, df in frames.items():
+        back = ordered(pd.concat(merged[key]))
+        pd.testing.assert_frame_equal(back, ordered(df.drop(columns=KEY)))
+
+    # Los conteos de Calidad de los shards suman los de la presentación completa
+    def totals(fr: dict) -> tuple[int, int]:
+        full = graphs._calidad_agg({s: df.copy() for (_, s), df in fr.items()})
+        return (0, 0) if full is None else (full["passes"].sum(), full["revs"].sum())
+
+    shard_of = {k: df[KEY].map(lambda n: labels[n][0]) for k, df in frames.items()}
+    shards = [
+        {k: df[shard_of[k] == name] for k, df in frames.items()} for name in slices
+    ]
+    assert tuple(map(sum, zip(*map(totals, shards)))) == totals(frames)
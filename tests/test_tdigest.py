@@ -0,0 +1,59 @@
+"""Precisión del t-digest con el que se calculan los p50/p90 de TMD."""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+import graphs
+
+QUANTILES = (0.01, 0.1, 0.5, 0.9, 0.99)
+RANK_TOL = 0.005  # error de rango admitido: el percentil real cae a ±0.5 puntos
+
+
+def _values(kind: str) -> np.ndarray:
+    rng = np.random.default_rng(34)
+    if kind == "gamma":  # forma típica de los días de desarrollo
+        return rng.gamma(2.0, 6.0, 100_000)
+    return rng.lognormal(2.0, 1.0, 100_000)  # cola larga
+
+
+def _rank_error(values: np.ndarray, digest: graphs.TDigest, q: float) -> float:
+    return abs(float((values <= digest.quantile(q)).mean()) - q)
+
+
+@pytest.mark.parametrize("kind", ["gamma", "lognormal"])
+def test_quantiles_within_rank_tolerance(kind):
+    values = _values(kind)
+    digest = graphs.TDigest()
+    for chunk in np.array_split(values, 40):  # como los lotes de CHUNK_ROWS
+        digest.update(chunk)
+    assert digest.count == len(values)
+    assert len(digest.means) <= graphs.TDIGEST_COMPRESSION
+    for q in QUANTILES:
+        assert _rank_error(values, digest, q) < RANK_TOL, q
+
+
+def test_merged_digests_match_a_single_pass():
+    values = _values("gamma")
+    whole = graphs.TDigest().update(values)
+    merged = graphs.TDigest()
+    for part in np.array_split(values, 7):  # p.ej. un sketch por (squad, mes)
+        merged.merge(graphs.TDigest().update(part))
+    assert merged.count == whole.count
+    for q in QUANTILES:
+        assert _rank_error(values, merged, q) < RANK_TOL, q
+
+
+def test_extremes_are_exact_and_nan_is_ignored():
+    digest = graphs.TDigest().update([3.0, np.nan, 1.0, 7.0, np.nan])
+    assert digest.count == 3
+    assert (digest.quantile(0.0), digest.quantile(1.0)) == (1.0, 7.0)
+    assert digest.quantile(0.5) == 3.0
+
+
+def test_empty_digest_has_no_quantiles():
+    digest = graphs.TDigest().merge(graphs.TDigest()).update([np.nan])
+    assert math.isnan(digest.quantile(0.5))